@@ -0,0 +1,5 @@
+#!/bin/bash
+
+# Parser and build benchmarks; pass --save/--compare baseline.json to
+# track regressions
+cd src && python3 -m benchmarks "$@"
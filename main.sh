@@ -1,8 +1,6 @@
 #!/bin/bash
 
-# Local development script (uses default "/" basepath)
-python3 src/main.py
-
-echo "Local build complete! Site built to docs/ directory"
+# Local development server: renders pages from memory and reloads the
+# browser when content/, static/ or template.html change
 echo "Starting local server on http://localhost:8888"
-python3 -m http.server 8888 --directory docs
+python3 src/main.py --serve 8888
@@ -0,0 +1,121 @@
+import os
+import marshal
+
+from block_markdown import PARSER_VERSION, markdown_to_html_node
+from build_cache import hash_bytes
+from publish import atomic_open
+
+AST_CACHE_DIR = ".ast_cache"
+# Bumped when the entry layout changes; old entries are just never read.
+ENTRY_VERSION = 2
+
+
+def render_spans(node):
+    # The tree's HTML, exactly as node.to_html() writes it, plus where URL
+    # rewriting has to touch it: the (start, end) of every href and src
+    # value, and for every <img> the offset just past its last attribute
+    # with the (start, end) of its src. Rewriting is then a splice instead
+    # of a walk over a rebuilt tree.
+    parts = []
+    urls = []
+    images = []
+    offset = 0
+    # Pre-order, with closing tags pushed as plain strings.
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, str):
+            parts.append(current)
+            offset += len(current)
+            continue
+        if current.tag is None:
+            if current.children is not None:
+                raise ValueError("invalid HTML: no tag")
+            if current.value is None:
+                raise ValueError("invalid HTML: no value")
+            parts.append(current.value)
+            offset += len(current.value)
+            continue
+        head = f"<{current.tag}"
+        parts.append(head)
+        offset += len(head)
+        src = None
+        for prop, value in (current.props or {}).items():
+            offset += len(prop) + 3
+            parts.append(f' {prop}="{value}"')
+            if prop == "href" or prop == "src":
+                urls.append((offset, offset + len(value)))
+                if prop == "src":
+                    src = (offset, offset + len(value))
+            offset += len(value) + 1
+        if current.tag == "img" and src is not None:
+            images.append((offset, *src))
+        parts.append(">")
+        offset += 1
+        if current.children is None:
+            if current.value is None:
+                raise ValueError("invalid HTML: no value")
+            tail = f"{current.value}</{current.tag}>"
+            parts.append(tail)
+            offset += len(tail)
+            continue
+        stack.append(f"</{current.tag}>")
+        stack.extend(reversed(current.children))
+    return "".join(parts), urls, images
+
+
+class AstCache:
+    # Each page's parsed HTML on disk by source hash and PARSER_VERSION,
+    # before any basepath, asset or image rewriting, with the spans
+    # render_spans records. A template- or basepath-only rebuild loads it
+    # instead of parsing the markdown again and splices in the new URLs.
+    def __init__(self, directory=AST_CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown):
+        return hash_bytes(markdown.encode())
+
+    def path(self, source_hash):
+        return os.path.join(self.directory, source_hash[:2], f"{source_hash}-v{PARSER_VERSION}.{ENTRY_VERSION}.ast")
+
+    def load(self, source_hash):
+        try:
+            with open(self.path(source_hash), "rb") as f:
+                html, urls, images = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            # Missing, or cut short by a crash: parse again.
+            return None
+        return html, urls, images
+
+    def store(self, source_hash, entry):
+        with atomic_open(self.path(source_hash), "wb") as f:
+            marshal.dump(entry, f)
+
+    def get(self, source_hash):
+        # The (html, urls, images) entry, or None on a miss.
+        entry = self.load(source_hash)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, source_hash, markdown):
+        # Parses markdown, stores the entry and returns it.
+        entry = render_spans(markdown_to_html_node(markdown))
+        self.store(source_hash, entry)
+        return entry
+
+
+_ast_cache = None
+
+
+def get_ast_cache():
+    return _ast_cache
+
+
+def set_ast_cache(cache):
+    global _ast_cache
+    _ast_cache = cache
@@ -0,0 +1,163 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import generate_page
+from generate_page import (
+    _init_worker,
+    build_page,
+    collect_pages,
+    page_template_hash,
+    read_source,
+    render_shared,
+    shared_page_key,
+    worker_initargs,
+    write_page,
+)
+from profiler import get_profiler
+from template import load_template
+
+# Pages read ahead of the renderers, and in flight overall.
+DEFAULT_CONCURRENCY = 16
+# Rendered pages handed to one blocking write call.
+WRITE_BATCH_SIZE = 32
+
+
+def generate_pages_async(dir_path_content, template_path, dest_dir_path, basepath="/", cache=None, jobs=None,
+                         concurrency=DEFAULT_CONCURRENCY, batch_size=WRITE_BATCH_SIZE, assets=None, images=None, pages=None):
+    # Same output as generate_pages_parallel, but reads, rendering and writes
+    # overlap: up to `concurrency` sources are read at once on threads while
+    # the process pool renders, and a single writer flushes finished pages in
+    # batches. Meant for content on slow (e.g. network) storage.
+    if pages is None:
+        pages = collect_pages(dir_path_content, dest_dir_path)
+    if not pages:
+        return
+    asyncio.run(_pipeline(
+        pages, template_path, basepath, cache, jobs or os.cpu_count() or 1, max(1, concurrency), max(1, batch_size),
+        assets, images,
+    ))
+
+
+async def _pipeline(pages, template_path, basepath, cache, jobs, concurrency, batch_size, assets, images):
+    loop = asyncio.get_running_loop()
+    profiler = get_profiler()
+    template_hash = page_template_hash(cache, template_path, assets, images)
+    # Bounded, so a fast reader can't pull the whole site into memory ahead
+    # of slow rendering, nor rendering run far ahead of slow writes.
+    read_queue = asyncio.Queue(concurrency)
+    write_queue = asyncio.Queue(concurrency)
+    pending = iter(pages)
+    failed = []
+
+    async def reader():
+        # Every reader pulls the next page from the shared iterator.
+        for from_path, dest_path in pending:
+            try:
+                content, source_hash = await asyncio.to_thread(read_source, from_path, True)
+            except Exception as e:
+                logging.error(f"Failed to read {from_path}: {type(e).__name__}: {e}")
+                failed.append(from_path)
+                continue
+            await read_queue.put((from_path, dest_path, content, source_hash))
+
+    async def renderer(executor):
+        while True:
+            item = await read_queue.get()
+            if item is None:
+                return
+            from_path, dest_path, content, source_hash = item
+            if cache is not None and cache.page_is_fresh(dest_path, source_hash, template_hash, basepath):
+                await write_queue.put((from_path, dest_path, source_hash, None, False))
+                continue
+            shared_key = shared_page_key(source_hash, template_hash, basepath)
+            task = (from_path, template_path, dest_path, basepath, content, shared_key)
+            try:
+                html, spans = await loop.run_in_executor(executor, _render_task, task)
+            except Exception as e:
+                logging.error(f"Failed to generate page from {from_path}: {type(e).__name__}: {e}")
+                failed.append(from_path)
+                continue
+            if spans:
+                profiler.merge(spans)
+            await write_queue.put((from_path, dest_path, source_hash, html, True))
+
+    async def writer():
+        done = False
+        while not done:
+            batch = [await write_queue.get()]
+            while len(batch) < batch_size and not write_queue.empty():
+                batch.append(write_queue.get_nowait())
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            errors = await asyncio.to_thread(_write_batch, batch)
+            for (from_path, dest_path, source_hash, html, generated), error in zip(batch, errors):
+                if error is not None:
+                    logging.error(f"Failed to write {dest_path}: {error}")
+                    failed.append(from_path)
+                    continue
+                if generated:
+                    logging.info(f"Generating page from {from_path} to {dest_path} using {template_path}")
+                else:
+                    logging.info(f"Skipping unchanged page: {from_path}")
+                if cache is not None:
+                    cache.record_page(dest_path, from_path, source_hash, template_hash, basepath)
+
+    async def feed(executor):
+        renderers = [asyncio.create_task(renderer(executor)) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*(reader() for _ in range(concurrency)))
+            for _ in renderers:
+                await read_queue.put(None)
+            await asyncio.gather(*renderers)
+        finally:
+            for task in renderers:
+                task.cancel()
+        await write_queue.put(None)
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=worker_initargs(assets, images)) as executor:
+        writer_task = asyncio.create_task(writer())
+        feed_task = asyncio.create_task(feed(executor))
+        # If either side dies the other would wait on a queue forever.
+        await asyncio.wait((writer_task, feed_task), return_when=asyncio.FIRST_EXCEPTION)
+        for task in (writer_task, feed_task):
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                for other in (writer_task, feed_task):
+                    other.cancel()
+                await asyncio.gather(writer_task, feed_task, return_exceptions=True)
+                raise task.exception()
+
+    if failed:
+        raise RuntimeError(f"failed to generate {len(failed)} page(s): {', '.join(sorted(failed))}")
+
+
+def _render_task(task):
+    # Runs in a pool worker (see generate_page._init_worker). Returns the
+    # page HTML, or None for sources big enough to be streamed, which the
+    # worker writes itself.
+    from_path, template_path, dest_path, basepath, content, shared_key = task
+    profiler = get_profiler()
+    with profiler.page(from_path):
+        template = load_template(template_path, basepath, generate_page._worker_assets, generate_page._worker_images)
+        if content is None:
+            build_page(from_path, content, template, dest_path)
+            html = None
+        else:
+            html = render_shared(content, template, shared_key)
+    return html, profiler.drain()
+
+
+def _write_batch(batch):
+    # One thread hop for the whole batch; an error per page, or None.
+    errors = []
+    for _, dest_path, _, html, _ in batch:
+        try:
+            if html is not None:
+                with get_profiler().stage("write"):
+                    write_page(dest_path, html)
+            errors.append(None)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    return errors
@@ -0,0 +1,9 @@
+# Performance benchmarks. Run from src/ (or via bench.sh):
+#
+#   python3 -m benchmarks                       micro + end-to-end suite
+#   python3 -m benchmarks --save baseline.json  record a baseline
+#   python3 -m benchmarks --compare baseline.json
+#   python3 -m benchmarks.inline_chained        single-pass vs chained tokenizer
+#   python3 -m benchmarks.node_memory           __slots__ vs __dict__ node memory
+#   python3 -m benchmarks.dispatch [N]          dispatch tables vs if-chains on N nodes
+#   python3 -m benchmarks.ast_cache [BLOCKS]    warm --ast-cache hits vs parsing a BLOCKS-block page
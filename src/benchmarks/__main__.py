@@ -0,0 +1,57 @@
+import sys
+import logging
+import argparse
+
+from benchmarks.suite import (
+    DEFAULT_THRESHOLD,
+    compare_results,
+    format_seconds,
+    load_results,
+    run_suite,
+    save_results,
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks", description="Run the parser and build benchmarks.")
+    parser.add_argument("--pages", type=int, default=200, help="pages in the generated site (default: 200)")
+    parser.add_argument("--blocks", type=int, default=50, help="blocks per page of the end-to-end site (default: 50)")
+    parser.add_argument("--micro-blocks", type=int, default=200, help="blocks in the micro-benchmarks' page (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed (default: 0)")
+    parser.add_argument("--jobs", "-j", type=int, default=0, metavar="N", help="processes for the parallel build (0 = one per CPU)")
+    parser.add_argument("--micro-only", action="store_true", help="skip the end-to-end builds")
+    parser.add_argument("--save", metavar="PATH", help="write the results to PATH as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="slowdown that counts as a regression (default: 0.10)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The builds log every page; only the numbers matter here.
+    logging.disable(logging.INFO)
+    results = run_suite(
+        end_to_end=not args.micro_only, pages=args.pages, blocks=args.blocks, seed=args.seed, jobs=args.jobs,
+        micro_blocks=args.micro_blocks,
+    )
+    if args.save:
+        save_results(results, args.save)
+
+    if not args.compare:
+        for name, seconds in sorted(results["results"].items()):
+            print(f"{name:<32} {format_seconds(seconds)}")
+        return 0
+
+    regressions = 0
+    for name, before, after, ratio, regressed in compare_results(load_results(args.compare), results, args.threshold):
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<32} {format_seconds(before)} -> {format_seconds(after)}  x{ratio:5.2f}{flag}")
+        regressions += regressed
+    if regressions:
+        print(f"{regressions} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import sys
+import shutil
+import tempfile
+
+from ast_cache import AstCache, set_ast_cache
+from generate_page import render_page
+from template import Template
+
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.suite import TEMPLATE, best_time
+
+
+def bench(label, func, baseline, number):
+    seconds = best_time(func, number)
+    print(f"{label:<28} {seconds * 1e3:7.2f} ms   x{baseline / seconds:5.2f}")
+
+
+def main():
+    # render_page on one generated page: the uncached paths against a cold
+    # --ast-cache miss and warm hits, at "/" and under a basepath.
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    markdown = CorpusGenerator(0).page(blocks)
+    plain = Template(TEMPLATE)
+    site = Template(TEMPLATE, "/site/")
+    number = max(1, 2000 // blocks)
+    directory = tempfile.mkdtemp(prefix="bench_ast_cache_")
+    try:
+        tree = best_time(lambda: render_page(markdown, site), number)
+        print(f"{'uncached, /site/ (tree)':<28} {tree * 1e3:7.2f} ms")
+        bench("uncached, / (direct)", lambda: render_page(markdown, plain), tree, number)
+
+        cache = AstCache(directory)
+        set_ast_cache(cache)
+
+        def miss():
+            # Parse, store and splice, as the first --ast-cache build does.
+            shutil.rmtree(directory, ignore_errors=True)
+            render_page(markdown, plain)
+
+        bench("cache miss, /", miss, tree, number)
+        render_page(markdown, site)
+        bench("cache hit, /site/", lambda: render_page(markdown, site), tree, number)
+        bench("cache hit, /", lambda: render_page(markdown, plain), tree, number)
+    finally:
+        set_ast_cache(None)
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
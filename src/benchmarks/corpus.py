@@ -0,0 +1,106 @@
+import os
+import random
+
+# Relative weight of each block kind; paragraphs carry the inline mix.
+DEFAULT_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "unordered_list": 1,
+    "ordered_list": 1,
+    "quote": 1,
+    "code": 1,
+}
+
+# Chance that a word in a paragraph or list item is decorated.
+DEFAULT_INLINE = {
+    "bold": 0.04,
+    "italic": 0.04,
+    "code": 0.03,
+    "link": 0.03,
+    "image": 0.01,
+}
+
+WORDS = (
+    "the hobbit ring shire elf dwarf wizard mountain river forest road tower "
+    "valley king battle song light shadow stone tree journey council gate"
+).split()
+
+
+class CorpusGenerator:
+    # Same seed and settings, same corpus, on every machine: benchmark
+    # numbers stay comparable across runs and commits.
+    def __init__(self, seed=0, mix=None, inline=None, words_per_block=40):
+        self.rng = random.Random(seed)
+        self.mix = dict(DEFAULT_MIX if mix is None else mix)
+        self.inline = dict(DEFAULT_INLINE if inline is None else inline)
+        self.words_per_block = words_per_block
+        self._kinds = list(self.mix)
+        self._weights = [self.mix[kind] for kind in self._kinds]
+
+    def page(self, blocks, title=None):
+        title = title or self.sentence(4).rstrip(".")
+        parts = [f"# {title}"]
+        for _ in range(blocks):
+            kind = self.rng.choices(self._kinds, self._weights)[0]
+            parts.append(getattr(self, kind)())
+        return "\n\n".join(parts) + "\n"
+
+    def word(self):
+        word = self.rng.choice(WORDS)
+        roll = self.rng.random()
+        for kind, chance in self.inline.items():
+            if roll < chance:
+                return self._decorate(kind, word)
+            roll -= chance
+        return word
+
+    def _decorate(self, kind, word):
+        if kind == "bold":
+            return f"**{word}**"
+        if kind == "italic":
+            return f"_{word}_"
+        if kind == "code":
+            return f"`{word}`"
+        if kind == "link":
+            return f"[{word}](/{word}/{self.rng.randrange(100)})"
+        return f"![{word}](/images/{word}.png)"
+
+    def sentence(self, words):
+        text = " ".join(self.word() for _ in range(words))
+        return text[0].upper() + text[1:] + "."
+
+    def paragraph(self):
+        return self.sentence(self.words_per_block)
+
+    def heading(self):
+        return "#" * self.rng.randint(2, 6) + " " + self.sentence(5).rstrip(".")
+
+    def unordered_list(self):
+        return "\n".join(f"- {self.sentence(8)}" for _ in range(self.rng.randint(2, 6)))
+
+    def ordered_list(self):
+        return "\n".join(f"{i}. {self.sentence(8)}" for i in range(1, self.rng.randint(3, 7)))
+
+    def quote(self):
+        return "\n".join(f"> {self.sentence(10)}" for _ in range(self.rng.randint(1, 4)))
+
+    def code(self):
+        lines = [f"{self.rng.choice(WORDS)} = {self.rng.randrange(1000)}" for _ in range(self.rng.randint(2, 8))]
+        return "```\n" + "\n".join(lines) + "\n```"
+
+
+def generate_corpus(content_dir, pages, blocks_per_page=50, seed=0, mix=None, inline=None, pages_per_dir=50):
+    # Writes pages as content_dir/sectionNN/pageNNNN.md (plus an index.md)
+    # and returns their paths.
+    generator = CorpusGenerator(seed, mix, inline)
+    paths = []
+    for i in range(pages):
+        if i == 0:
+            path = os.path.join(content_dir, "index.md")
+        else:
+            path = os.path.join(content_dir, f"section{i // pages_per_dir:02}", f"page{i:04}.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(generator.page(blocks_per_page, f"Page {i}"))
+        paths.append(path)
+    return paths
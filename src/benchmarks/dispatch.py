@@ -0,0 +1,115 @@
+import re
+import sys
+import timeit
+
+from block_markdown import (
+    Block,
+    BlockType,
+    block_to_html_node,
+    code_to_html_node,
+    heading_to_html_node,
+    olist_to_html_node,
+    paragraph_to_html_node,
+    quote_to_html_node,
+    ulist_to_html_node,
+)
+from htmlnode import LeafNode
+from inline_markdown import extract_markdown_images, extract_markdown_links, extract_markdown_links_and_images
+from textnode import TextNode, TextType, text_node_to_html_node
+
+
+# The if-chains and per-call patterns as they were, for comparison.
+def chained_text_node_to_html_node(text_node):
+    if text_node.text_type == TextType.TEXT:
+        return LeafNode(None, text_node.text)
+    if text_node.text_type == TextType.BOLD:
+        return LeafNode("b", text_node.text)
+    if text_node.text_type == TextType.ITALIC:
+        return LeafNode("i", text_node.text)
+    if text_node.text_type == TextType.CODE:
+        return LeafNode("code", text_node.text)
+    if text_node.text_type == TextType.LINK:
+        return LeafNode("a", text_node.text, {"href": text_node.url})
+    if text_node.text_type == TextType.IMAGE:
+        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+    raise ValueError(f"invalid text type: {text_node.text_type}")
+
+
+def chained_block_to_html_node(block):
+    block_type = block.block_type
+    lines = block.lines
+    if block_type == BlockType.PARAGRAPH:
+        return paragraph_to_html_node(lines)
+    if block_type == BlockType.HEADING:
+        return heading_to_html_node(lines)
+    if block_type == BlockType.CODE:
+        return code_to_html_node(lines)
+    if block_type == BlockType.OLIST:
+        return olist_to_html_node(lines)
+    if block_type == BlockType.ULIST:
+        return ulist_to_html_node(lines)
+    if block_type == BlockType.QUOTE:
+        return quote_to_html_node(lines)
+    raise ValueError("invalid block type")
+
+
+def uncompiled_extract(text):
+    images = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    links = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return images, links
+
+
+def compiled_extract(text):
+    return extract_markdown_images(text), extract_markdown_links(text)
+
+
+# One of each kind, cycled, so every branch of the chains is taken.
+TEXT_NODES = [
+    TextNode("plain ", TextType.TEXT),
+    TextNode("bold", TextType.BOLD),
+    TextNode("italic", TextType.ITALIC),
+    TextNode("code", TextType.CODE),
+    TextNode("link", TextType.LINK, "/pages/1"),
+    TextNode("figure", TextType.IMAGE, "/images/1.png"),
+]
+BLOCKS = [
+    Block(BlockType.PARAGRAPH, ["word"], 1),
+    Block(BlockType.HEADING, ["## h"], 1),
+    Block(BlockType.CODE, ["```", "x", "```"], 1),
+    Block(BlockType.OLIST, ["1. a"], 1),
+    Block(BlockType.ULIST, ["- a"], 1),
+    Block(BlockType.QUOTE, ["> q"], 1),
+]
+FRAGMENTS = [
+    "plain words with nothing in them",
+    "see [page](/pages/1) and more",
+    "a ![figure](/images/1.png) here",
+    "[one](/1) ![two](/2.png) [three](/3)",
+]
+
+
+def bench(label, before, after, items):
+    old = min(timeit.repeat(lambda: [before(item) for item in items], number=1, repeat=3))
+    new = min(timeit.repeat(lambda: [after(item) for item in items], number=1, repeat=3))
+    count = len(items)
+    print(
+        f"{label:<22} before {old / count * 1e9:7.1f} ns/item   after {new / count * 1e9:7.1f} ns/item   "
+        f"x{old / new:5.2f}   ({count} items)"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    # A synthetic document of `count` text nodes, the shape the inline
+    # tokenizer hands to text_node_to_html_node.
+    text_nodes = [TEXT_NODES[i % len(TEXT_NODES)] for i in range(count)]
+    bench("text node dispatch", chained_text_node_to_html_node, text_node_to_html_node, text_nodes)
+    blocks = [BLOCKS[i % len(BLOCKS)] for i in range(count // 10)]
+    bench("block dispatch", chained_block_to_html_node, block_to_html_node, blocks)
+    fragments = [FRAGMENTS[i % len(FRAGMENTS)] for i in range(count // 10)]
+    bench("link/image patterns", uncompiled_extract, compiled_extract, fragments)
+    bench("link/image one scan", uncompiled_extract, extract_markdown_links_and_images, fragments)
+
+
+if __name__ == "__main__":
+    main()
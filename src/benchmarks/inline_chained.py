@@ -0,0 +1,46 @@
+import sys
+import timeit
+
+from inline_markdown import (
+    text_to_textnodes,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+)
+from textnode import TextNode, TextType
+
+
+def chained_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def link_heavy_paragraph(links):
+    return " ".join(f"see [page {i}](/pages/{i}) and ![figure {i}](/images/{i}.png)" for i in range(links))
+
+
+def mixed_paragraph(repeats):
+    return " ".join("Some **bold** and _italic_ words, `code`, and a [link](/x)." for _ in range(repeats))
+
+
+def bench(label, text, number):
+    chained = min(timeit.repeat(lambda: chained_text_to_textnodes(text), number=number, repeat=3))
+    single = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=3))
+    print(f"{label:<28} chained {chained / number * 1e3:9.3f} ms   single-pass {single / number * 1e3:9.3f} ms   x{chained / single:6.1f}")
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    for links in (10, 100, 1000 * scale):
+        bench(f"link-heavy ({links} links)", link_heavy_paragraph(links), max(1, 2000 // links))
+    for repeats in (10, 100, 1000 * scale):
+        bench(f"mixed ({repeats} sentences)", mixed_paragraph(repeats), max(1, 2000 // repeats))
+
+
+if __name__ == "__main__":
+    main()
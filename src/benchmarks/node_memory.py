@@ -0,0 +1,95 @@
+import sys
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+
+# The node classes as they were before __slots__, for comparison.
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag, value, None, props)
+
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
+
+
+# Shared strings so only the node objects themselves are measured.
+WORDS = ["plain text ", "bold", "italic", "code", "link"]
+URL = "/pages/1"
+
+
+def build_text_nodes(text_node_class, count):
+    return [text_node_class(WORDS[i % 5], TextType.TEXT) for i in range(count)]
+
+
+def build_page(leaf_class, parent_class, count):
+    # Paragraphs of four leaves plus the paragraph itself: five nodes each.
+    paragraphs = []
+    for _ in range(count // 5):
+        paragraphs.append(
+            parent_class(
+                "p",
+                [
+                    leaf_class(None, WORDS[0]),
+                    leaf_class("b", WORDS[1]),
+                    leaf_class("i", WORDS[2]),
+                    leaf_class("a", WORDS[4], {"href": URL}),
+                ],
+            )
+        )
+    return parent_class("div", paragraphs)
+
+
+def measure(build, *args):
+    tracemalloc.start()
+    result = build(*args)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def report(label, before, after, count):
+    print(
+        f"{label:<12} __dict__ {before / 1e6:7.2f} MB ({before / count:6.1f} B/node)   "
+        f"__slots__ {after / 1e6:7.2f} MB ({after / count:6.1f} B/node)   "
+        f"saved {100 * (before - after) / before:4.1f}%"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    report(
+        "TextNode",
+        measure(build_text_nodes, DictTextNode, count),
+        measure(build_text_nodes, TextNode, count),
+        count,
+    )
+    report(
+        "HTML page",
+        measure(build_page, DictLeafNode, DictParentNode, count),
+        measure(build_page, LeafNode, ParentNode, count),
+        count,
+    )
+
+
+if __name__ == "__main__":
+    main()
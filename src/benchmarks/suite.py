@@ -0,0 +1,112 @@
+import os
+import json
+import shutil
+import platform
+import tempfile
+import timeit
+
+from block_markdown import blocks_to_html_node, markdown_to_html, markdown_to_html_node, scan_blocks
+from generate_page import generate_pages_parallel, generate_pages_recursive
+from inline_markdown import text_to_textnodes
+
+from benchmarks.corpus import CorpusGenerator, generate_corpus
+
+RESULTS_VERSION = 1
+# A benchmark counts as regressed when it got this much slower.
+DEFAULT_THRESHOLD = 0.10
+TEMPLATE = '<!doctype html><html><head><title>{{ Title }}</title><link href="/index.css" /></head><body><article>{{ Content }}</article></body></html>'
+
+
+def best_time(func, number, repeat=5):
+    # Seconds per call, best of `repeat` runs: the minimum is the least noisy.
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def micro_benchmarks(blocks=200, seed=0):
+    # One page, timed stage by stage with the same inputs the build sees.
+    markdown = CorpusGenerator(seed).page(blocks)
+    lines = markdown.split("\n")
+    block_list = list(scan_blocks(lines))
+    paragraphs = [" ".join(block.lines) for block in block_list if block.block_type.value == "paragraph"]
+    node = markdown_to_html_node(markdown)
+    number = max(1, 2000 // blocks)
+    return {
+        "block_split": best_time(lambda: list(scan_blocks(markdown.split("\n"))), number),
+        "inline_parse": best_time(lambda: [text_to_textnodes(text) for text in paragraphs], number),
+        "block_to_html": best_time(lambda: blocks_to_html_node(block_list), number),
+        "serialize": best_time(node.to_html, number),
+        "markdown_to_html": best_time(lambda: markdown_to_html_node(markdown).to_html(), number),
+        "markdown_to_html_direct": best_time(lambda: markdown_to_html(markdown), number),
+    }
+
+
+def end_to_end_benchmarks(pages=200, blocks=50, seed=0, jobs=None, repeat=3):
+    # Full builds of a generated site into a temporary directory: one
+    # process, and a process pool.
+    root = tempfile.mkdtemp(prefix="bench_site_")
+    try:
+        content_dir = os.path.join(root, "content")
+        dest_dir = os.path.join(root, "docs")
+        template_path = os.path.join(root, "template.html")
+        generate_corpus(content_dir, pages, blocks, seed)
+        with open(template_path, "w") as f:
+            f.write(TEMPLATE)
+        jobs = jobs or os.cpu_count() or 1
+        return {
+            f"build_{pages}_pages": best_time(
+                lambda: generate_pages_recursive(content_dir, template_path, dest_dir, "/site/"), 1, repeat
+            ),
+            f"build_{pages}_pages_jobs{jobs}": best_time(
+                lambda: generate_pages_parallel(content_dir, template_path, dest_dir, "/site/", jobs=jobs), 1, repeat
+            ),
+        }
+    finally:
+        shutil.rmtree(root)
+
+
+def run_suite(micro=True, end_to_end=True, pages=200, blocks=50, seed=0, jobs=None, micro_blocks=200):
+    results = {}
+    if micro:
+        results.update(micro_benchmarks(micro_blocks, seed))
+    if end_to_end:
+        results.update(end_to_end_benchmarks(pages, blocks, seed, jobs))
+    return {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def save_results(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+
+
+def load_results(path):
+    with open(path, "r") as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: unsupported benchmark results version {results.get('version')}")
+    return results
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    # (name, baseline seconds, current seconds, ratio, regressed) for every
+    # benchmark present in both runs.
+    rows = []
+    for name, seconds in sorted(current["results"].items()):
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = seconds / before if before else float("inf")
+        rows.append((name, before, seconds, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:8.3f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.3f} ms"
+    return f"{seconds * 1e6:8.3f} us"
@@ -1,10 +1,20 @@
+import os
 from enum import Enum
+from collections import OrderedDict
 
+from build_cache import hash_bytes
 from htmlnode import ParentNode
-from inline_markdown import text_to_textnodes
+from publish import atomic_open
+from inline_markdown import emit_text_html, text_to_textnodes
 from textnode import text_node_to_html_node, TextNode, TextType
 
 
+# Bump when rendering changes, so cached fragments are redone.
+PARSER_VERSION = 1
+BLOCK_CACHE_SIZE = 4096
+BLOCK_CACHE_DIR = ".block_cache"
+
+
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
     HEADING = "heading"
@@ -14,35 +24,116 @@ class BlockType(Enum):
     ULIST = "unordered_list"
 
 
+class Block:
+    def __init__(self, block_type, lines, line_number):
+        self.block_type = block_type
+        self.lines = lines
+        self.line_number = line_number
+
+    def __eq__(self, other):
+        return (
+            self.block_type == other.block_type
+            and self.lines == other.lines
+            and self.line_number == other.line_number
+        )
+
+    def __repr__(self):
+        return f"Block({self.block_type.value}, {self.lines}, line {self.line_number})"
+
+
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+    return ["\n".join(block.lines) for block in scan_blocks(markdown.split("\n"))]
+
+
+def iter_markdown_blocks(source):
+    # Lazy markdown_to_blocks over a text file object (or any line iterable).
+    for block in scan_blocks(source):
+        yield "\n".join(block.lines)
+
+
+def scan_blocks(lines, first_line_number=1, fences=True):
+    # Single forward pass over the lines. Blocks are separated by empty lines,
+    # except inside a ``` fence, which runs until its closing fence. Lines may
+    # still carry their trailing newline, as when iterating over a file.
+    current = []
+    start = first_line_number
+    fenced = False
+    for number, line in enumerate(lines, first_line_number):
+        if line.endswith("\n"):
+            line = line[:-1]
+        if fenced:
+            current.append(line)
+            if line.startswith("```"):
+                fenced = False
+                block = make_block(current, start)
+                if block is not None:
+                    yield block
+                current = []
+            continue
+        if line == "":
+            if current:
+                block = make_block(current, start)
+                if block is not None:
+                    yield block
+                current = []
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        if not current:
+            start = number
+        if fences and opens_fence(line) and not any(current_line.strip() for current_line in current):
+            fenced = True
+        current.append(line)
+    if fenced:
+        # Never closed: fall back to splitting on empty lines like any other text.
+        yield from scan_blocks(current, start, fences=False)
+    elif current:
+        block = make_block(current, start)
+        if block is not None:
+            yield block
+
+
+def opens_fence(line):
+    line = line.lstrip()
+    return line.startswith("```") and "`" not in line[3:]
+
+
+def make_block(lines, line_number):
+    # Equivalent to "\n".join(lines).strip().split("\n") without the copies.
+    first = 0
+    last = len(lines) - 1
+    while first <= last and lines[first].strip() == "":
+        first += 1
+    while last >= first and lines[last].strip() == "":
+        last -= 1
+    if first > last:
+        return None
+    lines = lines[first:last + 1]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return Block(lines_to_block_type(lines), lines, line_number + first)
 
 
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return lines_to_block_type(block.split("\n"))
+
+
+def lines_to_block_type(lines):
+    first = lines[0]
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+    if first.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
         return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+    if len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```"):
         return BlockType.CODE
-    if block.startswith(">"):
+    if first.startswith(">"):
         for line in lines:
             if not line.startswith(">"):
                 return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    if block.startswith("- "):
+    if first.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
                 return BlockType.PARAGRAPH
         return BlockType.ULIST
-    if block.startswith("1. "):
+    if first.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}. "):
@@ -53,7 +144,10 @@ def block_to_block_type(block):
 
 
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+    return blocks_to_html_node(scan_blocks(markdown.split("\n")))
+
+
+def blocks_to_html_node(blocks):
     children = []
     for block in blocks:
         html_node = block_to_html_node(block)
@@ -62,20 +156,194 @@ def markdown_to_html_node(markdown):
 
 
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    if block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
-    if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
-    if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    raise ValueError("invalid block type")
+    # Accepts a scanned Block or a raw block string.
+    if isinstance(block, Block):
+        block_type = block.block_type
+        lines = block.lines
+    else:
+        lines = block.split("\n")
+        block_type = lines_to_block_type(lines)
+    renderer = BLOCK_RENDERERS.get(block_type)
+    if renderer is None:
+        raise ValueError("invalid block type")
+    return renderer(lines)
+
+
+class BlockRenderCache:
+    # Serialized HTML fragments by a hash of the block's lines and the render
+    # context (basepath, asset and image digests), least recently used first
+    # out. Blocks repeated across pages -- a shared footer, a license note --
+    # are parsed once; with a directory, fragments outlive the build too.
+    # Only the in-memory entries are bounded by max_entries: the directory
+    # is never evicted from and grows until it is deleted.
+    def __init__(self, max_entries=BLOCK_CACHE_SIZE, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def key(self, block, context=""):
+        text = "\n".join(block.lines)
+        return hash_bytes(f"{PARSER_VERSION}\0{context}\0{block.block_type.value}\0{text}".encode())
+
+    def get(self, key):
+        fragment = self._entries.get(key)
+        if fragment is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), "r") as f:
+                fragment = f.read()
+        except OSError:
+            return None
+        self.disk_hits += 1
+        self._remember(key, fragment)
+        return fragment
+
+    def put(self, key, fragment):
+        self._remember(key, fragment)
+        if self.directory is not None:
+            with atomic_open(self._path(key)) as f:
+                f.write(fragment)
+
+    def render(self, block, context="", rewrite=None):
+        # rewrite, if given, post-processes the block's node before it is
+        # serialized; context must cover everything it depends on.
+        key = self.key(block, context)
+        fragment = self.get(key)
+        if fragment is None:
+            self.misses += 1
+            if rewrite is None:
+                fragment = block_to_html(block)
+            else:
+                fragment = rewrite(block_to_html_node(block)).to_html()
+            self.put(key, fragment)
+        return fragment
+
+    def render_blocks(self, blocks, context="", rewrite=None):
+        # Same HTML as blocks_to_html_node(blocks).to_html().
+        return "<div>" + "".join(self.render(block, context, rewrite) for block in blocks) + "</div>"
+
+    def stats(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _remember(self, key, fragment):
+        self._entries[key] = fragment
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.html")
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_render_cache = None
+
+
+def get_render_cache():
+    return _render_cache
+
+
+def set_render_cache(cache):
+    global _render_cache
+    _render_cache = cache
+
+
+# Fast path: the same HTML as markdown_to_html_node(markdown).to_html(),
+# written straight from the scanned blocks and the inline scanner without
+# the TextNode and HTMLNode trees. Use the node functions when the tree
+# itself is needed, e.g. to rewrite URLs.
+def markdown_to_html(markdown):
+    return blocks_to_html(scan_blocks(markdown.split("\n")))
+
+
+def blocks_to_html(blocks):
+    parts = ["<div>"]
+    for block in blocks:
+        emit_block_html(block, parts.append)
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def block_to_html(block):
+    parts = []
+    emit_block_html(block, parts.append)
+    return "".join(parts)
+
+
+def emit_block_html(block, write):
+    # Accepts a scanned Block or a raw block string, like block_to_html_node.
+    if isinstance(block, Block):
+        block_type = block.block_type
+        lines = block.lines
+    else:
+        lines = block.split("\n")
+        block_type = lines_to_block_type(lines)
+    emitter = BLOCK_EMITTERS.get(block_type)
+    if emitter is None:
+        raise ValueError("invalid block type")
+    emitter(lines, write)
+
+
+def emit_paragraph_html(lines, write):
+    write("<p>")
+    emit_text_html(" ".join(lines), write)
+    write("</p>")
+
+
+def emit_heading_html(lines, write):
+    text = "\n".join(lines)
+    level = len(text) - len(text.lstrip("#"))
+    if level + 1 >= len(text):
+        raise ValueError(f"invalid heading level: {level}")
+    write(f"<h{level}>")
+    emit_text_html(text[level + 1 :], write)
+    write(f"</h{level}>")
+
+
+def emit_code_html(lines, write):
+    text = "\n".join(lines)
+    if not text.startswith("```") or not text.endswith("```"):
+        raise ValueError("invalid code block")
+    write(f"<pre><code>{text[4:-3]}</code></pre>")
+
+
+def emit_list_html(tag, marker, lines, write):
+    write(f"<{tag}>")
+    for item in lines:
+        write("<li>")
+        emit_text_html(item[marker:], write)
+        write("</li>")
+    write(f"</{tag}>")
+
+
+def emit_quote_html(lines, write):
+    new_lines = []
+    for line in lines:
+        if not line.startswith(">"):
+            raise ValueError("invalid quote block")
+        new_lines.append(line.lstrip(">").strip())
+    write("<blockquote>")
+    emit_text_html(" ".join(new_lines), write)
+    write("</blockquote>")
+
+
+BLOCK_EMITTERS = {
+    BlockType.PARAGRAPH: emit_paragraph_html,
+    BlockType.HEADING: emit_heading_html,
+    BlockType.CODE: emit_code_html,
+    BlockType.OLIST: lambda lines, write: emit_list_html("ol", 3, lines, write),
+    BlockType.ULIST: lambda lines, write: emit_list_html("ul", 2, lines, write),
+    BlockType.QUOTE: emit_quote_html,
+}
 
 
 def text_to_children(text):
@@ -87,14 +355,29 @@ def text_to_children(text):
     return children
 
 
+# The block renderers below take either the block string or its list of
+# lines, so the scanner's pre-split lines are never split again.
+def as_lines(block):
+    if isinstance(block, str):
+        return block.split("\n")
+    return block
+
+
+def as_text(block):
+    if isinstance(block, str):
+        return block
+    return "\n".join(block)
+
+
 def paragraph_to_html_node(block):
-    lines = block.split("\n")
+    lines = as_lines(block)
     paragraph = " ".join(lines)
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
 
 def heading_to_html_node(block):
+    block = as_text(block)
     level = 0
     for char in block:
         if char == "#":
@@ -109,6 +392,7 @@ def heading_to_html_node(block):
 
 
 def code_to_html_node(block):
+    block = as_text(block)
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
     text = block[4:-3]
@@ -119,7 +403,7 @@ def code_to_html_node(block):
 
 
 def olist_to_html_node(block):
-    items = block.split("\n")
+    items = as_lines(block)
     html_items = []
     for item in items:
         text = item[3:]
@@ -129,7 +413,7 @@ def olist_to_html_node(block):
 
 
 def ulist_to_html_node(block):
-    items = block.split("\n")
+    items = as_lines(block)
     html_items = []
     for item in items:
         text = item[2:]
@@ -139,7 +423,7 @@ def ulist_to_html_node(block):
 
 
 def quote_to_html_node(block):
-    lines = block.split("\n")
+    lines = as_lines(block)
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
@@ -148,3 +432,13 @@ def quote_to_html_node(block):
     content = " ".join(new_lines)
     children = text_to_children(content)
     return ParentNode("blockquote", children)
+
+
+BLOCK_RENDERERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.OLIST: olist_to_html_node,
+    BlockType.ULIST: ulist_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+}
@@ -0,0 +1,169 @@
+import os
+import json
+import hashlib
+import logging
+
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.pages = {}
+        self.static = {}
+        self.hashes = {}
+        self.forced = False
+        self._seen = set()
+        self._file_hashes = {}
+        self._hashed = set()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable build cache {self.manifest_path}: {e}")
+            return
+        if manifest.get("version") != MANIFEST_VERSION:
+            logging.info(f"Ignoring build cache with old version: {self.manifest_path}")
+            return
+        self.pages = manifest.get("pages", {})
+        self.static = manifest.get("static", {})
+        self.hashes = manifest.get("hashes", {})
+
+    def save(self):
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "pages": self.pages,
+            "static": self.static,
+            "hashes": self.hashes,
+        }
+        manifest_dir = os.path.dirname(self.manifest_path)
+        if manifest_dir:
+            os.makedirs(manifest_dir, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def clear(self):
+        # Treat every entry as stale, but keep them so prune still knows
+        # which outputs earlier builds left behind.
+        self.forced = True
+        self._file_hashes = {}
+
+    def file_hash(self, path):
+        # Memoized for the lifetime of the build, e.g. the template.
+        path = os.fspath(path)
+        if path not in self._file_hashes:
+            self._file_hashes[path] = hash_file(path)
+        return self._file_hashes[path]
+
+    def content_hash(self, path):
+        # Persisted across builds and trusted while size and mtime match,
+        # e.g. for fingerprinting a large asset tree.
+        path = os.fspath(path)
+        self._hashed.add(path)
+        st = os.stat(path)
+        entry = self.hashes.get(path)
+        if entry is not None and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["hash"]
+        digest = hash_file(path)
+        self.hashes[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+        return digest
+
+    def forget_hash(self, path):
+        # For long-running processes (watch mode) when a file changes on disk.
+        self._file_hashes.pop(os.fspath(path), None)
+
+    def page_is_fresh(self, dest_path, source_hash, template_hash, basepath):
+        dest_path = os.fspath(dest_path)
+        self._seen.add(dest_path)
+        entry = self.pages.get(dest_path)
+        if self.forced or entry is None or not os.path.exists(dest_path):
+            return False
+        return self.entry_matches(entry, source_hash, template_hash, basepath)
+
+    @staticmethod
+    def entry_matches(entry, source_hash, template_hash, basepath):
+        return (
+            entry["source_hash"] == source_hash
+            and entry["template_hash"] == template_hash
+            and entry["basepath"] == basepath
+        )
+
+    def record_page(self, dest_path, from_path, source_hash, template_hash, basepath):
+        dest_path = os.fspath(dest_path)
+        self._seen.add(dest_path)
+        self.pages[dest_path] = {
+            "source": os.fspath(from_path),
+            "source_hash": source_hash,
+            "template_hash": template_hash,
+            "basepath": basepath,
+        }
+
+    def record_static(self, src_path, dest_path):
+        dest_path = os.fspath(dest_path)
+        self._seen.add(dest_path)
+        st = os.stat(src_path)
+        self.static[dest_path] = {
+            "source": os.fspath(src_path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+
+    def outputs_for_source(self, source_path):
+        # Outputs built from source_path, or from anything under it if it
+        # was a directory.
+        source_path = os.fspath(source_path)
+        prefix = source_path.rstrip(os.sep) + os.sep
+        outputs = []
+        for entries in (self.pages, self.static):
+            for dest_path, entry in entries.items():
+                if entry["source"] == source_path or entry["source"].startswith(prefix):
+                    outputs.append(dest_path)
+        return outputs
+
+    def remove_output(self, dest_path, output_root=None):
+        dest_path = os.fspath(dest_path)
+        self.pages.pop(dest_path, None)
+        self.static.pop(dest_path, None)
+        self._seen.discard(dest_path)
+        if os.path.isfile(dest_path):
+            os.remove(dest_path)
+            logging.info(f"Pruned stale output: {dest_path}")
+            _remove_empty_parents(dest_path, output_root)
+
+    def prune(self, output_root=None):
+        for entries in (self.pages, self.static):
+            for dest_path in list(entries):
+                if dest_path not in self._seen:
+                    self.remove_output(dest_path, output_root)
+        self.hashes = {path: entry for path, entry in self.hashes.items() if path in self._hashed}
+
+
+def _remove_empty_parents(path, output_root):
+    if output_root is None:
+        return
+    root = os.path.abspath(output_root)
+    parent = os.path.dirname(os.path.abspath(path))
+    while parent != root and parent.startswith(root + os.sep):
+        if os.listdir(parent):
+            break
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
@@ -0,0 +1,118 @@
+import os
+import errno
+import fcntl
+import shutil
+
+# ioctl(dest_fd, FICLONE, src_fd) from linux/fs.h: share the source's
+# extents copy-on-write (btrfs, xfs, ...).
+FICLONE = 0x40049409
+COPY_MODES = ("copy", "hardlink", "reflink")
+
+# Errors that mean "this fast path isn't available here", not "the copy failed".
+UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EPERM, errno.EBADF}
+
+
+def scan_tree(root):
+    # One pass over the tree with os.scandir; yields (relative_dir, dirs,
+    # files), files being (name, size) pairs, parents before children.
+    stack = [""]
+    while stack:
+        relative_dir = stack.pop()
+        dirs = []
+        files = []
+        with os.scandir(os.path.join(root, relative_dir)) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    dirs.append(entry.name)
+                elif entry.is_file():
+                    files.append((entry.name, entry.stat().st_size))
+        dirs.sort()
+        files.sort()
+        yield relative_dir, dirs, files
+        stack.extend(os.path.join(relative_dir, name) for name in reversed(dirs))
+
+
+def copy_file(src_path, dest_path, mode="copy"):
+    # Replace dest_path with src_path's contents. The new file is built next
+    # to the destination and renamed over it, so readers never see a partial
+    # file and a hardlinked destination is never written through.
+    if mode not in COPY_MODES:
+        raise ValueError(f"unknown copy mode: {mode}")
+    dest_dir, name = os.path.split(dest_path)
+    tmp_path = os.path.join(dest_dir, f".{name}.tmp")
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        if mode == "hardlink" and _try_link(src_path, tmp_path):
+            os.replace(tmp_path, dest_path)
+            return
+        with open(src_path, "rb") as src, open(tmp_path, "wb") as dest:
+            if not (mode == "reflink" and _try_reflink(src, dest)):
+                copy_contents(src, dest)
+        shutil.copystat(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def copy_contents(src, dest):
+    # Kernel-side copies first: copy_file_range can reflink or offload on the
+    # same filesystem, sendfile works across filesystems; both keep the data
+    # out of Python buffers.
+    size = os.fstat(src.fileno()).st_size
+    for copy in (_copy_file_range, _sendfile):
+        try:
+            copy(src.fileno(), dest.fileno(), size)
+            return
+        except OSError as e:
+            if e.errno not in UNSUPPORTED:
+                raise
+            # Start over with the next method.
+            src.seek(0)
+            dest.seek(0)
+            dest.truncate()
+    shutil.copyfileobj(src, dest, 1 << 20)
+
+
+def _copy_file_range(src_fd, dest_fd, size):
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range unavailable")
+    copied = 0
+    while copied < size:
+        sent = os.copy_file_range(src_fd, dest_fd, size - copied)
+        if sent == 0:
+            break
+        copied += sent
+
+
+def _sendfile(src_fd, dest_fd, size):
+    if not hasattr(os, "sendfile"):
+        raise OSError(errno.ENOSYS, "sendfile unavailable")
+    copied = 0
+    while copied < size:
+        sent = os.sendfile(dest_fd, src_fd, copied, size - copied)
+        if sent == 0:
+            break
+        copied += sent
+
+
+def _try_link(src_path, tmp_path):
+    try:
+        os.link(src_path, tmp_path)
+        return True
+    except OSError as e:
+        if e.errno in UNSUPPORTED or e.errno == errno.EMLINK:
+            return False
+        raise
+
+
+def _try_reflink(src, dest):
+    try:
+        fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError as e:
+        if e.errno in UNSUPPORTED:
+            return False
+        raise
@@ -0,0 +1,191 @@
+import os
+import logging
+import posixpath
+import threading
+import urllib.parse
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from generate_page import render_page
+from template import load_template
+from watch import DependencyGraph, make_watcher
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVE_RELOAD_PATH}").onmessage = function () {{ location.reload(); }};</script>'
+)
+
+
+class PageStore:
+    # Rendered pages keyed by their output path relative to the site root
+    # ("blog/tom/index.html"), rendered on first request and dropped when
+    # their source changes.
+    def __init__(self, content_dir, static_dir, template_path, basepath="/"):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.basepath = basepath
+        self.graph = DependencyGraph(content_dir, static_dir, template_path, "")
+        self.version = 0
+        self._pages = {}
+        self._changed = threading.Condition()
+
+    def source_for(self, relative_html):
+        return os.path.join(self.content_dir, *relative_html[:-len(".html")].split("/")) + ".md"
+
+    def has_page(self, relative_html):
+        return os.path.isfile(self.source_for(relative_html))
+
+    def get(self, relative_html):
+        with self._changed:
+            page = self._pages.get(relative_html)
+            version = self.version
+        if page is not None:
+            return page
+        source_path = self.source_for(relative_html)
+        if not os.path.isfile(source_path):
+            return None
+        logging.info(f"Rendering page from {source_path}")
+        with open(source_path, 'r') as source:
+            content = source.read()
+        html = render_page(content, load_template(self.template_path, self.basepath))
+        page = inject_live_reload(html).encode()
+        with self._changed:
+            # Don't keep a render that raced with an edit to its sources.
+            if self.version == version:
+                self._pages[relative_html] = page
+        return page
+
+    def cached_pages(self):
+        with self._changed:
+            return sorted(self._pages)
+
+    def invalidate(self, paths):
+        with self._changed:
+            for path in paths:
+                kind = self.graph.classify(path)
+                if kind == "template":
+                    self._pages.clear()
+                elif kind == "content":
+                    relative = os.path.relpath(self.graph.page_source(path), self.content_dir)
+                    if relative.endswith(".md"):
+                        self._pages.pop(relative[:-len(".md")].replace(os.sep, "/") + ".html", None)
+                    else:
+                        # A directory came or went: drop everything under it.
+                        prefix = relative.replace(os.sep, "/") + "/"
+                        for key in [key for key in self._pages if key.startswith(prefix)]:
+                            del self._pages[key]
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, version, timeout=None):
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+def inject_live_reload(html):
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT
+    return html[:index] + LIVE_RELOAD_SCRIPT + html[index:]
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    # Pages come from the PageStore; anything else is served straight from
+    # the static directory.
+    def __init__(self, *args, store=None, **kwargs):
+        self.store = store
+        super().__init__(*args, directory=store.static_dir, **kwargs)
+
+    def do_GET(self):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if path == LIVE_RELOAD_PATH:
+            self.serve_events()
+            return
+        relative = posixpath.normpath(path).lstrip("/")
+        if relative in ("", "."):
+            relative = "index.html"
+        elif path.endswith("/"):
+            relative += "/index.html"
+        if relative.startswith(".."):
+            self.send_error(404)
+            return
+        if relative.endswith(".html"):
+            try:
+                page = self.store.get(relative)
+            except Exception as e:
+                logging.error(f"Failed to render {relative}: {e}")
+                self.send_error(500, f"Failed to render {relative}: {e}")
+                return
+            if page is not None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(page)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(page)
+                return
+        elif self.store.has_page(posixpath.join(relative, "index.html")):
+            self.send_response(301)
+            self.send_header("Location", path + "/")
+            self.end_headers()
+            return
+        super().do_GET()
+
+    def serve_events(self):
+        # Take the version before answering, so a change that lands right
+        # after the client sees the headers is still pushed.
+        version = self.store.version
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            while not getattr(self.server, "stopping", False):
+                new_version = self.store.wait_for_change(version, timeout=15)
+                if new_version == version:
+                    self.wfile.write(b": keep-alive\n\n")
+                else:
+                    version = new_version
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+def make_server(store, host="127.0.0.1", port=8888):
+    server = ThreadingHTTPServer((host, port), partial(DevRequestHandler, store=store))
+    server.daemon_threads = True
+    return server
+
+
+def watch_store(store, stop, polling=False):
+    watcher = make_watcher([store.content_dir, store.static_dir], [store.template_path], polling)
+    try:
+        while not stop.is_set():
+            changed = watcher.wait(timeout=0.5)
+            if changed:
+                store.invalidate(changed)
+    finally:
+        watcher.close()
+
+
+def serve(content_dir, static_dir, template_path, basepath="/", host="127.0.0.1", port=8888, polling=False):
+    store = PageStore(content_dir, static_dir, template_path, basepath)
+    server = make_server(store, host, port)
+    stop = threading.Event()
+    watcher_thread = threading.Thread(target=watch_store, args=(store, stop, polling), daemon=True)
+    watcher_thread.start()
+    logging.info(f"Serving {content_dir} and {static_dir} from memory on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.stopping = True
+        server.server_close()
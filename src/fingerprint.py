@@ -0,0 +1,77 @@
+import os
+import json
+
+from build_cache import hash_bytes, hash_file
+from copy_engine import scan_tree
+from publish import atomic_open
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+HASH_LENGTH = 10
+
+# Only assets pages link to get a hash in their name; robots.txt,
+# favicon.ico and friends have to stay where crawlers and browsers look.
+FINGERPRINT_EXTENSIONS = {
+    ".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif",
+    ".woff", ".woff2", ".ttf", ".mp4", ".webm", ".mp3",
+}
+
+
+class AssetManifest:
+    # Site-root URLs of static assets mapped to their fingerprinted URLs:
+    # {"/index.css": "/index.0123456789.css"}. Hashable by content, so it can
+    # be part of the compiled-template cache key.
+    def __init__(self, urls=None):
+        self.urls = dict(urls or {})
+        self.digest = hash_bytes(json.dumps(self.urls, sort_keys=True).encode())
+
+    def get(self, url, default=None):
+        return self.urls.get(url, default)
+
+    def save(self, path):
+        with atomic_open(path) as f:
+            json.dump(self.urls, f, indent=1, sort_keys=True)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def __bool__(self):
+        return bool(self.urls)
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __eq__(self, other):
+        return isinstance(other, AssetManifest) and self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return f"AssetManifest({len(self.urls)} assets, {self.digest[:HASH_LENGTH]})"
+
+
+def asset_url(relative_dir, name):
+    if not relative_dir:
+        return "/" + name
+    return "/" + relative_dir.replace(os.sep, "/") + "/" + name
+
+
+def fingerprinted_name(name, digest):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def fingerprint_assets(static_path, cache=None):
+    # With a cache, hashes are reused for files whose size and mtime haven't
+    # changed, so an incremental build only reads what was edited.
+    urls = {}
+    for relative_dir, _, files in scan_tree(static_path):
+        for name, _ in files:
+            if os.path.splitext(name)[1].lower() not in FINGERPRINT_EXTENSIONS:
+                continue
+            path = os.path.join(static_path, relative_dir, name)
+            digest = cache.content_hash(path) if cache is not None else hash_file(path)
+            urls[asset_url(relative_dir, name)] = asset_url(relative_dir, fingerprinted_name(name, digest))
+    return AssetManifest(urls)
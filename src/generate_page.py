@@ -1,47 +1,257 @@
 import os
 import logging
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 
-from block_markdown import markdown_to_html_node
+from ast_cache import get_ast_cache, set_ast_cache
+from block_markdown import (
+    blocks_to_html,
+    blocks_to_html_node,
+    block_to_html_node,
+    emit_block_html,
+    get_render_cache,
+    scan_blocks,
+    set_render_cache,
+)
+from build_cache import BuildCache, hash_bytes, hash_file
+from profiler import Profiler, get_profiler, set_profiler
+from publish import atomic_open
+from shared_cache import get_shared_cache, page_key, set_shared_cache
+from template import load_template
 
 logging.basicConfig(
     level=logging.INFO, 
     format='%(levelname)s: %(message)s'
 )
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
+# Sources at least this big are rendered block by block straight into the
+# output file instead of being held in memory as a string and a node tree.
+STREAMING_THRESHOLD = 16 * 1024 * 1024
+
+def generate_page(from_path, template_path, dest_path, basepath="/", cache=None, assets=None, images=None):
+    with get_profiler().page(from_path):
+        _generate_page(from_path, template_path, dest_path, basepath, cache, assets, images)
+
+def _generate_page(from_path, template_path, dest_path, basepath, cache, assets, images):
+    template_hash = page_template_hash(cache, template_path, assets, images)
+    with get_profiler().stage("read"):
+        content, source_hash = read_source(from_path, with_hash=template_hash is not None)
+    
+    if cache is not None:
+        if cache.page_is_fresh(dest_path, source_hash, template_hash, basepath):
+            logging.info(f"Skipping unchanged page: {from_path}")
+            return
+    
     logging.info(f"Generating page from {from_path} to {dest_path} using {template_path}")
     
+    template = load_template(template_path, basepath, assets, images)
+    build_page(from_path, content, template, dest_path, shared_page_key(source_hash, template_hash, basepath))
     
+    if cache is not None:
+        cache.record_page(dest_path, from_path, source_hash, template_hash, basepath)
+
+def template_key(cache, template_path, assets=None, images=None):
+    # Everything a page depends on besides its source and the basepath.
+    template_hash = cache.file_hash(template_path) if cache is not None else hash_file(template_path)
+    if assets or images:
+        digests = [template_hash, assets.digest if assets else "", images.digest if images else ""]
+        return hash_bytes(":".join(digests).encode())
+    return template_hash
+
+def page_template_hash(cache, template_path, assets=None, images=None):
+    # None when neither the build cache nor the shared cache needs it.
+    if cache is None and get_shared_cache() is None:
+        return None
+    return template_key(cache, template_path, assets, images)
+
+def shared_page_key(source_hash, template_hash, basepath):
+    if get_shared_cache() is None or source_hash is None or template_hash is None:
+        return None
+    return page_key(source_hash, template_hash, basepath)
+
+def read_source(from_path, with_hash=False):
+    # Returns (None, hash) for sources that should be streamed.
+    if os.path.getsize(from_path) >= STREAMING_THRESHOLD:
+        return None, hash_file(from_path) if with_hash else None
     with open(from_path, 'r') as source:
         content = source.read()
+    return content, hash_bytes(content.encode()) if with_hash else None
+
+def build_page(from_path, content, template, dest_path, shared_key=None):
+    profiler = get_profiler()
+    if content is None and template.can_stream():
+        with profiler.stage("stream"):
+            stream_page(from_path, template, dest_path)
+        return
+    if content is None:
+        with profiler.stage("read"):
+            with open(from_path, 'r') as source:
+                content = source.read()
+    html = render_shared(content, template, shared_key)
+    with profiler.stage("write"):
+        write_page(dest_path, html)
+
+def render_shared(content, template, shared_key=None):
+    # render_page, unless another build already put the page in the shared
+    # cache under shared_key. Streamed pages never go through here.
+    shared = get_shared_cache()
+    if shared is None or shared_key is None:
+        return render_page(content, template)
+    with get_profiler().stage("shared cache"):
+        data = shared.get(shared_key)
+    if data is not None:
+        return data.decode()
+    html = render_page(content, template)
+    with get_profiler().stage("shared cache"):
+        shared.put(shared_key, html.encode())
+    return html
+
+def stream_page(from_path, template, dest_path):
+    # Peak memory is bounded by the largest single block.
+    with open(from_path, 'r') as source:
+        title = extract_title_from_lines(source)
+        source.seek(0)
+        head, tail = template.render_around_content(title)
+        
+        block_cache = get_render_cache()
+        with atomic_open(dest_path) as file:
+            file.write(head)
+            file.write("<div>")
+            for block in scan_blocks(source):
+                if block_cache is not None:
+                    file.write(block_cache.render(block, render_context(template), rewriter(template)))
+                elif not needs_rewrite(template.basepath, template.assets, template.images):
+                    emit_block_html(block, file.write)
+                else:
+                    rewrite_node_urls(block_to_html_node(block), template.basepath, template.assets, template.images).write_html(file)
+            file.write("</div>")
+            file.write(tail)
+
+def render_page(content, template):
+    profiler = get_profiler()
+    block_cache = get_render_cache()
+    ast_cache = get_ast_cache()
+    entry = None
+    if ast_cache is not None and block_cache is None:
+        # A warm hit skips block splitting and inline parsing altogether.
+        with profiler.stage("ast cache"):
+            source_hash = ast_cache.key(content)
+            entry = ast_cache.get(source_hash)
+        if entry is None:
+            # Stored even when nothing needs rewriting, so template-only
+            # rebuilds at "/" hit too.
+            with profiler.stage("parse"):
+                entry = ast_cache.put(source_hash, content)
+    if entry is not None:
+        with profiler.stage("rewrite"):
+            html = splice_urls(entry, template.basepath, template.assets, template.images)
+    else:
+        with profiler.stage("block split"):
+            blocks = list(scan_blocks(content.split("\n")))
+        if block_cache is not None:
+            # Page assembly is fragment lookups and a join.
+            with profiler.stage("render blocks"):
+                html = block_cache.render_blocks(blocks, render_context(template), rewriter(template))
+        elif not needs_rewrite(template.basepath, template.assets, template.images):
+            # Nothing to rewrite, so no tree is needed either.
+            with profiler.stage("render blocks"):
+                html = blocks_to_html(blocks)
+        else:
+            with profiler.stage("inline parse"):
+                node = rewrite_node_urls(blocks_to_html_node(blocks), template.basepath, template.assets, template.images)
+            with profiler.stage("serialize"):
+                html = node.to_html()
+    with profiler.stage("template"):
+        title = extract_title(content)
+        return template.render(title, html)
+
+def render_context(template):
+    # Everything rewrite_node_urls makes a fragment depend on.
+    assets = template.assets.digest if template.assets else ""
+    images = template.images.digest if template.images else ""
+    return f"{template.basepath}\0{assets}\0{images}"
+
+def rewriter(template):
+    if not needs_rewrite(template.basepath, template.assets, template.images):
+        return None
+    return lambda node: rewrite_node_urls(node, template.basepath, template.assets, template.images)
+
+def needs_rewrite(basepath, assets=None, images=None):
+    return basepath != "/" or bool(assets) or bool(images)
+
+def rewrite_node_urls(node, basepath, assets=None, images=None):
+    # Only root-relative link and image URLs move under the basepath (and to
+    # their fingerprinted names); text that merely looks like an attribute
+    # (e.g. inside a code block) is left alone. Known images also get their
+    # size and srcset here, before their URLs are rewritten.
+    if not needs_rewrite(basepath, assets, images):
+        return node
+    rewrite = url_rewriter(basepath, assets)
     
-    
-    with open(template_path, 'r') as template_file:
-        template = template_file.read()
-    
-    
-    htmlstring = markdown_to_html_node(content).to_html()
-    title = extract_title(content)
-    
-    
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", htmlstring)
-    
-    
-    template = template.replace('href="/', f'href="{basepath}')
-    template = template.replace('src="/', f'src="{basepath}')
-    
-    
-    dest_dir = os.path.dirname(dest_path)
-    if dest_dir:
-        os.makedirs(dest_dir, exist_ok=True)
-    
-    with open(dest_path, "w") as file:
-        file.write(template)
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.children:
+            stack.extend(current.children)
+        if current.props:
+            if images and current.tag == "img":
+                extra = images.attributes(current.props.get("src"))
+                if extra:
+                    current.props.update(extra)
+            for name in ("href", "src"):
+                url = current.props.get(name)
+                if url is not None:
+                    current.props[name] = rewrite(url)
+            srcset = current.props.get("srcset")
+            if srcset:
+                current.props["srcset"] = rewrite_srcset(srcset, rewrite)
+    return node
+
+def splice_urls(entry, basepath, assets=None, images=None):
+    # The same HTML as rewrite_node_urls on the tree an AstCache entry was
+    # made from, serialized: new URLs and image attributes are spliced in at
+    # the offsets the entry recorded.
+    html, urls, image_spans = entry
+    if not needs_rewrite(basepath, assets, images):
+        return html
+    rewrite = url_rewriter(basepath, assets)
+    edits = [(start, end, rewrite(html[start:end])) for start, end in urls]
+    if images:
+        for at, start, end in image_spans:
+            extra = images.attributes(html[start:end])
+            if extra:
+                if "srcset" in extra:
+                    extra["srcset"] = rewrite_srcset(extra["srcset"], rewrite)
+                edits.append((at, at, "".join(f' {prop}="{value}"' for prop, value in extra.items())))
+        edits.sort(key=lambda edit: edit[0])
+    parts = []
+    position = 0
+    for start, end, text in edits:
+        parts.append(html[position:start])
+        parts.append(text)
+        position = end
+    parts.append(html[position:])
+    return "".join(parts)
+
+def url_rewriter(basepath, assets=None):
+    def rewrite(url):
+        if not url.startswith("/"):
+            return url
+        if assets:
+            url = assets.get(url, url)
+        return basepath + url[1:]
+    return rewrite
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
+def rewrite_srcset(srcset, rewrite):
+    candidates = (candidate.split(" ", 1) for candidate in srcset.split(", "))
+    return ", ".join(f"{rewrite(url)} {width}" for url, width in candidates)
+
+def write_page(dest_path, html):
+    with atomic_open(dest_path) as file:
+        file.write(html)
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/", cache=None, assets=None, images=None):
     for filename in os.listdir(dir_path_content):
         from_path = os.path.join(dir_path_content, filename)
         dest_path = os.path.join(dest_dir_path, filename)
@@ -54,10 +264,123 @@ def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, bas
             
            
             dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
+            generate_page(from_path, template_path, dest_path, basepath, cache, assets, images)
         else:
            
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            generate_pages_recursive(from_path, template_path, dest_path, basepath, cache, assets, images)
+
+def collect_pages(dir_path_content, dest_dir_path):
+    # Same layout rules as generate_pages_recursive, in a stable order.
+    pages = []
+    for filename in sorted(os.listdir(dir_path_content)):
+        from_path = os.path.join(dir_path_content, filename)
+        dest_path = os.path.join(dest_dir_path, filename)
+        
+        if os.path.isfile(from_path):
+            if not from_path.endswith('.md'):
+                logging.info(f"Skipping non-markdown file: {from_path}")
+                continue
+            pages.append((from_path, str(Path(dest_path).with_suffix(".html"))))
+        else:
+            pages.extend(collect_pages(from_path, dest_path))
+    return pages
+
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    relative = os.path.relpath(from_path, dir_path_content)
+    return str(Path(os.path.join(dest_dir_path, relative)).with_suffix(".html"))
+
+def generate_pages_parallel(dir_path_content, template_path, dest_dir_path, basepath="/", cache=None, jobs=None, chunk_size=None, assets=None, images=None, pages=None):
+    # pages, if given, is a subset of collect_pages() to build (e.g. a shard).
+    if pages is None:
+        pages = collect_pages(dir_path_content, dest_dir_path)
+    if not pages:
+        return
+    
+    template_hash = page_template_hash(cache, template_path, assets, images)
+    tasks = page_tasks(pages, template_path, basepath, cache, template_hash)
+    
+    jobs = jobs or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, len(tasks) // (jobs * 4))
+    
+    # Results come back in submission order, so logging stays deterministic
+    # no matter which worker finished first.
+    # The asset manifest, image set and render caches are shared by every
+    # page: ship them once per worker.
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=worker_initargs(assets, images)) as executor:
+        results = executor.map(_generate_page_task, tasks, chunksize=chunk_size)
+        record_page_results(results, template_path, basepath, cache, template_hash)
+
+def page_tasks(pages, template_path, basepath, cache, template_hash):
+    # Pool tasks carry the page's cache entry, so workers can skip fresh pages.
+    tasks = []
+    for from_path, dest_path in pages:
+        entry = cache.pages.get(dest_path) if cache is not None and not cache.forced else None
+        tasks.append((from_path, template_path, dest_path, basepath, template_hash, entry))
+    return tasks
+
+def record_page_results(results, template_path, basepath, cache, template_hash):
+    # Logs and records _generate_page_task results in the order given.
+    profiler = get_profiler()
+    failed = []
+    for from_path, dest_path, source_hash, generated, error, spans in results:
+        if spans:
+            profiler.merge(spans)
+        if error is not None:
+            logging.error(f"Failed to generate page from {from_path}: {error}")
+            failed.append(from_path)
+            continue
+        if generated:
+            logging.info(f"Generating page from {from_path} to {dest_path} using {template_path}")
+        else:
+            logging.info(f"Skipping unchanged page: {from_path}")
+        if cache is not None:
+            cache.record_page(dest_path, from_path, source_hash, template_hash, basepath)
+    
+    if failed:
+        raise RuntimeError(f"failed to generate {len(failed)} page(s): {', '.join(failed)}")
+
+_worker_assets = None
+_worker_images = None
+
+def worker_initargs(assets=None, images=None):
+    return (assets, images, get_profiler().enabled, get_render_cache(), get_ast_cache(), get_shared_cache())
+
+def _init_worker(assets, images, profile=False, block_cache=None, ast_cache=None, shared_cache=None):
+    global _worker_assets, _worker_images
+    _worker_assets = assets
+    _worker_images = images
+    set_profiler(Profiler() if profile else None)
+    # Each worker gets its own copy; a disk tier is shared between them.
+    set_render_cache(block_cache)
+    set_ast_cache(ast_cache)
+    set_shared_cache(shared_cache)
+
+def _generate_page_task(task):
+    profiler = get_profiler()
+    with profiler.page(task[0]):
+        result = _generate_page_result(task)
+    return result + (profiler.drain(),)
+
+def _generate_page_result(task):
+    from_path, template_path, dest_path, basepath, template_hash, entry = task
+    try:
+        with get_profiler().stage("read"):
+            content, source_hash = read_source(from_path, with_hash=True)
+        
+        if (
+            entry is not None
+            and os.path.exists(dest_path)
+            and BuildCache.entry_matches(entry, source_hash, template_hash, basepath)
+        ):
+            return from_path, dest_path, source_hash, False, None
+        
+        template = load_template(template_path, basepath, _worker_assets, _worker_images)
+        build_page(from_path, content, template, dest_path, shared_page_key(source_hash, template_hash, basepath))
+        return from_path, dest_path, source_hash, True, None
+    except Exception as e:
+        # Exceptions don't survive the trip back intact; report them by path.
+        return from_path, dest_path, None, False, f"{type(e).__name__}: {e}"
 
 
 
@@ -68,5 +391,8 @@ def extract_title(md):
             return line[2:]
     raise ValueError("no title found")
 
-
-
+def extract_title_from_lines(lines):
+    for line in lines:
+        if line.startswith("# "):
+            return line[2:].rstrip("\n")
+    raise ValueError("no title found")
@@ -0,0 +1,205 @@
+import os
+import json
+import struct
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from build_cache import hash_bytes, hash_file
+from copy_engine import scan_tree
+from fingerprint import asset_url
+from publish import atomic_open
+from shared_cache import get_shared_cache, image_variant_key
+from static_to_public import sync_file
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+IMAGE_CACHE_DIR = ".image_cache"
+IMAGE_WIDTHS = (400, 800, 1200, 1600)
+IMAGE_QUALITY = 80
+# The article column is 800px wide (see static/index.css).
+IMAGE_SIZES = "(max-width: 800px) 100vw, 800px"
+# Bump when the resizing itself changes, so cached variants are redone.
+PIPELINE_VERSION = 1
+
+RESIZABLE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+# Sized only: resizing would drop GIF animation and SVGs don't need it.
+SIZED_EXTENSIONS = RESIZABLE_EXTENSIONS | {".gif"}
+
+
+class ImageSet:
+    # What the pipeline knows about each image, by site-root URL:
+    # {"/images/tom.png": {"width": 928, "height": 468,
+    #                      "srcset": [["/images/tom.400w.webp", 400], ...]}}
+    def __init__(self, images=None):
+        self.images = dict(images or {})
+        self.digest = hash_bytes(json.dumps(self.images, sort_keys=True).encode())
+
+    def attributes(self, url):
+        # Extra <img> props for url, or None for images we know nothing about.
+        image = self.images.get(url)
+        if image is None:
+            return None
+        props = {"width": str(image["width"]), "height": str(image["height"])}
+        if image["srcset"]:
+            candidates = [f"{variant_url} {width}w" for variant_url, width in image["srcset"]]
+            candidates.append(f"{url} {image['width']}w")
+            props["srcset"] = ", ".join(candidates)
+            props["sizes"] = IMAGE_SIZES
+        return props
+
+    def __bool__(self):
+        return bool(self.images)
+
+    def __len__(self):
+        return len(self.images)
+
+    def __eq__(self, other):
+        return isinstance(other, ImageSet) and self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return f"ImageSet({len(self.images)} images, {self.digest[:10]})"
+
+
+def can_resize(image_format="webp"):
+    return Image is not None and features.check(image_format)
+
+
+def image_size(path):
+    # (width, height) from the file header, without Pillow; None if unknown.
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webp_size(head)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _jpeg_size(f)
+    return None
+
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _jpeg_size(f):
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        # SOF0..SOF15, minus DHT (C4), JPG (C8) and DAC (CC).
+        if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def variant_name(name, width, image_format):
+    return f"{os.path.splitext(name)[0]}.{width}w.{image_format}"
+
+
+def build_image_set(static_path, output_path, cache=None, cache_dir=IMAGE_CACHE_DIR,
+                    widths=IMAGE_WIDTHS, image_format="webp", quality=IMAGE_QUALITY, jobs=None):
+    # Sizes every image under static_path and, with Pillow, writes resized
+    # copies next to it in output_path. Variants are kept in cache_dir under
+    # the source hash and parameters, so unchanged images are never
+    # resized twice; only missing ones go to the process pool.
+    shared = get_shared_cache()
+    resize = can_resize(image_format)
+    if not resize:
+        logging.warning(f"Pillow with {image_format} support not installed: images get width/height but no variants")
+    images = {}
+    variants = []
+    tasks = []
+    for relative_dir, _, files in scan_tree(static_path):
+        for name, _ in files:
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in SIZED_EXTENSIONS:
+                continue
+            path = os.path.join(static_path, relative_dir, name)
+            size = image_size(path)
+            if size is None:
+                logging.warning(f"Can't read image size: {path}")
+                continue
+            url = asset_url(relative_dir, name)
+            images[url] = {"width": size[0], "height": size[1], "srcset": []}
+            if not resize or ext not in RESIZABLE_EXTENSIONS:
+                continue
+            digest = cache.content_hash(path) if cache is not None else hash_file(path)
+            for width in widths:
+                if width >= size[0]:
+                    break
+                cached = os.path.join(
+                    cache_dir, digest[:2], f"{digest}-v{PIPELINE_VERSION}-{width}w-q{quality}.{image_format}"
+                )
+                if not os.path.exists(cached):
+                    # Another machine may have resized it already.
+                    shared_key = None
+                    if shared is not None:
+                        shared_key = image_variant_key(digest, PIPELINE_VERSION, width, image_format, quality)
+                    if shared_key is not None and fetch_variant(shared, shared_key, cached):
+                        logging.info(f"Fetched {path} at {width}px from the shared cache: {cached}")
+                    else:
+                        tasks.append((path, cached, width, image_format, quality, shared_key))
+                dest_name = variant_name(name, width, image_format)
+                variants.append((cached, os.path.join(output_path, relative_dir, dest_name)))
+                images[url]["srcset"].append([asset_url(relative_dir, dest_name), width])
+
+    if tasks:
+        jobs = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for (path, cached, width), task in zip(executor.map(_resize_task, tasks), tasks):
+                logging.info(f"Resized {path} to {width}px: {cached}")
+                if task[5] is not None:
+                    with open(cached, "rb") as f:
+                        shared.put(task[5], f.read())
+
+    for cached, dest_path in variants:
+        # Recorded against the cache file, not the static source, so the
+        # static sync doesn't see variants as orphans of its own.
+        if sync_file(cached, dest_path, mode="hardlink"):
+            logging.info(f"Copied image variant: {dest_path}")
+        if cache is not None:
+            cache.record_static(cached, dest_path)
+    return ImageSet(images)
+
+
+def fetch_variant(shared, key, cached):
+    data = shared.get(key)
+    if data is None:
+        return False
+    with atomic_open(cached, "wb") as f:
+        f.write(data)
+    return True
+
+
+def _resize_task(task):
+    path, cached, width, image_format, quality, _ = task
+    with Image.open(path) as image:
+        height = round(image.height * width / image.width)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+        resized = image.resize((width, height), Image.LANCZOS)
+    with atomic_open(cached, "wb") as f:
+        resized.save(f, format=image_format.upper(), quality=quality)
+    return path, cached, width
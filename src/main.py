@@ -1,17 +1,196 @@
-import os
-import sys
-from textnode import TextNode, TextType, text_node_to_html_node
-from static_to_public import static_to_public
-from generate_page import generate_pages_recursive
+import logging
+import argparse
+import cProfile
+import pstats
+from static_to_public import sync_static
+from generate_page import generate_pages_recursive, generate_pages_parallel, template_key
+from async_build import DEFAULT_CONCURRENCY, generate_pages_async
+from shared_cache import get_shared_cache, open_shared_cache, set_shared_cache
+from shard import generate_pages_coordinated, merge_shards, parse_shard, shard_cache_path, shard_dir, shard_pages, write_shard_manifest
+from build_cache import BuildCache
+from copy_engine import COPY_MODES
+from publish import Publisher
+from fingerprint import fingerprint_assets
+from precompress import precompress_tree
+from images import build_image_set
+from ast_cache import AST_CACHE_DIR, AstCache, get_ast_cache, set_ast_cache
+from block_markdown import BLOCK_CACHE_DIR, BLOCK_CACHE_SIZE, BlockRenderCache, get_render_cache, set_render_cache
+from profiler import Profiler, get_profiler, set_profiler
+from watch import watch
+from dev_server import serve
 
-def main():
+CACHE_PATH = ".build_cache.json"
+
+
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the site from content/ and static/ into docs/.")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served under")
+    parser.add_argument("--force", action="store_true", help="ignore the build cache and rebuild everything")
+    parser.add_argument("--checksum", action="store_true", help="compare static files by content, not just size and mtime")
+    parser.add_argument("--copy-mode", choices=COPY_MODES, default="copy", help="how static files reach docs/: copy, hardlink or reflink (falls back to copying)")
+    parser.add_argument("--fingerprint", action="store_true", help="copy assets as name.<hash>.ext and point pages at them")
+    parser.add_argument("--images", action="store_true", help="write resized image variants and give <img> srcset, width and height")
+    parser.add_argument("--image-format", choices=("webp", "avif"), default="webp", help="format of the resized variants (default: webp)")
+    parser.add_argument("--precompress", action="store_true", help="write .gz (and .br/.zst when available) next to text outputs")
+    parser.add_argument("--block-cache", type=int, nargs="?", const=BLOCK_CACHE_SIZE, metavar="N", help=f"reuse the HTML of blocks repeated across pages, keeping up to N (default: {BLOCK_CACHE_SIZE})")
+    parser.add_argument("--block-cache-dir", nargs="?", const=BLOCK_CACHE_DIR, metavar="DIR", help=f"with --block-cache, also keep fragments in DIR across builds; DIR is never pruned (default: {BLOCK_CACHE_DIR})")
+    parser.add_argument("--ast-cache", nargs="?", const=AST_CACHE_DIR, metavar="DIR", help=f"keep parsed pages in DIR so template or basepath changes skip parsing (default: {AST_CACHE_DIR})")
+    parser.add_argument("--shared-cache", metavar="DIR|URL", help="fetch rendered pages and image variants other builds already made from a shared directory or HTTP cache, and add new ones")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N", help="render pages on N processes (0 = one per CPU)")
+    parser.add_argument("--async-io", type=int, nargs="?", const=DEFAULT_CONCURRENCY, metavar="N", help=f"overlap reading, rendering (on --jobs processes) and writing, with up to N pages in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--workers", type=int, metavar="N", help="render pages on N local worker processes fed batches by a coordinator over a socket")
+    parser.add_argument("--shard", type=shard_arg, metavar="I/N", help="build only the pages in shard I of N (by stable hash) into .docs.shards/I-of-N/")
+    parser.add_argument("--merge-shards", type=int, metavar="N", help="check the N shard builds and combine their pages into docs/ instead of rendering")
+    parser.add_argument("--atomic", action="store_true", help="build into a staging tree and publish docs/ as a symlink swap")
+    parser.add_argument("--keep-generations", type=int, default=3, metavar="N", help="with --atomic, keep the last N published trees for rollback")
+    parser.add_argument("--rollback", action="store_true", help="point docs/ back at the previous published generation and exit")
+    parser.add_argument("--watch", action="store_true", help="after building, keep running and rebuild what changes")
+    parser.add_argument("--poll", action="store_true", help="with --watch, poll for changes instead of using inotify")
+    parser.add_argument("--profile", nargs="?", const="build-profile.json", metavar="PATH", help="time every stage and page; write a Chrome trace with a summary to PATH")
+    parser.add_argument("--cprofile", metavar="PATH", help="also run the build under cProfile and save the stats to PATH")
+    parser.add_argument("--serve", type=int, nargs="?", const=8888, metavar="PORT", help="serve pages from memory with live reload instead of building docs/")
+    args = parser.parse_args(argv)
+    if args.fingerprint and args.watch:
+        parser.error("--fingerprint can't be combined with --watch")
+    if args.atomic and args.watch:
+        # Watch writes into docs/, which would be the published generation.
+        parser.error("--atomic can't be combined with --watch")
+    if args.block_cache_dir and args.block_cache is None:
+        args.block_cache = BLOCK_CACHE_SIZE
+    if args.ast_cache and args.block_cache is not None:
+        parser.error("--ast-cache can't be combined with --block-cache")
+    if args.workers is not None and args.async_io is not None:
+        parser.error("--workers can't be combined with --async-io")
+    if args.shard and args.merge_shards:
+        parser.error("--shard can't be combined with --merge-shards")
+    if args.shard and (args.atomic or args.watch or args.precompress):
+        parser.error("--shard builds pages only: it can't be combined with --atomic, --watch or --precompress")
+    if (args.shard or args.merge_shards) and args.images:
+        parser.error("--images can't be combined with --shard or --merge-shards")
+    return args
+
+
+def main(argv=None):
+    
+    args = parse_args(argv)
+    
+    if args.serve is not None:
+        serve("content", "static", "template.html", port=args.serve, polling=args.poll)
+        return
     
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    publisher = Publisher("docs", args.keep_generations, CACHE_PATH)
+    if args.rollback:
+        publisher.rollback()
+        return
     
-    print(TextNode("Some text", TextType.LINK, "https://www.boots.dev"))
+    profiler = Profiler() if args.profile else None
+    set_profiler(profiler)
+    if args.block_cache is not None:
+        set_render_cache(BlockRenderCache(args.block_cache, args.block_cache_dir))
+    if args.ast_cache:
+        set_ast_cache(AstCache(args.ast_cache))
+    if args.shared_cache:
+        set_shared_cache(open_shared_cache(args.shared_cache))
+    code_profile = cProfile.Profile() if args.cprofile else None
+    if code_profile is not None:
+        code_profile.enable()
     
-    static_to_public("static", "docs")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    try:
+        cache, images = build(args, publisher)
+    finally:
+        if code_profile is not None:
+            code_profile.disable()
+            code_profile.dump_stats(args.cprofile)
+            pstats.Stats(code_profile).sort_stats("cumulative").print_stats(20)
+            logging.info(f"Wrote cProfile stats to {args.cprofile}")
+        if profiler is not None:
+            profiler.log_report()
+            profiler.write(args.profile)
+            logging.info(f"Wrote build profile to {args.profile}")
+    
+    if args.watch:
+        set_profiler(None)
+        watch("content", "static", "template.html", "docs", args.basepath, cache, polling=args.poll, images=images)
+
+
+def build(args, publisher):
+    # With profiling off the stages are no-ops.
+    profiler = get_profiler()
+    if args.shard:
+        # A shard renders its share of the pages into its own tree, with its
+        # own cache; static files wait for the merge.
+        output = shard_dir(*args.shard)
+        cache = BuildCache(shard_cache_path(*args.shard))
+    else:
+        output = publisher.stage() if args.atomic else "docs"
+        cache = BuildCache(CACHE_PATH)
+    if args.force:
+        cache.clear()
+    
+    try:
+        assets = None
+        if args.fingerprint:
+            with profiler.stage("fingerprint"):
+                assets = fingerprint_assets("static", cache)
+        if not args.shard:
+            with profiler.stage("asset copy"):
+                sync_static("static", output, cache, checksum=args.checksum, mode=args.copy_mode, assets=assets)
+        images = None
+        if args.images:
+            with profiler.stage("images"):
+                images = build_image_set("static", output, cache, image_format=args.image_format)
+        with profiler.stage("pages", "phase"):
+            if args.merge_shards:
+                merge_shards(args.merge_shards, output, cache, args.basepath, "content",
+                             template_hash=template_key(cache, "template.html", assets, images))
+            else:
+                pages = shard_pages("content", output, *args.shard) if args.shard else None
+                generate_pages(args, output, cache, assets, images, pages)
+        block_cache = get_render_cache()
+        if block_cache is not None and (block_cache.hits or block_cache.disk_hits or block_cache.misses):
+            # Pool workers keep their own counts (here and for the AST and
+            # shared caches); these are this process's.
+            stats = block_cache.stats()
+            logging.info(f"Block cache: {stats['hits']} hits, {stats['disk_hits']} from disk, {stats['misses']} misses")
+        ast_cache = get_ast_cache()
+        if ast_cache is not None and (ast_cache.hits or ast_cache.misses):
+            logging.info(f"AST cache: {ast_cache.hits} hits, {ast_cache.misses} misses")
+        shared_cache = get_shared_cache()
+        if shared_cache is not None and (shared_cache.hits or shared_cache.misses):
+            logging.info(f"Shared cache: {shared_cache.hits} hits, {shared_cache.misses} misses")
+        with profiler.stage("prune"):
+            cache.prune(output)
+        if args.shard:
+            write_shard_manifest(output, cache, *args.shard, args.basepath)
+        if args.precompress:
+            with profiler.stage("precompress"):
+                precompress_tree(output, cache=cache)
+    finally:
+        cache.save()
+    
+    if args.atomic:
+        with profiler.stage("publish"):
+            publisher.publish()
+    return cache, images
+
+
+def generate_pages(args, output, cache, assets, images, pages=None):
+    # pages narrows the build to a shard; None means all of content/.
+    if args.workers is not None:
+        generate_pages_coordinated("content", "template.html", output, args.basepath, cache, workers=args.workers, assets=assets, images=images, pages=pages)
+    elif args.async_io is not None:
+        generate_pages_async("content", "template.html", output, args.basepath, cache, jobs=args.jobs, concurrency=args.async_io, assets=assets, images=images, pages=pages)
+    elif args.jobs == 1 and pages is None:
+        generate_pages_recursive("content", "template.html", output, args.basepath, cache, assets, images)
+    else:
+        generate_pages_parallel("content", "template.html", output, args.basepath, cache, jobs=args.jobs, assets=assets, images=images, pages=pages)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,104 @@
+import os
+import gzip
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from copy_engine import scan_tree
+from publish import atomic_open
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Text formats only: PNG, JPEG, WOFF2, video etc. are compressed already.
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map", ".ico"}
+
+# Below this the headers cost more than compression saves.
+MIN_SIZE = 256
+
+
+def _gzip(data):
+    # mtime=0 keeps the output byte-for-byte reproducible.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def available_encoders():
+    # Suffix -> compress function, best first.
+    encoders = {}
+    if brotli is not None:
+        encoders[".br"] = lambda data: brotli.compress(data, quality=11)
+    if zstandard is not None:
+        encoders[".zst"] = zstandard.ZstdCompressor(level=19).compress
+    encoders[".gz"] = _gzip
+    return encoders
+
+
+def precompress_tree(root, jobs=None, suffixes=None, cache=None):
+    # Writes name.gz (and .br/.zst when the libraries are installed) next to
+    # every compressible file under root, skipping siblings that are already
+    # newer than their source, and removes siblings whose source is gone.
+    # Files the cache says were copied from static/ are never touched, even
+    # when they are named like a sibling.
+    suffixes = tuple(suffixes or available_encoders())
+    static = {os.path.normpath(path) for path in cache.static} if cache is not None else set()
+    tasks = []
+    for relative_dir, _, files in scan_tree(root):
+        names = {name for name, _ in files}
+        for name, size in files:
+            path = os.path.join(root, relative_dir, name)
+            base, ext = os.path.splitext(name)
+            if ext in suffixes and base not in names and is_compressible(base) and os.path.normpath(path) not in static:
+                os.remove(path)
+                logging.info(f"Removed stale compressed file: {path}")
+                continue
+            if size < MIN_SIZE or not is_compressible(name):
+                continue
+            stale = tuple(suffix for suffix in suffixes
+                          if os.path.normpath(path + suffix) not in static and not _is_fresh(path, path + suffix))
+            if stale:
+                tasks.append((path, stale))
+
+    if not tasks:
+        return 0
+    jobs = jobs or os.cpu_count() or 1
+    chunk_size = max(1, len(tasks) // (jobs * 4))
+    bytes_in = bytes_out = 0
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for path, size, written in executor.map(_compress_task, tasks, chunksize=chunk_size):
+            bytes_in += size
+            bytes_out += sum(written.values())
+            sizes = ", ".join(f"{suffix[1:]} {out}" for suffix, out in written.items())
+            logging.info(f"Compressed {path} ({size} bytes -> {sizes})")
+    logging.info(f"Precompressed {len(tasks)} files: {bytes_in} bytes in, {bytes_out} bytes written")
+    return len(tasks)
+
+
+def is_compressible(name):
+    return os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def _is_fresh(path, compressed_path):
+    try:
+        return os.stat(compressed_path).st_mtime_ns >= os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def _compress_task(task):
+    path, suffixes = task
+    encoders = available_encoders()
+    with open(path, "rb") as f:
+        data = f.read()
+    written = {}
+    for suffix in suffixes:
+        compressed = encoders[suffix](data)
+        with atomic_open(path + suffix, "wb") as f:
+            f.write(compressed)
+        written[suffix] = len(compressed)
+    return path, len(data), written
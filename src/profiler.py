@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import logging
+from contextlib import contextmanager, nullcontext
+
+
+class Span:
+    # One timed stage. start is perf_counter(), which is system-wide on
+    # Linux, so spans from pool workers line up with the parent's.
+    __slots__ = ("name", "category", "start", "wall", "cpu", "allocations", "page", "pid")
+
+    def __init__(self, name, category, start, wall, cpu, allocations, page, pid):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.wall = wall
+        self.cpu = cpu
+        self.allocations = allocations
+        self.page = page
+        self.pid = pid
+
+    def to_tuple(self):
+        return (self.name, self.category, self.start, self.wall, self.cpu, self.allocations, self.page, self.pid)
+
+    def __repr__(self):
+        return f"Span({self.name}, {self.wall * 1000:.3f} ms, {self.page})"
+
+
+class Profiler:
+    # Records wall time, CPU time and the change in allocated memory blocks
+    # (sys.getallocatedblocks) for every stage, grouped under the page being
+    # built, if any.
+    enabled = True
+
+    def __init__(self):
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._page = None
+
+    @contextmanager
+    def stage(self, name, category="stage"):
+        start = time.perf_counter()
+        cpu = time.process_time()
+        blocks = sys.getallocatedblocks()
+        try:
+            yield
+        finally:
+            self.spans.append(Span(
+                name,
+                category,
+                start,
+                time.perf_counter() - start,
+                time.process_time() - cpu,
+                sys.getallocatedblocks() - blocks,
+                self._page,
+                os.getpid(),
+            ))
+
+    @contextmanager
+    def page(self, path):
+        path = os.fspath(path)
+        self._page = path
+        try:
+            with self.stage(path, "page"):
+                yield
+        finally:
+            self._page = None
+
+    def drain(self):
+        # Hand spans recorded in a pool worker back to the parent.
+        spans = [span.to_tuple() for span in self.spans]
+        self.spans = []
+        return spans
+
+    def merge(self, spans):
+        self.spans.extend(Span(*span) for span in spans)
+
+    def stage_totals(self):
+        totals = {}
+        for span in self.spans:
+            if span.category != "stage":
+                continue
+            total = totals.setdefault(span.name, {"count": 0, "wall": 0.0, "cpu": 0.0, "allocations": 0})
+            total["count"] += 1
+            total["wall"] += span.wall
+            total["cpu"] += span.cpu
+            total["allocations"] += span.allocations
+        return totals
+
+    def slowest_pages(self, count=10):
+        pages = [span for span in self.spans if span.category == "page"]
+        return sorted(pages, key=lambda span: span.wall, reverse=True)[:count]
+
+    def summary(self, count=10):
+        return {
+            "stages": self.stage_totals(),
+            "slowest_pages": [
+                {"page": span.name, "wall": span.wall, "cpu": span.cpu, "allocations": span.allocations}
+                for span in self.slowest_pages(count)
+            ],
+        }
+
+    def trace_events(self):
+        # Chrome trace "complete" events, in microseconds from the start.
+        events = []
+        for span in self.spans:
+            args = {"cpu_ms": round(span.cpu * 1000, 3), "allocations": span.allocations}
+            if span.page is not None:
+                args["page"] = span.page
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - self.origin) * 1e6, 1),
+                "dur": round(span.wall * 1e6, 1),
+                "pid": span.pid,
+                "tid": span.pid,
+                "args": args,
+            })
+        return events
+
+    def write(self, path, count=10):
+        # Loads in chrome://tracing and Perfetto; the summary rides along
+        # under a key both ignore.
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "summary": self.summary(count)}, f, indent=1)
+
+    def log_report(self, count=10):
+        totals = self.stage_totals()
+        for name, total in sorted(totals.items(), key=lambda item: item[1]["wall"], reverse=True):
+            logging.info(
+                f"Stage {name:<14} {total['wall'] * 1000:10.1f} ms wall {total['cpu'] * 1000:10.1f} ms cpu "
+                f"{total['allocations']:+10d} blocks ({total['count']}x)"
+            )
+        for span in self.slowest_pages(count):
+            logging.info(f"Slow page {span.wall * 1000:10.1f} ms wall {span.cpu * 1000:10.1f} ms cpu  {span.name}")
+
+
+class NullProfiler:
+    # Stand-in while profiling is off: every stage is a shared no-op.
+    enabled = False
+    _context = nullcontext()
+
+    def stage(self, name, category="stage"):
+        return self._context
+
+    def page(self, path):
+        return self._context
+
+    def drain(self):
+        return None
+
+
+_profiler = NullProfiler()
+
+
+def get_profiler():
+    return _profiler
+
+
+def set_profiler(profiler):
+    global _profiler
+    _profiler = profiler if profiler is not None else NullProfiler()
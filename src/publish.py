@@ -0,0 +1,155 @@
+import os
+import shutil
+import tempfile
+import logging
+from contextlib import contextmanager
+
+from copy_engine import copy_file, scan_tree
+
+
+# mkstemp creates files 0600; atomic_open gives them the mode open() would.
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+@contextmanager
+def atomic_open(dest_path, mode="w"):
+    # Write next to dest_path and rename over it on success: readers see the
+    # old file or the new one, never half of one, and a hardlinked
+    # destination (see Publisher.stage) is replaced instead of written through.
+    # Every call gets its own temp file, so concurrent writers of the same
+    # path (pool workers, or builds sharing a cache directory) never write
+    # into each other's file; the last rename wins.
+    dest_dir, name = os.path.split(dest_path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=dest_dir or ".")
+    try:
+        os.chmod(tmp_path, FILE_MODE)
+        with os.fdopen(fd, mode) as file:
+            yield file
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def clone_tree(src_root, dest_root):
+    # Hardlink every file, so a staging tree costs directory entries, not data.
+    os.makedirs(dest_root, exist_ok=True)
+    for relative_dir, dirs, files in scan_tree(src_root):
+        for name in dirs:
+            os.makedirs(os.path.join(dest_root, relative_dir, name), exist_ok=True)
+        for name, _ in files:
+            copy_file(os.path.join(src_root, relative_dir, name), os.path.join(dest_root, relative_dir, name), "hardlink")
+
+
+class Publisher:
+    # Builds go into a staging tree next to the output. Publishing renames it
+    # into a numbered generation and swaps the output symlink over to it in
+    # a single rename, so readers only ever see a complete site. The newest
+    # `keep` generations stay on disk for rollback.
+    #
+    #   docs -> .docs.generations/000007
+    #   .docs.generations/000006/  000006.json  000007/  000007.json
+    #   .docs.staging/
+    #
+    # With a manifest_path, each generation also keeps a copy of the build
+    # cache that produced it, so the cache always describes the live tree.
+    def __init__(self, output_path, keep=3, manifest_path=None):
+        self.output_path = os.path.normpath(output_path)
+        parent, name = os.path.split(self.output_path)
+        self.staging_path = os.path.join(parent, f".{name}.staging")
+        self.generations_path = os.path.join(parent, f".{name}.generations")
+        self.keep = max(1, keep)
+        self.manifest_path = manifest_path
+
+    def generations(self):
+        if not os.path.isdir(self.generations_path):
+            return []
+        return sorted(
+            name for name in os.listdir(self.generations_path)
+            if name.isdigit() and os.path.isdir(os.path.join(self.generations_path, name))
+        )
+
+    def live_generation(self):
+        if not os.path.islink(self.output_path):
+            return None
+        return os.path.basename(os.readlink(self.output_path))
+
+    def stage(self):
+        if os.path.lexists(self.staging_path):
+            # Left behind by a build that failed; start over from the live tree.
+            shutil.rmtree(self.staging_path)
+        if os.path.isdir(self.output_path):
+            clone_tree(self.output_path, self.staging_path)
+        else:
+            os.makedirs(self.staging_path)
+        self._restore_manifest(self.live_generation())
+        logging.info(f"Staging build in {self.staging_path}")
+        return self.staging_path
+
+    def publish(self):
+        os.makedirs(self.generations_path, exist_ok=True)
+        if os.path.isdir(self.output_path) and not os.path.islink(self.output_path):
+            # First publish over a plain directory: keep it as a generation too.
+            os.rename(self.output_path, os.path.join(self.generations_path, self._next_generation()))
+        name = self._next_generation()
+        os.rename(self.staging_path, os.path.join(self.generations_path, name))
+        if self.manifest_path is not None and os.path.exists(self.manifest_path):
+            shutil.copy2(self.manifest_path, os.path.join(self.generations_path, f"{name}.json"))
+        self._point_to(name)
+        logging.info(f"Published generation {name} to {self.output_path}")
+        self.prune_generations()
+        return name
+
+    def rollback(self, steps=1):
+        generations = self.generations()
+        live = self.live_generation()
+        if live not in generations:
+            raise ValueError(f"{self.output_path} is not a published generation")
+        index = generations.index(live) - steps
+        if index < 0:
+            raise ValueError(f"no generation {steps} older than {live} to roll back to")
+        name = generations[index]
+        self._point_to(name)
+        self._restore_manifest(name)
+        logging.info(f"Rolled {self.output_path} back to generation {name}")
+        return name
+
+    def prune_generations(self):
+        live = self.live_generation()
+        for name in self.generations()[:-self.keep]:
+            if name == live:
+                continue
+            shutil.rmtree(os.path.join(self.generations_path, name))
+            manifest = os.path.join(self.generations_path, f"{name}.json")
+            if os.path.exists(manifest):
+                os.remove(manifest)
+            logging.info(f"Removed old generation {name}")
+
+    def _next_generation(self):
+        generations = self.generations()
+        number = int(generations[-1]) + 1 if generations else 1
+        return f"{number:06}"
+
+    def _point_to(self, name):
+        # A new symlink renamed over the old one is the atomic part.
+        target = os.path.join(os.path.basename(self.generations_path), name)
+        tmp_path = f"{self.output_path}.tmp-link"
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        os.symlink(target, tmp_path)
+        os.replace(tmp_path, self.output_path)
+
+    def _restore_manifest(self, name):
+        if self.manifest_path is None:
+            return
+        manifest = os.path.join(self.generations_path, f"{name}.json") if name else None
+        if manifest is not None and os.path.exists(manifest):
+            shutil.copy2(manifest, self.manifest_path)
+        elif os.path.exists(self.manifest_path):
+            # Whatever it describes, it isn't the tree we are building on.
+            os.remove(self.manifest_path)
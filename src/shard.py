@@ -0,0 +1,254 @@
+import os
+import json
+import logging
+import tempfile
+from collections import deque
+from multiprocessing import AuthenticationError, Process
+from multiprocessing.connection import Client, Listener, wait
+
+from build_cache import hash_bytes, hash_file
+from generate_page import (
+    _generate_page_task,
+    _init_worker,
+    collect_pages,
+    page_tasks,
+    page_template_hash,
+    record_page_results,
+    worker_initargs,
+)
+from publish import atomic_open
+from static_to_public import sync_file
+
+# Each shard builds into SHARD_ROOT/<i>-of-<N>/ with its own build cache
+# next to it; --merge-shards combines them into the output.
+SHARD_ROOT = ".docs.shards"
+SHARD_MANIFEST_NAME = "shard.json"
+SHARD_MANIFEST_VERSION = 1
+COORDINATOR_BATCH_SIZE = 16
+
+
+def parse_shard(text):
+    # "i/N" -> (i, N), for argparse.
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard {text!r}: expected i/N") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"invalid shard {text!r}: need 0 <= i < N")
+    return index, count
+
+
+def shard_of(relative_path, count):
+    # Stable across machines and runs, unlike hash(): the SHA-256 of the
+    # source path relative to the content directory, with / separators.
+    key = relative_path.replace(os.sep, "/")
+    return int(hash_bytes(key.encode())[:16], 16) % count
+
+
+def shard_dir(index, count, root=SHARD_ROOT):
+    return os.path.join(root, f"{index}-of-{count}")
+
+
+def shard_cache_path(index, count, root=SHARD_ROOT):
+    return f"{shard_dir(index, count, root)}.build_cache.json"
+
+
+def shard_pages(dir_path_content, dest_dir_path, index, count):
+    return [
+        (from_path, dest_path)
+        for from_path, dest_path in collect_pages(dir_path_content, dest_dir_path)
+        if shard_of(os.path.relpath(from_path, dir_path_content), count) == index
+    ]
+
+
+def write_shard_manifest(output_path, cache, index, count, basepath):
+    # Everything the merge needs to check and record this shard's pages:
+    # what built them and what the output should hash to.
+    pages = {}
+    for dest_path, entry in cache.pages.items():
+        pages[os.path.relpath(dest_path, output_path)] = {
+            "source": entry["source"],
+            "source_hash": entry["source_hash"],
+            "template_hash": entry["template_hash"],
+            "hash": hash_file(dest_path),
+        }
+    manifest = {
+        "version": SHARD_MANIFEST_VERSION,
+        "index": index,
+        "count": count,
+        "basepath": basepath,
+        "pages": pages,
+    }
+    with atomic_open(os.path.join(output_path, SHARD_MANIFEST_NAME)) as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def load_shard_manifest(path):
+    with open(os.path.join(path, SHARD_MANIFEST_NAME), "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SHARD_MANIFEST_VERSION:
+        raise ValueError(f"{path}: unsupported shard manifest version {manifest.get('version')}")
+    return manifest
+
+
+def merge_shards(count, output_path, cache=None, basepath="/", dir_path_content=None, root=SHARD_ROOT,
+                 template_hash=None):
+    # Checks that shards 0..count-1 are all there, were built the same way
+    # (and, given template_hash, the way this run would build them: see
+    # generate_page.template_key), don't overlap, cover every page of
+    # dir_path_content (if given) and still hold what their manifests say;
+    # then links their pages into output_path. Raises ValueError listing
+    # every problem found, before touching the output.
+    problems = []
+    claimed = {}
+    template_hashes = set()
+    for index in range(count):
+        path = shard_dir(index, count, root)
+        try:
+            manifest = load_shard_manifest(path)
+        except (OSError, ValueError) as e:
+            problems.append(f"shard {index}/{count}: {e}")
+            continue
+        if (manifest["index"], manifest["count"]) != (index, count):
+            problems.append(f"{path}: manifest is for shard {manifest['index']}/{manifest['count']}")
+            continue
+        if manifest["basepath"] != basepath:
+            problems.append(f"{path}: built for basepath {manifest['basepath']}, not {basepath}")
+        for relative, entry in manifest["pages"].items():
+            template_hashes.add(entry["template_hash"])
+            if relative in claimed:
+                problems.append(f"{relative}: built by shards {claimed[relative][0]} and {index}")
+                continue
+            page_path = os.path.join(path, relative)
+            if not os.path.exists(page_path) or hash_file(page_path) != entry["hash"]:
+                problems.append(f"{page_path}: missing or changed since the shard was built")
+            claimed[relative] = (index, entry)
+    if len(template_hashes) > 1:
+        problems.append("shards were built with different templates or assets")
+    elif template_hash is not None and template_hashes and template_hashes != {template_hash}:
+        problems.append("shards were built with a different template or assets than this build uses")
+    if dir_path_content is not None:
+        for from_path, dest_path in collect_pages(dir_path_content, ""):
+            if dest_path not in claimed:
+                problems.append(f"{from_path}: not built by any shard")
+    if problems:
+        raise ValueError(f"can't merge {count} shard(s):\n  " + "\n  ".join(problems))
+
+    for relative, (index, entry) in sorted(claimed.items()):
+        dest_path = os.path.join(output_path, relative)
+        # Shards replace their outputs rather than writing through them, so
+        # a link is safe and costs no data.
+        if sync_file(os.path.join(shard_dir(index, count, root), relative), dest_path, mode="hardlink"):
+            logging.info(f"Merged page from shard {index}: {dest_path}")
+        else:
+            logging.info(f"Skipping unchanged page: {dest_path}")
+        if cache is not None:
+            cache.record_page(dest_path, entry["source"], entry["source_hash"], entry["template_hash"], basepath)
+
+
+def generate_pages_coordinated(dir_path_content, template_path, dest_dir_path, basepath="/", cache=None, workers=2,
+                               batch_size=COORDINATOR_BATCH_SIZE, assets=None, images=None, pages=None):
+    # Like generate_pages_parallel, but this process only hands out batches
+    # of pages to `workers` worker processes over a local socket, one batch
+    # per idle worker. A batch whose worker dies goes back on the queue.
+    if pages is None:
+        pages = collect_pages(dir_path_content, dest_dir_path)
+    if not pages:
+        return
+    template_hash = page_template_hash(cache, template_path, assets, images)
+    tasks = page_tasks(pages, template_path, basepath, cache, template_hash)
+    batches = deque(tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size))
+    results = {}
+    authkey = os.urandom(16)
+
+    with tempfile.TemporaryDirectory(prefix="coordinator_") as socket_dir:
+        with Listener(os.path.join(socket_dir, "socket"), "AF_UNIX", authkey=authkey) as listener:
+            processes = [
+                Process(target=run_worker, args=(listener.address, authkey, worker_initargs(assets, images)), daemon=True)
+                for _ in range(max(1, workers))
+            ]
+            for process in processes:
+                process.start()
+            idle = accept_workers(listener, processes)
+            in_flight = {}
+            try:
+                while batches or in_flight:
+                    while idle and batches:
+                        connection = idle.pop()
+                        batch = batches.popleft()
+                        try:
+                            connection.send(batch)
+                        except OSError:
+                            # Died while idle.
+                            logging.warning(f"Page worker exited; requeueing {len(batch)} page(s)")
+                            connection.close()
+                            batches.appendleft(batch)
+                            continue
+                        in_flight[connection] = batch
+                    if not in_flight:
+                        raise RuntimeError("every page worker exited")
+                    for connection in wait(list(in_flight)):
+                        batch = in_flight.pop(connection)
+                        try:
+                            batch_results = connection.recv()
+                        except (EOFError, OSError):
+                            logging.warning(f"Page worker exited; requeueing {len(batch)} page(s)")
+                            connection.close()
+                            batches.appendleft(batch)
+                            continue
+                        for result in batch_results:
+                            results[result[1]] = result
+                        idle.append(connection)
+            finally:
+                for connection in idle + list(in_flight):
+                    try:
+                        connection.send(None)
+                    except OSError:
+                        pass
+                    connection.close()
+                for process in processes:
+                    process.join()
+
+    # Logged and recorded in page order, as the parallel build does.
+    record_page_results(
+        (results[task[2]] for task in tasks), template_path, basepath, cache, template_hash
+    )
+
+
+def accept_workers(listener, processes):
+    # A connection from every worker that manages to connect. Waits on the
+    # workers' sentinels as well as the listening socket, so one that dies
+    # before connecting doesn't leave accept() blocked forever. Workers send
+    # their pid first to say which one they are.
+    listening = listener._listener._socket
+    unconnected = {process.pid: process for process in processes}
+    connections = []
+    while unconnected:
+        ready = wait([listening] + [process.sentinel for process in unconnected.values()])
+        if listening in ready:
+            try:
+                connection = listener.accept()
+                pid = connection.recv()
+            except (EOFError, OSError, AuthenticationError) as e:
+                logging.warning(f"Page worker failed to connect: {type(e).__name__}: {e}")
+            else:
+                unconnected.pop(pid, None)
+                connections.append(connection)
+        for pid, process in list(unconnected.items()):
+            if process.sentinel in ready:
+                logging.warning(f"Page worker {pid} exited before connecting (exit code {process.exitcode})")
+                del unconnected[pid]
+    return connections
+
+
+def run_worker(address, authkey, initargs):
+    # A page worker: render each batch the coordinator sends, reply with the
+    # results, stop on None.
+    _init_worker(*initargs)
+    with Client(address, "AF_UNIX", authkey=authkey) as connection:
+        connection.send(os.getpid())
+        while True:
+            batch = connection.recv()
+            if batch is None:
+                return
+            connection.send([_generate_page_task(task) for task in batch])
@@ -0,0 +1,127 @@
+import os
+import logging
+import urllib.error
+import urllib.request
+
+from block_markdown import PARSER_VERSION
+from build_cache import hash_bytes
+from publish import atomic_open
+
+# Bump when page output changes for reasons the key can't see (rendering,
+# URL rewriting), so no build fetches pages made by an older renderer.
+RENDERER_VERSION = 1
+HTTP_TIMEOUT = 10
+
+
+def page_key(source_hash, template_hash, basepath):
+    # template_hash is template_key(): the template plus the asset and
+    # image digests.
+    return hash_bytes(f"page:{RENDERER_VERSION}:{PARSER_VERSION}:{source_hash}:{template_hash}:{basepath}".encode())
+
+
+def image_variant_key(source_hash, pipeline_version, width, image_format, quality):
+    return hash_bytes(f"image:{pipeline_version}:{source_hash}:{width}:{image_format}:{quality}".encode())
+
+
+class SharedCache:
+    # Content-addressed blobs shared between machines: builds fetch what
+    # another build already produced under the same key instead of redoing
+    # it. Backends implement _get (bytes, or None when absent) and _put.
+    # The cache is an optimization only, so backend errors are logged and
+    # treated as misses.
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            data = self._get(key)
+        except OSError as e:
+            logging.warning(f"Shared cache read failed for {key}: {e}")
+            data = None
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        try:
+            self._put(key, data)
+        except OSError as e:
+            logging.warning(f"Shared cache write failed for {key}: {e}")
+
+    def _get(self, key):
+        raise NotImplementedError("_get method not implemented")
+
+    def _put(self, key, data):
+        raise NotImplementedError("_put method not implemented")
+
+
+class DirectoryCache(SharedCache):
+    # A directory every machine can reach (NFS, a CI volume). Writes are
+    # atomic renames, so concurrent builds never see half a blob.
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def _get(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _put(self, key, data):
+        with atomic_open(self.path(key), "wb") as f:
+            f.write(data)
+
+    def __repr__(self):
+        return f"DirectoryCache({self.root})"
+
+
+class HttpCache(SharedCache):
+    # GET and PUT of base_url/<key>, with 404 for a miss: the protocol of
+    # common HTTP build caches and of a WebDAV-enabled web server.
+    def __init__(self, base_url, timeout=HTTP_TIMEOUT):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _get(self, key):
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/{key}", timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def _put(self, key, data):
+        request = urllib.request.Request(f"{self.base_url}/{key}", data=data, method="PUT")
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+    def __repr__(self):
+        return f"HttpCache({self.base_url})"
+
+
+def open_shared_cache(location):
+    if location.startswith(("http://", "https://")):
+        return HttpCache(location)
+    return DirectoryCache(location)
+
+
+_shared_cache = None
+
+
+def get_shared_cache():
+    return _shared_cache
+
+
+def set_shared_cache(cache):
+    global _shared_cache
+    _shared_cache = cache
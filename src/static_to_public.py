@@ -1,14 +1,118 @@
 import os
 import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from build_cache import hash_file
+from copy_engine import copy_file, scan_tree
+from fingerprint import ASSET_MANIFEST_NAME, asset_url
 
 logging.basicConfig(
     level=logging.INFO, 
     format='%(levelname)s: %(message)s'
 )
 
-def static_to_public(static_path, public_path):
+def static_to_public(static_path, public_path, cache=None):
+    
+    # With a cache, sync in place so unchanged files and generated pages stay put.
+    if cache is not None:
+        return sync_static(static_path, public_path, cache)
     
+    clear_directory(public_path)
+    
+    if not os.path.exists(static_path):
+        raise FileNotFoundError(f"Source directory not found: {static_path}")
+
+    sync_static(static_path, public_path)
+
+
+class SyncStats:
+    def __init__(self):
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.deleted_files = 0
+
+    def __repr__(self):
+        return (
+            f"SyncStats(copied {self.copied_files} files/{self.copied_bytes} bytes, "
+            f"skipped {self.skipped_files} files/{self.skipped_bytes} bytes, "
+            f"deleted {self.deleted_files} files)"
+        )
+
+
+def sync_static(static_path, public_path, cache=None, checksum=False, force=False, mode="copy", jobs=None, assets=None):
+    # rsync-like: copy what is new or differs in size/mtime (or content, with
+    # checksum=True), and delete only files a previous sync copied whose
+    # source is gone. Anything else in public_path (pages) is left alone.
+    # With an asset manifest, files land under their fingerprinted names and
+    # the manifest is written next to them.
+    if not os.path.exists(static_path):
+        raise FileNotFoundError(f"Source directory not found: {static_path}")
+    os.makedirs(public_path, exist_ok=True)
+    if cache is not None and cache.forced:
+        force = True
+
+    # Walk once and create the directories up front; the per-file work
+    # (stat, hash, copy) then runs on a thread pool since it is all I/O.
+    tasks = []
+    for relative_dir, dirs, files in scan_tree(static_path):
+        for name in dirs:
+            destination_dir = os.path.join(public_path, relative_dir, name)
+            if not os.path.isdir(destination_dir):
+                os.makedirs(destination_dir)
+                logging.info(f"Created directory: {destination_dir}")
+        for name, size in files:
+            item_path = os.path.join(static_path, relative_dir, name)
+            if assets:
+                name = assets.get(asset_url(relative_dir, name), "/" + name).rsplit("/", 1)[1]
+            dest_path = os.path.normpath(os.path.join(public_path, relative_dir, name))
+            tasks.append((item_path, dest_path, size))
+
+    stats = SyncStats()
+    synced = set()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        copied = executor.map(
+            lambda task: sync_file(task[0], task[1], checksum, force, mode), tasks
+        )
+        # Results come back in order, so logging and the cache stay on this thread.
+        for (item_path, dest_path, size), was_copied in zip(tasks, copied):
+            synced.add(dest_path)
+            _log_sync(item_path, dest_path, was_copied)
+            if cache is not None:
+                cache.record_static(item_path, dest_path)
+            if was_copied:
+                stats.copied_files += 1
+                stats.copied_bytes += size
+            else:
+                stats.skipped_files += 1
+                stats.skipped_bytes += size
+
+    if cache is not None:
+        prefix = os.path.normpath(public_path) + os.sep
+        source_prefix = os.path.normpath(static_path) + os.sep
+        for dest_path, entry in list(cache.static.items()):
+            if dest_path.startswith(prefix) and entry["source"].startswith(source_prefix) and dest_path not in synced:
+                cache.remove_output(dest_path, public_path)
+                stats.deleted_files += 1
+
+    if assets:
+        manifest_path = os.path.join(public_path, ASSET_MANIFEST_NAME)
+        assets.save(manifest_path)
+        if cache is not None:
+            # Recorded so prune removes it once a build stops fingerprinting.
+            cache.record_static(static_path, manifest_path)
+
+    logging.info(
+        f"Synced {static_path} to {public_path}: copied {stats.copied_files} files "
+        f"({stats.copied_bytes} bytes), skipped {stats.skipped_files} files "
+        f"({stats.skipped_bytes} bytes), deleted {stats.deleted_files} files"
+    )
+    return stats
+
+
+def clear_directory(public_path):
     if os.path.exists(public_path):
         contents = os.listdir(public_path)
         if len(contents) != 0:
@@ -28,22 +132,50 @@ def static_to_public(static_path, public_path):
                         logging.error(f"Permission denied: {e}")
     else:
         os.makedirs(public_path, exist_ok=True)
-    
-    if not os.path.exists(static_path):
-        raise FileNotFoundError(f"Source directory not found: {static_path}")
 
-    static_content = os.listdir(static_path)
-    for item in static_content:
-        item_path = os.path.join(static_path, item)
-        if os.path.isfile(item_path):
-            shutil.copy(item_path, public_path)
-            logging.info(f"Copied file: {item_path} to {public_path}")
-        elif os.path.isdir(item_path):
-            destination_dir = os.path.join(public_path, item)
-            os.makedirs(destination_dir)
-            logging.info(f"Created directory: {destination_dir}")
-            static_to_public(item_path, destination_dir)
 
+def copy_static_file(item_path, dest_path, cache=None, checksum=False, force=False, mode="copy"):
+    was_copied = sync_file(item_path, dest_path, checksum, force, mode)
+    _log_sync(item_path, dest_path, was_copied)
+    if cache is not None:
+        cache.record_static(item_path, dest_path)
+    return was_copied
+
+
+def sync_file(item_path, dest_path, checksum=False, force=False, mode="copy"):
+    if not force and not needs_copy(item_path, dest_path, checksum):
+        return False
+    public_path = os.path.dirname(dest_path)
+    if public_path:
+        os.makedirs(public_path, exist_ok=True)
+    # Metadata comes along, so the next sync can compare mtimes.
+    copy_file(item_path, dest_path, mode)
+    return True
+
+
+def _log_sync(item_path, dest_path, was_copied):
+    if was_copied:
+        logging.info(f"Copied file: {item_path} to {os.path.dirname(dest_path)}")
+    else:
+        logging.info(f"Skipping unchanged file: {item_path}")
+
+
+def needs_copy(item_path, dest_path, checksum=False):
+    try:
+        dest_st = os.stat(dest_path)
+    except FileNotFoundError:
+        return True
+    st = os.stat(item_path)
+    if st.st_size != dest_st.st_size:
+        return True
+    if not checksum:
+        return st.st_mtime_ns != dest_st.st_mtime_ns
+    if hash_file(item_path) != hash_file(dest_path):
+        return True
+    if st.st_mtime_ns != dest_st.st_mtime_ns:
+        # Same bytes, only touched: bring the metadata over instead of the data.
+        shutil.copystat(item_path, dest_path)
+    return False
 
 
 def extract_title(md):
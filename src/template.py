@@ -0,0 +1,77 @@
+import os
+import re
+from functools import lru_cache
+
+SLOT_PATTERN = re.compile(r"\{\{ (Title|Content) \}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r'(href|src)="(/[^"]*)"')
+
+
+class Template:
+    def __init__(self, text, basepath="/", assets=None, images=None):
+        self.basepath = basepath
+        self.assets = assets
+        self.images = images
+        self.segments = []
+        self.slots = []
+        start = 0
+        for match in SLOT_PATTERN.finditer(text):
+            self.segments.append(rewrite_urls(text[start:match.start()], basepath, assets))
+            self.slots.append(match.group(1))
+            start = match.end()
+        self.segments.append(rewrite_urls(text[start:], basepath, assets))
+
+    def render(self, title, content):
+        values = {"Title": title, "Content": content}
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+    def can_stream(self):
+        return self.slots.count("Content") == 1
+
+    def render_around_content(self, title):
+        # The rendered page split where the content goes, so the content can
+        # be written between the two halves without being built as a string.
+        if not self.can_stream():
+            raise ValueError("template needs exactly one {{ Content }} slot to stream")
+        halves = ([self.segments[0]], [])
+        current = halves[0]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            if slot == "Content":
+                current = halves[1]
+            else:
+                current.append(title)
+            current.append(segment)
+        return "".join(halves[0]), "".join(halves[1])
+
+    def __repr__(self):
+        return f"Template(slots: {self.slots}, {self.basepath})"
+
+
+def rewrite_urls(html, basepath, assets=None):
+    # Root-relative href/src values move under the basepath, and point at
+    # the fingerprinted file when the asset manifest has one.
+    if basepath == "/" and not assets:
+        return html
+
+    def replace(match):
+        url = match.group(2)
+        if assets:
+            url = assets.get(url, url)
+        return f'{match.group(1)}="{basepath}{url[1:]}"'
+
+    return URL_ATTRIBUTE_PATTERN.sub(replace, html)
+
+
+def load_template(template_path, basepath="/", assets=None, images=None):
+    st = os.stat(template_path)
+    return _compile_template_file(os.fspath(template_path), basepath, st.st_mtime_ns, st.st_size, assets, images)
+
+
+@lru_cache(maxsize=16)
+def _compile_template_file(template_path, basepath, mtime_ns, size, assets, images):
+    # mtime/size are only part of the key, so an edited template gets recompiled.
+    with open(template_path, 'r') as template_file:
+        return Template(template_file.read(), basepath, assets, images)
@@ -0,0 +1,117 @@
+import os
+import shutil
+import unittest
+
+import generate_page
+from ast_cache import AstCache, render_spans, set_ast_cache
+from block_markdown import markdown_to_html_node
+from fingerprint import AssetManifest
+from images import ImageSet
+from template import Template
+
+
+DOCUMENT = """# Page
+
+Intro with a [link](/docs), `code` and ![img](/images/a.png).
+
+- one
+- **two** and _three_
+
+1. first
+2. second
+
+>quoted
+
+```
+code here
+```
+"""
+
+
+class TestRenderSpans(unittest.TestCase):
+    def test_same_html_as_to_html(self):
+        node = markdown_to_html_node(DOCUMENT)
+        self.assertEqual(render_spans(node)[0], node.to_html())
+
+    def test_spans(self):
+        """URL values, and the end of each <img>'s attributes with its src."""
+        html, urls, images = render_spans(markdown_to_html_node("[a](/x) ![b](/y.png)"))
+        self.assertEqual([html[start:end] for start, end in urls], ["/x", "/y.png"])
+        at, start, end = images[0]
+        self.assertEqual(html[start:end], "/y.png")
+        self.assertEqual(html[:at], '<div><p><a href="/x">a</a> <img src="/y.png" alt="b"')
+
+
+class TestAstCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = "test_ast_cache_dir"
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+
+    def tearDown(self):
+        set_ast_cache(None)
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+
+    def test_warm_load(self):
+        """A second cache (the next build) loads instead of parsing."""
+        first = AstCache(self.directory)
+        source_hash = first.key(DOCUMENT)
+        self.assertIsNone(first.get(source_hash))
+        entry = first.put(source_hash, DOCUMENT)
+        self.assertEqual(first.misses, 1)
+        second = AstCache(self.directory)
+        self.assertEqual(second.get(source_hash), entry)
+        self.assertEqual((second.hits, second.misses), (1, 0))
+
+    def test_truncated_entry_is_reparsed(self):
+        cache = AstCache(self.directory)
+        source_hash = cache.key(DOCUMENT)
+        cache.put(source_hash, DOCUMENT)
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                with open(os.path.join(root, name), "r+b") as f:
+                    f.truncate(10)
+        self.assertIsNone(cache.get(source_hash))
+        self.assertEqual(cache.misses, 1)
+
+    def test_basepath_change_reuses_parse(self):
+        """Rewriting happens after loading, so a new basepath is a hit."""
+        cache = AstCache(self.directory)
+        set_ast_cache(cache)
+        site = Template("<title>{{ Title }}</title>{{ Content }}", "/site/")
+        other = Template("<title>{{ Title }}</title>{{ Content }}", "/other/")
+        plain = Template("<title>{{ Title }}</title>{{ Content }}")
+        rendered = [generate_page.render_page(DOCUMENT, template) for template in (site, other, plain)]
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        set_ast_cache(None)
+        self.assertEqual(rendered, [generate_page.render_page(DOCUMENT, template) for template in (site, other, plain)])
+
+    def test_template_change_at_root_reuses_parse(self):
+        """With nothing to rewrite, a miss is stored all the same."""
+        plain = Template("<title>{{ Title }}</title>{{ Content }}")
+        edited = Template("<h1>{{ Title }}</h1>{{ Content }}")
+        first = AstCache(self.directory)
+        set_ast_cache(first)
+        generate_page.render_page(DOCUMENT, plain)
+        second = AstCache(self.directory)
+        set_ast_cache(second)
+        html = generate_page.render_page(DOCUMENT, edited)
+        self.assertEqual((first.misses, second.hits, second.misses), (1, 1, 0))
+        set_ast_cache(None)
+        self.assertEqual(html, generate_page.render_page(DOCUMENT, edited))
+
+    def test_assets_and_images_match_the_tree(self):
+        assets = AssetManifest({"/images/a.png": "/images/a.0123456789.png"})
+        images = ImageSet({"/images/a.png": {"width": 928, "height": 468, "srcset": [["/images/a.400w.webp", 400]]}})
+        cache = AstCache(self.directory)
+        set_ast_cache(cache)
+        template = Template("<title>{{ Title }}</title>{{ Content }}", "/site/", assets, images)
+        html = generate_page.render_page(DOCUMENT, template)
+        self.assertIn('srcset="/site/images/a.400w.webp 400w, /site/images/a.0123456789.png 928w"', html)
+        set_ast_cache(None)
+        self.assertEqual(html, generate_page.render_page(DOCUMENT, template))
+
+
+if __name__ == "__main__":
+    unittest.main()
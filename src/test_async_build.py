@@ -0,0 +1,122 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import generate_page
+from async_build import generate_pages_async
+from build_cache import BuildCache
+from generate_page import generate_pages_recursive
+
+
+class TestGeneratePagesAsync(unittest.TestCase):
+
+    def setUp(self):
+        """Create a content tree and a template before each test"""
+        self.test_dir = "test_async_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        self.cache_path = os.path.join(self.test_dir, "cache.json")
+
+        self.sources = {
+            "index.md": "# Home\n\nWelcome [home](/).",
+            "about.md": "# About\n\n- one\n- two",
+            os.path.join("blog", "first.md"): "# First\n\n>A quote",
+            os.path.join("blog", "second.md"): "# Second\n\n![img](/images/a.png)",
+            os.path.join("blog", "deep", "third.md"): "# Third\n\n```\ncode\n```",
+        }
+        for relpath, content in self.sources.items():
+            self._write(os.path.join(self.content_dir, relpath), content)
+        self._write(self.template_path, '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        """Clean up after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _read_tree(self, root):
+        """Return {relative path: content} for every file under root"""
+        tree = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'r') as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def test_matches_sequential_output(self):
+        """Small queues and batches still produce every page"""
+        sequential_dir = os.path.join(self.test_dir, "sequential")
+        async_dir = os.path.join(self.test_dir, "async")
+        with self.assertLogs(level="INFO"):
+            generate_pages_recursive(self.content_dir, self.template_path, sequential_dir, "/site/")
+            generate_pages_async(self.content_dir, self.template_path, async_dir, "/site/", jobs=2, concurrency=2, batch_size=2)
+
+        self.assertEqual(self._read_tree(sequential_dir), self._read_tree(async_dir))
+
+    def test_uses_the_build_cache(self):
+        dest_dir = os.path.join(self.test_dir, "docs")
+        with self.assertLogs(level="INFO"):
+            cache = BuildCache(self.cache_path)
+            generate_pages_async(self.content_dir, self.template_path, dest_dir, cache=cache, jobs=2)
+            cache.save()
+        self.assertEqual(len(cache.pages), len(self.sources))
+
+        self._write(os.path.join(self.content_dir, "about.md"), "# About\n\nChanged.")
+        with self.assertLogs(level="INFO") as logs:
+            cache = BuildCache(self.cache_path)
+            generate_pages_async(self.content_dir, self.template_path, dest_dir, cache=cache, jobs=2)
+        generated = [line for line in logs.output if "Generating page" in line]
+        skipped = [line for line in logs.output if "Skipping unchanged page" in line]
+        self.assertEqual(len(generated), 1)
+        self.assertIn("about.md", generated[0])
+        self.assertEqual(len(skipped), len(self.sources) - 1)
+
+    def test_streams_large_sources(self):
+        """Big sources are rendered and written by the worker"""
+        sequential_dir = os.path.join(self.test_dir, "sequential")
+        async_dir = os.path.join(self.test_dir, "async")
+        with mock.patch.object(generate_page, "STREAMING_THRESHOLD", 0), self.assertLogs(level="INFO"):
+            generate_pages_recursive(self.content_dir, self.template_path, sequential_dir)
+            generate_pages_async(self.content_dir, self.template_path, async_dir, jobs=1)
+
+        self.assertEqual(self._read_tree(sequential_dir), self._read_tree(async_dir))
+
+    def test_failure_names_source_path(self):
+        self._write(os.path.join(self.content_dir, "broken.md"), "no title here")
+        dest_dir = os.path.join(self.test_dir, "docs")
+        with self.assertLogs(level="INFO"):
+            with self.assertRaises(RuntimeError) as context:
+                generate_pages_async(self.content_dir, self.template_path, dest_dir, jobs=2)
+        self.assertIn("broken.md", str(context.exception))
+        # Every other page is still written.
+        self.assertEqual(len(self._read_tree(dest_dir)), len(self.sources))
+
+    def test_write_errors_fail_the_page(self):
+        """Not just OSError: the writer keeps going and names each page"""
+        dest_dir = os.path.join(self.test_dir, "docs")
+        with mock.patch("async_build.write_page", side_effect=ValueError("bad page")), self.assertLogs(level="INFO"):
+            with self.assertRaises(RuntimeError) as context:
+                generate_pages_async(self.content_dir, self.template_path, dest_dir, jobs=1, concurrency=2, batch_size=1)
+        self.assertIn("about.md", str(context.exception))
+
+    def test_writer_crash_stops_the_pipeline(self):
+        """Renderers blocked on a full write queue must not hang the build"""
+        dest_dir = os.path.join(self.test_dir, "docs")
+        cache = BuildCache(self.cache_path)
+        with mock.patch.object(cache, "record_page", side_effect=KeyError("boom")), self.assertLogs(level="INFO"):
+            with self.assertRaises(KeyError):
+                generate_pages_async(self.content_dir, self.template_path, dest_dir, cache=cache, jobs=1, concurrency=1, batch_size=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import shutil
+from block_markdown import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from benchmarks.corpus import CorpusGenerator, generate_corpus
+from benchmarks.suite import RESULTS_VERSION, compare_results, load_results, save_results
+
+
+class TestCorpusGenerator(unittest.TestCase):
+
+    def test_same_seed_same_page(self):
+        self.assertEqual(CorpusGenerator(7).page(30), CorpusGenerator(7).page(30))
+        self.assertNotEqual(CorpusGenerator(7).page(30), CorpusGenerator(8).page(30))
+
+    def test_pages_parse(self):
+        markdown = CorpusGenerator(1).page(100)
+        html = markdown_to_html_node(markdown).to_html()
+        for tag in ("<h1>", "<ul>", "<ol>", "<blockquote>", "<pre><code>", "<b>", "<i>", "<a href=", "<img src="):
+            self.assertIn(tag, html)
+
+    def test_mix(self):
+        markdown = CorpusGenerator(0, mix={"quote": 1}).page(20)
+        kinds = {block_to_block_type(block) for block in markdown_to_blocks(markdown)[1:]}
+        self.assertEqual(kinds, {BlockType.QUOTE})
+
+    def test_plain_inline_mix(self):
+        markdown = CorpusGenerator(0, mix={"paragraph": 1}, inline={}).page(5)
+        self.assertNotIn("**", markdown)
+        self.assertNotIn("](", markdown)
+
+
+class TestGenerateCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "test_benchmarks_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_layout(self):
+        paths = generate_corpus(os.path.join(self.test_dir, "content"), 5, blocks_per_page=3, pages_per_dir=2)
+        relative = [os.path.relpath(path, self.test_dir) for path in paths]
+        self.assertEqual(relative, [
+            os.path.join("content", "index.md"),
+            os.path.join("content", "section00", "page0001.md"),
+            os.path.join("content", "section01", "page0002.md"),
+            os.path.join("content", "section01", "page0003.md"),
+            os.path.join("content", "section02", "page0004.md"),
+        ])
+        with open(paths[3], 'r') as f:
+            self.assertTrue(f.read().startswith("# Page 3\n\n"))
+
+    def test_results_round_trip(self):
+        os.makedirs(self.test_dir)
+        path = os.path.join(self.test_dir, "baseline.json")
+        results = {"version": RESULTS_VERSION, "results": {"serialize": 0.5}}
+        save_results(results, path)
+        self.assertEqual(load_results(path), results)
+
+
+class TestCompareResults(unittest.TestCase):
+
+    def test_flags_regressions(self):
+        baseline = {"results": {"parse": 1.0, "serialize": 1.0, "old": 1.0}}
+        current = {"results": {"parse": 1.05, "serialize": 1.5, "new": 2.0}}
+        rows = compare_results(baseline, current, threshold=0.1)
+        self.assertEqual(rows, [
+            ("parse", 1.0, 1.05, 1.05, False),
+            ("serialize", 1.0, 1.5, 1.5, True),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
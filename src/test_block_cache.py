@@ -0,0 +1,127 @@
+import os
+import shutil
+import unittest
+
+import generate_page
+from block_markdown import BlockRenderCache, markdown_to_html_node, scan_blocks, set_render_cache
+from fingerprint import AssetManifest
+from template import Template
+
+
+DOCUMENT = """# Page
+
+Intro with a [link](/docs) and ![img](/images/a.png).
+
+- one
+- **two**
+
+>quoted
+
+```
+code [not a link](/x)
+```
+
+Footer paragraph shared by every page.
+"""
+
+
+def blocks(markdown):
+    return list(scan_blocks(markdown.split("\n")))
+
+
+class TestBlockRenderCache(unittest.TestCase):
+    def test_matches_node_rendering(self):
+        """The joined fragments are the same HTML as the node tree."""
+        cache = BlockRenderCache()
+        self.assertEqual(cache.render_blocks(blocks(DOCUMENT)), markdown_to_html_node(DOCUMENT).to_html())
+
+    def test_repeated_blocks_hit(self):
+        cache = BlockRenderCache()
+        cache.render_blocks(blocks(DOCUMENT))
+        self.assertEqual(cache.misses, 6)
+        cache.render_blocks(blocks("# Other\n\nFooter paragraph shared by every page."))
+        self.assertEqual(cache.misses, 7)
+        self.assertEqual(cache.hits, 1)
+
+    def test_context_is_part_of_the_key(self):
+        """The same block under another basepath is rendered again."""
+        block = blocks("[link](/docs)")[0]
+        cache = BlockRenderCache()
+        first = cache.render(block, "/")
+        second = cache.render(block, "/site/", lambda node: generate_page.rewrite_node_urls(node, "/site/"))
+        self.assertEqual(first, '<p><a href="/docs">link</a></p>')
+        self.assertEqual(second, '<p><a href="/site/docs">link</a></p>')
+        self.assertEqual(cache.misses, 2)
+
+    def test_bounded(self):
+        """Least recently used fragments go first."""
+        cache = BlockRenderCache(max_entries=2)
+        a, b, c = blocks("a\n\nb\n\nc")
+        cache.render(a)
+        cache.render(b)
+        cache.render(a)
+        cache.render(c)
+        self.assertEqual(len(cache), 2)
+        cache.render(a)
+        self.assertEqual(cache.hits, 2)
+        cache.render(b)
+        self.assertEqual(cache.misses, 4)
+
+    def test_errors_are_not_cached(self):
+        def fail(node):
+            raise ValueError("broken")
+
+        block = blocks("text")[0]
+        cache = BlockRenderCache()
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                cache.render(block, rewrite=fail)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.render(block), "<p>text</p>")
+
+
+class TestDiskTier(unittest.TestCase):
+    def setUp(self):
+        self.directory = "test_block_cache_dir"
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+
+    def tearDown(self):
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+
+    def test_survives_across_caches(self):
+        """A new cache (the next build) finds fragments written by the last."""
+        first = BlockRenderCache(directory=self.directory)
+        html = first.render_blocks(blocks(DOCUMENT))
+        second = BlockRenderCache(directory=self.directory)
+        self.assertEqual(second.render_blocks(blocks(DOCUMENT)), html)
+        self.assertEqual(second.misses, 0)
+        self.assertEqual(second.disk_hits, 6)
+        second.render_blocks(blocks(DOCUMENT))
+        self.assertEqual(second.hits, 6)
+
+
+class TestRenderPage(unittest.TestCase):
+    def tearDown(self):
+        set_render_cache(None)
+
+    def render(self, template):
+        set_render_cache(None)
+        expected = generate_page.render_page(DOCUMENT, template)
+        cache = BlockRenderCache()
+        set_render_cache(cache)
+        self.assertEqual(generate_page.render_page(DOCUMENT, template), expected)
+        self.assertEqual(generate_page.render_page(DOCUMENT, template), expected)
+        self.assertEqual(cache.misses, 6)
+
+    def test_same_page_with_cache(self):
+        self.render(Template("<title>{{ Title }}</title>{{ Content }}"))
+
+    def test_same_page_with_basepath_and_assets(self):
+        assets = AssetManifest({"/images/a.png": "/images/a.0123456789.png"})
+        self.render(Template("<title>{{ Title }}</title>{{ Content }}", "/site/", assets))
+
+
+if __name__ == "__main__":
+    unittest.main()
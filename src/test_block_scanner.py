@@ -0,0 +1,89 @@
+import io
+import random
+import unittest
+
+from block_markdown import (
+    Block,
+    BlockType,
+    scan_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    block_to_html_node,
+)
+
+
+def split_markdown_to_blocks(markdown):
+    """The original split("\\n\\n") implementation, kept as the reference."""
+    blocks = []
+    for block in markdown.split("\n\n"):
+        if block == "":
+            continue
+        blocks.append(block.strip())
+    return blocks
+
+
+class TestScanBlocks(unittest.TestCase):
+    def test_types_and_line_numbers(self):
+        markdown = "# Title\n\nSome text\nmore text\n\n- a\n- b\n\n\n1. x\n2. y\n\n>q\n\n```\ncode\n```"
+        blocks = list(scan_blocks(markdown.split("\n")))
+        self.assertEqual(
+            blocks,
+            [
+                Block(BlockType.HEADING, ["# Title"], 1),
+                Block(BlockType.PARAGRAPH, ["Some text", "more text"], 3),
+                Block(BlockType.ULIST, ["- a", "- b"], 6),
+                Block(BlockType.OLIST, ["1. x", "2. y"], 10),
+                Block(BlockType.QUOTE, [">q"], 13),
+                Block(BlockType.CODE, ["```", "code", "```"], 15),
+            ],
+        )
+
+    def test_strips_surrounding_whitespace(self):
+        blocks = list(scan_blocks(["   ", "  # Heading  ", "  "]))
+        self.assertEqual(blocks, [Block(BlockType.HEADING, ["# Heading"], 2)])
+
+    def test_file_lines_with_newlines(self):
+        source = io.StringIO("# A\n\ntext\n")
+        self.assertEqual(
+            list(scan_blocks(source)),
+            [Block(BlockType.HEADING, ["# A"], 1), Block(BlockType.PARAGRAPH, ["text"], 3)],
+        )
+
+    def test_fenced_code_with_blank_lines(self):
+        markdown = "Intro\n\n```\ndef f():\n\n    return 1\n```\n\nOutro"
+        blocks = list(scan_blocks(markdown.split("\n")))
+        self.assertEqual(len(blocks), 3)
+        self.assertEqual(blocks[1], Block(BlockType.CODE, ["```", "def f():", "", "    return 1", "```"], 3))
+        html = markdown_to_html_node(markdown).to_html()
+        self.assertIn("<pre><code>def f():\n\n    return 1\n</code></pre>", html)
+
+    def test_fence_ends_block(self):
+        blocks = list(scan_blocks(["```", "code", "```", "after"]))
+        self.assertEqual([block.block_type for block in blocks], [BlockType.CODE, BlockType.PARAGRAPH])
+
+    def test_unclosed_fence_falls_back_to_blank_line_splitting(self):
+        markdown = "```\nnot closed\n\nnext paragraph"
+        self.assertEqual(markdown_to_blocks(markdown), ["```\nnot closed", "next paragraph"])
+
+    def test_inline_triple_backticks_do_not_open_a_fence(self):
+        markdown = "```a```\n\nnext"
+        self.assertEqual(markdown_to_blocks(markdown), ["```a```", "next"])
+
+    def test_block_to_html_node_accepts_strings(self):
+        self.assertEqual(block_to_html_node("- a\n- b").to_html(), "<ul><li>a</li><li>b</li></ul>")
+
+
+class TestScanBlocksParity(unittest.TestCase):
+    def test_matches_split_without_fences(self):
+        rng = random.Random(99)
+        pieces = ["a", "b c", "\n", "\n\n", "# h", "- i", "1. x", ">q", "  ", "\t"]
+        for _ in range(5000):
+            markdown = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+            # The scanner drops blocks that are only whitespace instead of
+            # turning them into empty paragraphs.
+            expected = [block for block in split_markdown_to_blocks(markdown) if block != ""]
+            self.assertEqual(markdown_to_blocks(markdown), expected, msg=repr(markdown))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import os
+import shutil
+from build_cache import BuildCache
+from generate_page import generate_pages_recursive
+from static_to_public import static_to_public
+
+
+class TestBuildCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small site (content, static, template) before each test"""
+        self.test_dir = "test_build_cache_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.dest_dir = os.path.join(self.test_dir, "docs")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        self.manifest_path = os.path.join(self.test_dir, "cache.json")
+
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nWelcome home.")
+        self._write(os.path.join(self.content_dir, "blog", "post.md"), "# Post\n\nA post.")
+        self._write(os.path.join(self.static_dir, "index.css"), "body {}")
+        self._write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        """Clean up the test site after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _build(self, basepath="/", force=False):
+        """Run one cached build the same way main() does"""
+        cache = BuildCache(self.manifest_path)
+        if force:
+            cache.clear()
+        static_to_public(self.static_dir, self.dest_dir, cache)
+        generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, basepath, cache)
+        cache.prune(self.dest_dir)
+        cache.save()
+
+    def _logged_build(self, **kwargs):
+        """Build and return the INFO log lines"""
+        with self.assertLogs(level="INFO") as logs:
+            self._build(**kwargs)
+        return "\n".join(logs.output)
+
+    def test_second_build_skips_everything(self):
+        self._build()
+        output = self._logged_build()
+        self.assertNotIn("Generating page", output)
+        self.assertNotIn("Copied file", output)
+        self.assertIn("Skipping unchanged page", output)
+        self.assertIn("Skipping unchanged file", output)
+
+    def test_only_edited_page_is_rebuilt(self):
+        self._build()
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nEdited.")
+        output = self._logged_build()
+        self.assertIn(f"Generating page from {os.path.join(self.content_dir, 'index.md')}", output)
+        self.assertNotIn(f"Generating page from {os.path.join(self.content_dir, 'blog', 'post.md')}", output)
+        with open(os.path.join(self.dest_dir, "index.html"), 'r') as f:
+            self.assertIn("Edited.", f.read())
+
+    def test_template_change_rebuilds_all_pages(self):
+        self._build()
+        self._write(self.template_path, "<h1>{{ Title }}</h1>{{ Content }}")
+        output = self._logged_build()
+        self.assertEqual(output.count("Generating page"), 2)
+
+    def test_basepath_change_rebuilds_all_pages(self):
+        self._build()
+        output = self._logged_build(basepath="/site/")
+        self.assertEqual(output.count("Generating page"), 2)
+
+    def test_deleted_source_is_pruned(self):
+        self._build()
+        post_output = os.path.join(self.dest_dir, "blog", "post.html")
+        self.assertTrue(os.path.exists(post_output))
+
+        os.remove(os.path.join(self.content_dir, "blog", "post.md"))
+        os.remove(os.path.join(self.static_dir, "index.css"))
+        self._build()
+
+        self.assertFalse(os.path.exists(post_output))
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "blog")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest_dir, "index.html")))
+
+    def test_missing_output_is_regenerated(self):
+        self._build()
+        os.remove(os.path.join(self.dest_dir, "index.html"))
+        output = self._logged_build()
+        self.assertEqual(output.count("Generating page"), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.dest_dir, "index.html")))
+
+    def test_unchanged_page_outputs_survive_static_sync(self):
+        self._build()
+        index_output = os.path.join(self.dest_dir, "index.html")
+        mtime = os.stat(index_output).st_mtime_ns
+        self._write(os.path.join(self.static_dir, "index.css"), "body { margin: 0; }")
+        self._build()
+        self.assertEqual(os.stat(index_output).st_mtime_ns, mtime)
+
+    def test_force_rebuilds_everything(self):
+        self._build()
+        output = self._logged_build(force=True)
+        self.assertEqual(output.count("Generating page"), 2)
+        self.assertIn("Copied file", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import errno
+import os
+import shutil
+import copy_engine
+from copy_engine import copy_file, scan_tree
+
+
+class TestCopyEngine(unittest.TestCase):
+
+    def setUp(self):
+        """Create a source tree before each test"""
+        self.test_dir = "test_copy_engine_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.src_dir = os.path.join(self.test_dir, "src")
+        self.dest_dir = os.path.join(self.test_dir, "dest")
+        os.makedirs(self.dest_dir)
+        self.data = os.urandom(3 * 1024 * 1024 + 17)
+        self.src_path = os.path.join(self.src_dir, "video.bin")
+        self._write(self.src_path, self.data)
+
+    def tearDown(self):
+        """Clean up the test tree after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, data):
+        """Helper method to create a file with binary content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_scan_tree(self):
+        self._write(os.path.join(self.src_dir, "a", "b", "deep.txt"), b"deep")
+        self._write(os.path.join(self.src_dir, "a", "one.txt"), b"1")
+        scanned = list(scan_tree(self.src_dir))
+        self.assertEqual(scanned, [
+            ("", ["a"], [("video.bin", len(self.data))]),
+            ("a", ["b"], [("one.txt", 1)]),
+            (os.path.join("a", "b"), [], [("deep.txt", 4)]),
+        ])
+
+    def test_copy(self):
+        dest_path = os.path.join(self.dest_dir, "video.bin")
+        copy_file(self.src_path, dest_path)
+        self.assertEqual(self._read(dest_path), self.data)
+        self.assertEqual(os.stat(dest_path).st_mtime_ns, os.stat(self.src_path).st_mtime_ns)
+        self.assertNotEqual(os.stat(dest_path).st_ino, os.stat(self.src_path).st_ino)
+        self.assertEqual(os.listdir(self.dest_dir), ["video.bin"])
+
+    def test_copy_replaces_hardlinked_destination(self):
+        """Copying over a hardlink must not write through to the other name"""
+        dest_path = os.path.join(self.dest_dir, "video.bin")
+        copy_file(self.src_path, dest_path, mode="hardlink")
+        other = os.path.join(self.src_dir, "other.bin")
+        self._write(other, b"other")
+        copy_file(other, dest_path)
+        self.assertEqual(self._read(self.src_path), self.data)
+        self.assertEqual(self._read(dest_path), b"other")
+
+    def test_hardlink(self):
+        dest_path = os.path.join(self.dest_dir, "video.bin")
+        copy_file(self.src_path, dest_path, mode="hardlink")
+        self.assertEqual(os.stat(dest_path).st_ino, os.stat(self.src_path).st_ino)
+
+    def test_reflink_falls_back_to_copy(self):
+        dest_path = os.path.join(self.dest_dir, "video.bin")
+        copy_file(self.src_path, dest_path, mode="reflink")
+        self.assertEqual(self._read(dest_path), self.data)
+
+    def test_falls_back_when_kernel_copies_are_unsupported(self):
+        def unsupported(*args):
+            raise OSError(errno.ENOSYS, "unsupported")
+        original = (copy_engine._copy_file_range, copy_engine._sendfile)
+        copy_engine._copy_file_range = copy_engine._sendfile = unsupported
+        try:
+            dest_path = os.path.join(self.dest_dir, "video.bin")
+            copy_file(self.src_path, dest_path)
+            self.assertEqual(self._read(dest_path), self.data)
+        finally:
+            copy_engine._copy_file_range, copy_engine._sendfile = original
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            copy_file(self.src_path, os.path.join(self.dest_dir, "video.bin"), mode="teleport")
+
+
+if __name__ == '__main__':
+    unittest.main()
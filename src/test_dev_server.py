@@ -0,0 +1,95 @@
+import unittest
+import os
+import shutil
+import threading
+import urllib.error
+import urllib.request
+from dev_server import PageStore, make_server, LIVE_RELOAD_PATH, LIVE_RELOAD_SCRIPT
+
+
+class TestDevServer(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small site and start a dev server on a free port"""
+        self.test_dir = "test_dev_server_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nWelcome.")
+        self._write(os.path.join(self.content_dir, "blog", "post", "index.md"), "# Post\n\nA post.")
+        self._write(os.path.join(self.static_dir, "index.css"), "body {}")
+        self._write(self.template_path, "<html><body><title>{{ Title }}</title>{{ Content }}</body></html>")
+
+        self.store = PageStore(self.content_dir, self.static_dir, self.template_path)
+        self.server = make_server(self.store, port=0)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        """Stop the server and clean up"""
+        self.server.stopping = True
+        self.server.shutdown()
+        self.server.server_close()
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _get(self, path):
+        with self.assertLogs(level="INFO"):
+            with urllib.request.urlopen(self.base_url + path, timeout=5) as response:
+                return response.read().decode()
+
+    def test_renders_lazily_from_memory(self):
+        self.assertEqual(self.store.cached_pages(), [])
+        html = self._get("/")
+        self.assertIn("<title>Home</title>", html)
+        self.assertIn(LIVE_RELOAD_SCRIPT + "</body>", html)
+        self.assertEqual(self.store.cached_pages(), ["index.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "docs")))
+
+    def test_directory_page_redirects_and_renders(self):
+        html = self._get("/blog/post")
+        self.assertIn("<title>Post</title>", html)
+
+    def test_static_files_are_served_from_disk(self):
+        with urllib.request.urlopen(self.base_url + "/index.css", timeout=5) as response:
+            self.assertEqual(response.read().decode(), "body {}")
+
+    def test_missing_page(self):
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(self.base_url + "/nope.html", timeout=5)
+        self.assertEqual(ctx.exception.code, 404)
+
+    def test_invalidation_rerenders_changed_page_only(self):
+        self._get("/")
+        self._get("/blog/post/")
+        post_path = os.path.join(self.content_dir, "blog", "post", "index.md")
+        self._write(post_path, "# Post\n\nEdited.")
+        self.store.invalidate({post_path})
+        self.assertEqual(self.store.cached_pages(), ["index.html"])
+        self.assertIn("Edited.", self._get("/blog/post/"))
+
+    def test_template_change_invalidates_everything(self):
+        self._get("/")
+        self._get("/blog/post/")
+        self.store.invalidate({self.template_path})
+        self.assertEqual(self.store.cached_pages(), [])
+
+    def test_reload_event_is_pushed(self):
+        with urllib.request.urlopen(self.base_url + LIVE_RELOAD_PATH, timeout=5) as events:
+            self.store.invalidate({os.path.join(self.static_dir, "index.css")})
+            self.assertEqual(events.readline(), b"data: reload\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import random
+import unittest
+
+from benchmarks.corpus import CorpusGenerator
+from block_markdown import block_to_html, block_to_html_node, markdown_to_html, markdown_to_html_node
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "content")
+
+# Pieces the fuzzer glues together: every block and inline marker the parser
+# knows, in and out of position.
+TOKENS = [
+    "# ", "## ", "####### ", "#", "- ", "1. ", "2. ", ">", "> ", "```", "```\n",
+    "**", "_", "`", "[", "]", "(", ")", "![", "](", "/docs", "text", "word ",
+    " ", "  ", "\n", "\n\n", "\n\n", "\t", "<b>", "&amp;", '"',
+]
+
+
+def tree_html(markdown):
+    # (html, None) or (None, error) from the node tree path.
+    try:
+        return markdown_to_html_node(markdown).to_html(), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def fast_html(markdown):
+    try:
+        return markdown_to_html(markdown), None
+    except ValueError as e:
+        return None, str(e)
+
+
+class TestFastRenderParity(unittest.TestCase):
+    def assertParity(self, markdown):
+        self.assertEqual(fast_html(markdown), tree_html(markdown), repr(markdown))
+
+    def test_content_fixtures(self):
+        """Every page of the site renders byte-identically."""
+        count = 0
+        for root, _, files in os.walk(CONTENT_DIR):
+            for name in files:
+                if name.endswith(".md"):
+                    with open(os.path.join(root, name), "r") as f:
+                        self.assertParity(f.read())
+                    count += 1
+        self.assertGreater(count, 0)
+
+    def test_handwritten_cases(self):
+        cases = [
+            "",
+            "plain",
+            "**bold** _italic_ `code` [link](/a) ![img](/b.png)",
+            "**unclosed",
+            "_a **b** c_",
+            "**a _b_ c**",
+            "`_not italic_`",
+            "# Heading with **bold**",
+            "####### seven",
+            "```\ncode **raw** [x](/y)\n```",
+            "```\nnever closed\n\nstill text",
+            "- one\n- **two**\n- [three](/3)",
+            "1. one\n2. two\n3. _three_",
+            "1. one\n3. skipped",
+            ">quote\n> more\n>> nested",
+            "> ",
+            "[a]([b](c))",
+            "![](/empty-alt.png)",
+            "<script>raw html</script> & entities &amp;",
+        ]
+        for markdown in cases:
+            self.assertParity(markdown)
+
+    def test_generated_pages(self):
+        for seed in range(20):
+            self.assertParity(CorpusGenerator(seed).page(30))
+
+    def test_fuzz_corpus(self):
+        """Random token soup: same HTML, or the same error."""
+        rng = random.Random(0)
+        for _ in range(2000):
+            self.assertParity("".join(rng.choice(TOKENS) for _ in range(rng.randint(1, 40))))
+
+    def test_block_strings(self):
+        for block in ("para **b**", "## h", "- a\n- b", "1. a", "> q", "```\nx\n```"):
+            self.assertEqual(block_to_html(block), block_to_html_node(block).to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
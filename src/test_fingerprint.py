@@ -0,0 +1,143 @@
+import unittest
+import os
+import shutil
+import build_cache
+from build_cache import BuildCache
+from fingerprint import ASSET_MANIFEST_NAME, AssetManifest, fingerprint_assets, fingerprinted_name
+from generate_page import generate_pages_parallel, generate_pages_recursive, render_page
+from static_to_public import sync_static
+from template import Template
+
+
+class TestFingerprintAssets(unittest.TestCase):
+
+    def setUp(self):
+        """Create a static tree and a small site before each test"""
+        self.test_dir = "test_fingerprint_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.dest_dir = os.path.join(self.test_dir, "docs")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        self.cache = BuildCache(os.path.join(self.test_dir, "cache.json"))
+
+        self._write(os.path.join(self.static_dir, "index.css"), "body {}")
+        self._write(os.path.join(self.static_dir, "images", "tom.png"), "png")
+        self._write(os.path.join(self.static_dir, "robots.txt"), "User-agent: *")
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\n![tom](/images/tom.png)")
+        self._write(self.template_path, '<link href="/index.css" rel="stylesheet" /><title>{{ Title }}</title>{{ Content }}')
+
+    def tearDown(self):
+        """Clean up the test tree after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def _build(self):
+        """Fingerprint, sync and generate the way main() does"""
+        with self.assertLogs(level="INFO") as logs:
+            assets = fingerprint_assets(self.static_dir, self.cache)
+            sync_static(self.static_dir, self.dest_dir, self.cache, assets=assets)
+            generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, "/site/", self.cache, assets)
+            self.cache.prune(self.dest_dir)
+        return assets, "\n".join(logs.output)
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("index.css", "0123456789abcdef"), "index.0123456789.css")
+        self.assertEqual(fingerprinted_name("LICENSE", "0123456789abcdef"), "LICENSE.0123456789")
+
+    def test_manifest(self):
+        assets = fingerprint_assets(self.static_dir)
+        css = build_cache.hash_bytes(b"body {}")[:10]
+        self.assertEqual(assets.get("/index.css"), f"/index.{css}.css")
+        self.assertTrue(assets.get("/images/tom.png").startswith("/images/tom."))
+        self.assertIsNone(assets.get("/robots.txt"))
+
+    def test_manifest_digest_follows_content(self):
+        first = fingerprint_assets(self.static_dir)
+        self.assertEqual(first, fingerprint_assets(self.static_dir))
+        self._write(os.path.join(self.static_dir, "index.css"), "body { margin: 0; }")
+        self.assertNotEqual(first, fingerprint_assets(self.static_dir))
+
+    def test_hashes_are_cached_by_mtime(self):
+        calls = []
+        original = build_cache.hash_file
+        build_cache.hash_file = lambda path: calls.append(path) or original(path)
+        try:
+            fingerprint_assets(self.static_dir, self.cache)
+            self.assertEqual(len(calls), 2)
+            fingerprint_assets(self.static_dir, self.cache)
+            self.assertEqual(len(calls), 2)
+            css_path = os.path.join(self.static_dir, "index.css")
+            st = os.stat(css_path)
+            os.utime(css_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+            fingerprint_assets(self.static_dir, self.cache)
+            self.assertEqual(calls[2:], [css_path])
+        finally:
+            build_cache.hash_file = original
+
+    def test_template_and_content_urls_are_rewritten(self):
+        assets = AssetManifest({"/index.css": "/index.abc.css", "/images/tom.png": "/images/tom.def.png"})
+        template = Template('<link href="/index.css" /><a href="/about">{{ Title }}</a>{{ Content }}', "/site/", assets)
+        html = render_page("# Home\n\n![tom](/images/tom.png) [css](/index.css)", template)
+        self.assertIn('<link href="/site/index.abc.css" />', html)
+        self.assertIn('<a href="/site/about">', html)
+        self.assertIn('<img src="/site/images/tom.def.png" alt="tom"></img>', html)
+        self.assertIn('<a href="/site/index.abc.css">css</a>', html)
+
+    def test_build_writes_fingerprinted_files_and_manifest(self):
+        assets, _ = self._build()
+        css_url = assets.get("/index.css")
+        self.assertTrue(os.path.exists(os.path.join(self.dest_dir, css_url[1:])))
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest_dir, "robots.txt")))
+        self.assertEqual(AssetManifest.load(os.path.join(self.dest_dir, ASSET_MANIFEST_NAME)), assets)
+        page = self._read(os.path.join(self.dest_dir, "index.html"))
+        self.assertIn(f'href="/site{css_url}"', page)
+        self.assertIn(f'src="/site{assets.get("/images/tom.png")}"', page)
+
+    def test_asset_change_rebuilds_pages_and_drops_old_name(self):
+        old_assets, _ = self._build()
+        _, output = self._build()
+        self.assertNotIn("Generating page", output)
+
+        self._write(os.path.join(self.static_dir, "index.css"), "body { margin: 0; }")
+        new_assets, output = self._build()
+        self.assertIn("Generating page", output)
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, old_assets.get("/index.css")[1:])))
+        self.assertIn(new_assets.get("/index.css"), self._read(os.path.join(self.dest_dir, "index.html")))
+
+    def test_build_without_fingerprint_prunes_the_manifest(self):
+        self._build()
+        self.cache.save()
+        cache = BuildCache(os.path.join(self.test_dir, "cache.json"))
+        with self.assertLogs(level="INFO"):
+            sync_static(self.static_dir, self.dest_dir, cache)
+            generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, "/site/", cache)
+            cache.prune(self.dest_dir)
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, ASSET_MANIFEST_NAME)))
+        self.assertTrue(os.path.exists(os.path.join(self.dest_dir, "index.css")))
+
+    def test_parallel_workers_get_the_manifest(self):
+        assets, _ = self._build()
+        parallel_dir = os.path.join(self.test_dir, "parallel")
+        with self.assertLogs(level="INFO"):
+            generate_pages_parallel(self.content_dir, self.template_path, parallel_dir, "/site/", jobs=2, assets=assets)
+        self.assertEqual(
+            self._read(os.path.join(parallel_dir, "index.html")),
+            self._read(os.path.join(self.dest_dir, "index.html")),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
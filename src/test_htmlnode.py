@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -126,5 +127,56 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(node.to_html(), expected)
 
 
+class TestSlots(unittest.TestCase):
+    def test_no_instance_dict(self):
+        for node in [HTMLNode(), LeafNode("p", "text"), ParentNode("div", [])]:
+            self.assertFalse(hasattr(node, "__dict__"), msg=repr(node))
+
+    def test_leaf_has_no_children(self):
+        self.assertIsNone(LeafNode("p", "text").children)
+
+    def test_parent_has_no_value(self):
+        self.assertIsNone(ParentNode("div", []).value)
+
+
+class TestWriteHTML(unittest.TestCase):
+    def test_leaf(self):
+        out = io.StringIO()
+        LeafNode("a", "Click me", {"href": "https://www.boot.dev"}).write_html(out)
+        self.assertEqual(out.getvalue(), '<a href="https://www.boot.dev">Click me</a>')
+
+    def test_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")], {"class": "x"}),
+                ParentNode("ul", [ParentNode("li", [LeafNode("i", "item")])]),
+            ],
+        )
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_write_html_streams_parts(self):
+        writes = []
+
+        class Recorder:
+            def write(self, data):
+                writes.append(data)
+
+        ParentNode("p", [LeafNode(None, "a"), LeafNode("b", "c")]).write_html(Recorder())
+        self.assertEqual(writes, ["<p>", "a", "<b>c</b>", "</p>"])
+
+    def test_errors_raised_while_streaming(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [ParentNode(None, [])]).write_html(io.StringIO())
+
+    def test_wide_tree(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, str(i))]) for i in range(10000)])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<ul><li>0</li><li>1</li>"))
+        self.assertTrue(html.endswith("<li>9999</li></ul>"))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
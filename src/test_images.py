@@ -0,0 +1,167 @@
+import unittest
+import os
+import shutil
+import struct
+import images
+from build_cache import BuildCache
+from htmlnode import LeafNode, ParentNode
+from generate_page import rewrite_node_urls
+from images import ImageSet, build_image_set, image_size
+from shared_cache import DirectoryCache, set_shared_cache
+from static_to_public import sync_static
+
+
+def png_header(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+
+
+class TestImageSize(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "test_image_size_temp"
+        os.makedirs(self.test_dir, exist_ok=True)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _size(self, data):
+        path = os.path.join(self.test_dir, "image")
+        with open(path, 'wb') as f:
+            f.write(data)
+        return image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self._size(png_header(928, 468)), (928, 468))
+
+    def test_gif(self):
+        self.assertEqual(self._size(b"GIF89a" + struct.pack("<HH", 64, 32) + b"\0" * 8), (64, 32))
+
+    def test_jpeg(self):
+        app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\0" + b"\0" * 9
+        sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, 300, 640, 3) + b"\0" * 3
+        self.assertEqual(self._size(b"\xff\xd8" + app0 + sof), (640, 300))
+
+    def test_webp_lossless(self):
+        bits = (200 - 1) | ((100 - 1) << 14)
+        data = b"RIFF" + b"\0" * 4 + b"WEBPVP8L" + b"\0" * 4 + b"\x2f" + bits.to_bytes(4, "little")
+        self.assertEqual(self._size(data + b"\0" * 8), (200, 100))
+
+    def test_unknown(self):
+        self.assertIsNone(self._size(b"not an image at all, just some text"))
+
+    def test_repo_images(self):
+        self.assertEqual(image_size(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "static", "images", "tom.png")), (928, 468))
+
+
+class TestImageSet(unittest.TestCase):
+
+    def setUp(self):
+        self.images = ImageSet({
+            "/images/tom.png": {"width": 928, "height": 468, "srcset": [["/images/tom.400w.webp", 400]]},
+            "/images/icon.gif": {"width": 16, "height": 16, "srcset": []},
+        })
+
+    def test_attributes(self):
+        self.assertEqual(self.images.attributes("/images/tom.png"), {
+            "width": "928",
+            "height": "468",
+            "srcset": "/images/tom.400w.webp 400w, /images/tom.png 928w",
+            "sizes": images.IMAGE_SIZES,
+        })
+
+    def test_size_only(self):
+        self.assertEqual(self.images.attributes("/images/icon.gif"), {"width": "16", "height": "16"})
+        self.assertIsNone(self.images.attributes("https://example.com/a.png"))
+
+    def test_img_nodes_get_srcset_under_basepath(self):
+        node = ParentNode("p", [LeafNode("img", "", {"src": "/images/tom.png", "alt": "Tom"})])
+        html = rewrite_node_urls(node, "/site/", images=self.images).to_html()
+        self.assertEqual(
+            html,
+            '<p><img src="/site/images/tom.png" alt="Tom" width="928" height="468" '
+            'srcset="/site/images/tom.400w.webp 400w, /site/images/tom.png 928w" '
+            f'sizes="{images.IMAGE_SIZES}"></img></p>',
+        )
+
+
+class TestBuildImageSet(unittest.TestCase):
+
+    def setUp(self):
+        """Create a static tree with one large image"""
+        self.test_dir = "test_images_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.dest_dir = os.path.join(self.test_dir, "docs")
+        self.cache_dir = os.path.join(self.test_dir, "image_cache")
+        self.manifest_path = os.path.join(self.test_dir, "cache.json")
+        os.makedirs(os.path.join(self.static_dir, "images"))
+        self.source = os.path.join(self.static_dir, "images", "big.png")
+
+    def tearDown(self):
+        """Clean up the test tree after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _build(self):
+        """Sync static files and build the image set, returning (set, log)"""
+        cache = BuildCache(self.manifest_path)
+        with self.assertLogs(level="INFO") as logs:
+            sync_static(self.static_dir, self.dest_dir, cache)
+            image_set = build_image_set(self.static_dir, self.dest_dir, cache, self.cache_dir, widths=(100, 200, 400), jobs=2)
+            cache.prune(self.dest_dir)
+        cache.save()
+        return image_set, "\n".join(logs.output)
+
+    def test_without_pillow_images_are_only_sized(self):
+        with open(self.source, 'wb') as f:
+            f.write(png_header(300, 150))
+        original = images.Image
+        images.Image = None
+        try:
+            image_set, output = self._build()
+        finally:
+            images.Image = original
+        self.assertIn("no variants", output)
+        self.assertEqual(image_set.attributes("/images/big.png"), {"width": "300", "height": "150"})
+
+    @unittest.skipUnless(images.can_resize(), "Pillow with WebP support is not installed")
+    def test_variants_are_built_cached_and_pruned(self):
+        images.Image.new("RGB", (300, 150), (200, 30, 30)).save(self.source)
+        image_set, output = self._build()
+        self.assertEqual(output.count("Resized"), 2)
+        srcset = image_set.attributes("/images/big.png")["srcset"]
+        self.assertEqual(srcset, "/images/big.100w.webp 100w, /images/big.200w.webp 200w, /images/big.png 300w")
+        variant = os.path.join(self.dest_dir, "images", "big.100w.webp")
+        with images.Image.open(variant) as resized:
+            self.assertEqual(resized.size, (100, 50))
+
+        # Unchanged source: nothing is resized and the variants stay put.
+        _, output = self._build()
+        self.assertNotIn("Resized", output)
+        self.assertTrue(os.path.exists(variant))
+
+        os.remove(self.source)
+        self._build()
+        self.assertFalse(os.path.exists(variant))
+
+    @unittest.skipUnless(images.can_resize(), "Pillow with WebP support is not installed")
+    def test_variants_come_from_the_shared_cache(self):
+        """A build with an empty local cache fetches what another one resized"""
+        images.Image.new("RGB", (300, 150), (200, 30, 30)).save(self.source)
+        set_shared_cache(DirectoryCache(os.path.join(self.test_dir, "shared")))
+        try:
+            _, output = self._build()
+            self.assertEqual(output.count("Resized"), 2)
+            shutil.rmtree(self.cache_dir)
+            _, output = self._build()
+        finally:
+            set_shared_cache(None)
+        self.assertNotIn("Resized", output)
+        self.assertEqual(output.count("from the shared cache"), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.dest_dir, "images", "big.200w.webp")))
+
+
+if __name__ == '__main__':
+    unittest.main()
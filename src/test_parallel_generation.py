@@ -0,0 +1,110 @@
+import unittest
+import os
+import shutil
+from build_cache import BuildCache
+from generate_page import collect_pages, generate_pages_parallel, generate_pages_recursive
+
+
+class TestGeneratePagesParallel(unittest.TestCase):
+
+    def setUp(self):
+        """Create a content tree and a template before each test"""
+        self.test_dir = "test_parallel_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+
+        self.sources = {
+            "index.md": "# Home\n\nWelcome [home](/).",
+            "about.md": "# About\n\n- one\n- two",
+            os.path.join("blog", "first.md"): "# First\n\n>A quote",
+            os.path.join("blog", "second.md"): "# Second\n\n![img](/images/a.png)",
+            os.path.join("blog", "deep", "third.md"): "# Third\n\n```\ncode\n```",
+        }
+        for relpath, content in self.sources.items():
+            self._write(os.path.join(self.content_dir, relpath), content)
+        self._write(os.path.join(self.content_dir, "notes.txt"), "not markdown")
+        self._write(self.template_path, '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        """Clean up after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _read_tree(self, root):
+        """Return {relative path: content} for every file under root"""
+        tree = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'r') as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def test_collect_pages_is_sorted_and_skips_non_markdown(self):
+        pages = collect_pages(self.content_dir, "out")
+        self.assertEqual(len(pages), len(self.sources))
+        self.assertEqual(pages, sorted(pages))
+        self.assertIn(
+            (os.path.join(self.content_dir, "blog", "first.md"), os.path.join("out", "blog", "first.html")),
+            pages,
+        )
+
+    def test_matches_sequential_output(self):
+        sequential_dir = os.path.join(self.test_dir, "sequential")
+        parallel_dir = os.path.join(self.test_dir, "parallel")
+        generate_pages_recursive(self.content_dir, self.template_path, sequential_dir, "/site/")
+        generate_pages_parallel(self.content_dir, self.template_path, parallel_dir, "/site/", jobs=3, chunk_size=2)
+
+        self.assertEqual(self._read_tree(sequential_dir), self._read_tree(parallel_dir))
+
+    def test_log_order_is_deterministic(self):
+        dest_dir = os.path.join(self.test_dir, "docs")
+        with self.assertLogs(level="INFO") as logs:
+            generate_pages_parallel(self.content_dir, self.template_path, dest_dir, jobs=4, chunk_size=1)
+        generated = [line for line in logs.output if "Generating page" in line]
+        expected = [
+            f"INFO:root:Generating page from {from_path} to {dest_path} using {self.template_path}"
+            for from_path, dest_path in collect_pages(self.content_dir, dest_dir)
+        ]
+        self.assertEqual(generated, expected)
+
+    def test_failure_names_source_path(self):
+        broken = os.path.join(self.content_dir, "blog", "broken.md")
+        self._write(broken, "no title here")
+        dest_dir = os.path.join(self.test_dir, "docs")
+
+        with self.assertLogs(level="INFO"):
+            with self.assertRaises(RuntimeError) as ctx:
+                generate_pages_parallel(self.content_dir, self.template_path, dest_dir, jobs=2)
+        self.assertIn(broken, str(ctx.exception))
+        # The other pages were still rendered.
+        self.assertTrue(os.path.exists(os.path.join(dest_dir, "index.html")))
+
+    def test_uses_build_cache(self):
+        dest_dir = os.path.join(self.test_dir, "docs")
+        manifest_path = os.path.join(self.test_dir, "cache.json")
+
+        cache = BuildCache(manifest_path)
+        generate_pages_parallel(self.content_dir, self.template_path, dest_dir, cache=cache, jobs=2)
+        cache.save()
+
+        self._write(os.path.join(self.content_dir, "about.md"), "# About\n\nChanged.")
+        cache = BuildCache(manifest_path)
+        with self.assertLogs(level="INFO") as logs:
+            generate_pages_parallel(self.content_dir, self.template_path, dest_dir, cache=cache, jobs=2)
+        generated = [line for line in logs.output if "Generating page" in line]
+        self.assertEqual(len(generated), 1)
+        self.assertIn("about.md", generated[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import gzip
+import os
+import shutil
+import precompress
+from build_cache import BuildCache
+from precompress import precompress_tree
+
+PAGE = "<html><body>" + "<p>Some repeated text.</p>" * 50 + "</body></html>"
+
+
+class TestPrecompress(unittest.TestCase):
+
+    def setUp(self):
+        """Create an output tree with pages, CSS and an image"""
+        self.test_dir = "test_precompress_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.page = os.path.join(self.test_dir, "blog", "index.html")
+        self.css = os.path.join(self.test_dir, "index.css")
+        self.png = os.path.join(self.test_dir, "images", "tom.png")
+        self._write(self.page, PAGE)
+        self._write(self.css, "body { margin: 0; }\n" * 30)
+        self._write(self.png, "not really a png " * 30)
+        self._write(os.path.join(self.test_dir, "tiny.html"), "<p>hi</p>")
+
+    def tearDown(self):
+        """Clean up the output tree after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _precompress(self):
+        """Run precompress_tree with gzip only and return the log lines"""
+        with self.assertLogs(level="INFO") as logs:
+            precompress_tree(self.test_dir, jobs=2, suffixes=[".gz"])
+        return "\n".join(logs.output)
+
+    def test_writes_gzip_siblings(self):
+        self._precompress()
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), PAGE)
+        self.assertTrue(os.path.exists(self.css + ".gz"))
+
+    def test_skips_images_and_tiny_files(self):
+        self._precompress()
+        self.assertFalse(os.path.exists(self.png + ".gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "tiny.html.gz")))
+
+    def test_output_is_reproducible(self):
+        self._precompress()
+        with open(self.page + ".gz", "rb") as f:
+            first = f.read()
+        os.remove(self.page + ".gz")
+        self._precompress()
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_newer_siblings_are_skipped(self):
+        self._precompress()
+        with self.assertNoLogs(level="INFO"):
+            self.assertEqual(precompress_tree(self.test_dir, suffixes=[".gz"]), 0)
+
+        st = os.stat(self.page + ".gz")
+        os.utime(self.page, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        output = self._precompress()
+        self.assertIn(f"Compressed {self.page}", output)
+        self.assertNotIn(f"Compressed {self.css}", output)
+
+    def test_stale_siblings_are_removed(self):
+        self._precompress()
+        os.remove(self.page)
+        self._precompress()
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_static_compressed_files_are_kept(self):
+        cache = BuildCache(os.path.join(self.test_dir, "cache.json"))
+        shipped = os.path.join(self.test_dir, "data.json.gz")
+        self._write(shipped, "already compressed")
+        source = os.path.join(self.test_dir + "_static", "data.json.gz")
+        self.addCleanup(shutil.rmtree, os.path.dirname(source))
+        self._write(source, "already compressed")
+        cache.record_static(source, shipped)
+        with self.assertLogs(level="INFO") as logs:
+            precompress_tree(self.test_dir, jobs=1, suffixes=[".gz"], cache=cache)
+        self.assertNotIn("Removed stale compressed file", "\n".join(logs.output))
+        with open(shipped) as f:
+            self.assertEqual(f.read(), "already compressed")
+
+    def test_gzip_is_always_available(self):
+        self.assertIn(".gz", precompress.available_encoders())
+
+    @unittest.skipIf(precompress.brotli is None, "brotli is not installed")
+    def test_brotli(self):
+        with self.assertLogs(level="INFO"):
+            precompress_tree(self.test_dir, jobs=1, suffixes=[".br"])
+        with open(self.page + ".br", "rb") as f:
+            self.assertEqual(precompress.brotli.decompress(f.read()).decode(), PAGE)
+
+    @unittest.skipIf(precompress.zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        with self.assertLogs(level="INFO"):
+            precompress_tree(self.test_dir, jobs=1, suffixes=[".zst"])
+        with open(self.page + ".zst", "rb") as f:
+            self.assertEqual(precompress.zstandard.ZstdDecompressor().decompress(f.read()).decode(), PAGE)
+
+
+if __name__ == '__main__':
+    unittest.main()
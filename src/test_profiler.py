@@ -0,0 +1,121 @@
+import unittest
+import json
+import os
+import shutil
+from generate_page import generate_pages_parallel, generate_pages_recursive
+from profiler import NullProfiler, Profiler, get_profiler, set_profiler
+
+# Under the default basepath there is nothing to rewrite, so pages take the
+# direct renderer: no separate inline parse and serialize stages.
+PAGE_STAGES = {"read", "block split", "render blocks", "template", "write"}
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_stage_totals(self):
+        profiler = Profiler()
+        for _ in range(3):
+            with profiler.stage("parse"):
+                [str(i) for i in range(1000)]
+        totals = profiler.stage_totals()
+        self.assertEqual(list(totals), ["parse"])
+        self.assertEqual(totals["parse"]["count"], 3)
+        self.assertGreater(totals["parse"]["wall"], 0)
+        self.assertGreaterEqual(totals["parse"]["cpu"], 0)
+
+    def test_stages_inside_a_page_are_attributed_to_it(self):
+        profiler = Profiler()
+        with profiler.page("a.md"):
+            with profiler.stage("read"):
+                pass
+        with profiler.stage("copy"):
+            pass
+        pages = {span.name: span.page for span in profiler.spans}
+        self.assertEqual(pages, {"read": "a.md", "a.md": "a.md", "copy": None})
+
+    def test_slowest_pages(self):
+        profiler = Profiler()
+        for path, size in (("small.md", 10), ("big.md", 200000), ("medium.md", 20000)):
+            with profiler.page(path):
+                sum(range(size))
+        self.assertEqual([span.name for span in profiler.slowest_pages(2)], ["big.md", "medium.md"])
+
+    def test_drain_and_merge(self):
+        worker = Profiler()
+        with worker.stage("read"):
+            pass
+        parent = Profiler()
+        parent.merge(worker.drain())
+        self.assertEqual(worker.spans, [])
+        self.assertEqual([span.name for span in parent.spans], ["read"])
+
+    def test_null_profiler(self):
+        profiler = NullProfiler()
+        with profiler.page("a.md"):
+            with profiler.stage("read"):
+                pass
+        self.assertIsNone(profiler.drain())
+        self.assertFalse(get_profiler().enabled)
+
+
+class TestProfiledBuild(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small site and turn profiling on"""
+        self.test_dir = "test_profiler_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.dest_dir = os.path.join(self.test_dir, "docs")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nSome **bold** text.\n\n- a\n- b")
+        self._write(os.path.join(self.content_dir, "blog", "post.md"), "# Post\n\n> quoted")
+        self._write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+        self.profiler = Profiler()
+        set_profiler(self.profiler)
+
+    def tearDown(self):
+        """Turn profiling off and clean up"""
+        set_profiler(None)
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _assert_profiled(self):
+        self.assertEqual(set(self.profiler.stage_totals()), PAGE_STAGES)
+        pages = sorted(span.name for span in self.profiler.spans if span.category == "page")
+        self.assertEqual(pages, [os.path.join(self.content_dir, "blog", "post.md"), os.path.join(self.content_dir, "index.md")])
+
+    def test_recursive_build(self):
+        with self.assertLogs(level="INFO"):
+            generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir)
+        self._assert_profiled()
+
+    def test_parallel_build_merges_worker_spans(self):
+        with self.assertLogs(level="INFO"):
+            generate_pages_parallel(self.content_dir, self.template_path, self.dest_dir, jobs=2)
+        self._assert_profiled()
+        self.assertNotIn(os.getpid(), {span.pid for span in self.profiler.spans})
+
+    def test_write_chrome_trace(self):
+        with self.assertLogs(level="INFO"):
+            generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir)
+        trace_path = os.path.join(self.test_dir, "profile.json")
+        self.profiler.write(trace_path)
+        with open(trace_path, 'r') as f:
+            trace = json.load(f)
+        self.assertEqual(len(trace["traceEvents"]), len(self.profiler.spans))
+        event = trace["traceEvents"][0]
+        self.assertEqual(event["ph"], "X")
+        self.assertIn("cpu_ms", event["args"])
+        self.assertEqual(set(trace["summary"]["stages"]), PAGE_STAGES)
+        self.assertEqual(len(trace["summary"]["slowest_pages"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
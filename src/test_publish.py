@@ -0,0 +1,184 @@
+import unittest
+import os
+import shutil
+from build_cache import BuildCache
+from generate_page import generate_pages_recursive, write_page
+from publish import Publisher, atomic_open, clone_tree
+from static_to_public import sync_static
+
+
+class TestAtomicOpen(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "test_atomic_open_temp"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.path = os.path.join(self.test_dir, "page.html")
+        with open(self.path, 'w') as f:
+            f.write("old")
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_replaces_file(self):
+        with atomic_open(self.path) as f:
+            f.write("new")
+        with open(self.path, 'r') as f:
+            self.assertEqual(f.read(), "new")
+        self.assertEqual(os.listdir(self.test_dir), ["page.html"])
+
+    def test_failure_keeps_old_file(self):
+        """A build that dies mid-write must not leave a torn file behind"""
+        with self.assertRaises(RuntimeError):
+            with atomic_open(self.path) as f:
+                f.write("half")
+                raise RuntimeError("boom")
+        with open(self.path, 'r') as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(self.test_dir), ["page.html"])
+
+    def test_overlapping_writers(self):
+        """Two writers of one path (e.g. pool workers) both succeed"""
+        with atomic_open(self.path) as first:
+            with atomic_open(self.path) as second:
+                second.write("second")
+            first.write("first")
+        with open(self.path, 'r') as f:
+            self.assertEqual(f.read(), "first")
+        self.assertEqual(os.listdir(self.test_dir), ["page.html"])
+
+    def test_file_mode_follows_umask(self):
+        with atomic_open(self.path) as f:
+            f.write("new")
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o666 & ~umask)
+
+    def test_does_not_write_through_hardlinks(self):
+        other = os.path.join(self.test_dir, "other.html")
+        os.link(self.path, other)
+        write_page(self.path, "new")
+        with open(other, 'r') as f:
+            self.assertEqual(f.read(), "old")
+
+
+class TestPublisher(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small site and a publisher for its output"""
+        self.test_dir = "test_publish_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.output = os.path.join(self.test_dir, "docs")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        self.manifest_path = os.path.join(self.test_dir, "cache.json")
+
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nVersion one.")
+        self._write(os.path.join(self.static_dir, "index.css"), "body {}")
+        self._write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+        self.publisher = Publisher(self.output, keep=2, manifest_path=self.manifest_path)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def _build(self, publish=True):
+        """Stage, build and publish the way main() does with --atomic"""
+        with self.assertLogs(level="INFO") as logs:
+            staging = self.publisher.stage()
+            cache = BuildCache(self.manifest_path)
+            sync_static(self.static_dir, staging, cache)
+            generate_pages_recursive(self.content_dir, self.template_path, staging, "/", cache)
+            cache.prune(staging)
+            cache.save()
+            if publish:
+                self.publisher.publish()
+        return "\n".join(logs.output)
+
+    def test_publish_swaps_symlink(self):
+        self._build()
+        self.assertTrue(os.path.islink(self.output))
+        self.assertIn("Version one.", self._read(os.path.join(self.output, "index.html")))
+        self.assertFalse(os.path.exists(self.publisher.staging_path))
+        self.assertEqual(self.publisher.generations(), ["000001"])
+
+    def test_staging_does_not_touch_live_site(self):
+        self._build()
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nVersion two.")
+        self._build(publish=False)
+        self.assertIn("Version one.", self._read(os.path.join(self.output, "index.html")))
+        self._build()
+        self.assertIn("Version two.", self._read(os.path.join(self.output, "index.html")))
+
+    def test_unchanged_files_are_hardlinked_and_skipped(self):
+        self._build()
+        output = self._build()
+        self.assertNotIn("Generating page", output)
+        self.assertNotIn("Copied file", output)
+        old, new = (os.path.join(self.publisher.generations_path, name, "index.html") for name in ("000001", "000002"))
+        self.assertEqual(os.stat(old).st_ino, os.stat(new).st_ino)
+
+    def test_keeps_last_generations(self):
+        for _ in range(4):
+            self._build()
+        self.assertEqual(self.publisher.generations(), ["000003", "000004"])
+        self.assertFalse(os.path.exists(os.path.join(self.publisher.generations_path, "000001.json")))
+
+    def test_rollback(self):
+        self._build()
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nVersion two.")
+        self._build()
+        with self.assertLogs(level="INFO"):
+            self.assertEqual(self.publisher.rollback(), "000001")
+        self.assertIn("Version one.", self._read(os.path.join(self.output, "index.html")))
+        with self.assertRaises(ValueError):
+            self.publisher.rollback()
+
+    def test_rollback_restores_the_build_cache(self):
+        """After a rollback the next build must not trust the newer cache"""
+        self._build()
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nVersion two.")
+        self._build()
+        with self.assertLogs(level="INFO"):
+            self.publisher.rollback()
+        output = self._build()
+        self.assertIn("Generating page", output)
+        self.assertIn("Version two.", self._read(os.path.join(self.output, "index.html")))
+
+    def test_first_publish_keeps_plain_directory(self):
+        self._write(os.path.join(self.output, "old.html"), "old site")
+        self._build()
+        self.assertEqual(self.publisher.generations(), ["000001", "000002"])
+        self.assertTrue(os.path.exists(os.path.join(self.publisher.generations_path, "000001", "old.html")))
+
+    def test_failed_build_is_discarded(self):
+        self._build()
+        self._build(publish=False)
+        self._write(os.path.join(self.publisher.staging_path, "junk.html"), "junk")
+        self._build()
+        self.assertFalse(os.path.exists(os.path.join(self.output, "junk.html")))
+
+    def test_clone_tree(self):
+        self._build()
+        clone = os.path.join(self.test_dir, "clone")
+        clone_tree(self.output, clone)
+        self.assertEqual(
+            os.stat(os.path.join(clone, "index.css")).st_ino,
+            os.stat(os.path.join(self.output, "index.css")).st_ino,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
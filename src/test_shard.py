@@ -0,0 +1,250 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import shard
+from build_cache import BuildCache
+from generate_page import collect_pages, generate_pages_parallel, generate_pages_recursive, template_key
+from shard import (
+    generate_pages_coordinated,
+    merge_shards,
+    parse_shard,
+    shard_cache_path,
+    shard_dir,
+    shard_of,
+    shard_pages,
+    write_shard_manifest,
+)
+
+
+class TestPartitioning(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("0/1"), (0, 1))
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        for text in ("3/3", "-1/2", "1/0", "1", "a/b", "1/2/3"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_stable_hash(self):
+        """The same path lands in the same shard on every machine"""
+        self.assertEqual(shard_of("index.md", 1000), 143)
+        self.assertEqual(shard_of(os.path.join("blog", "post.md"), 7), shard_of("blog/post.md", 7))
+
+    def test_every_page_in_exactly_one_shard(self):
+        paths = [f"section{i % 7}/page{i}.md" for i in range(200)]
+        counts = [0] * 4
+        for path in paths:
+            counts[shard_of(path, 4)] += 1
+        self.assertEqual(sum(counts), len(paths))
+        self.assertTrue(all(count > 20 for count in counts))
+
+
+class ShardTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Create a content tree and a template before each test"""
+        self.test_dir = "test_shard_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        self.shard_root = os.path.join(self.test_dir, "shards")
+
+        for i in range(12):
+            self._write(os.path.join(self.content_dir, f"section{i % 3}", f"page{i}.md"), f"# Page {i}\n\nText [link](/x/{i}).")
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\n- one\n- two")
+        self._write(self.template_path, '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        """Clean up after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _read_tree(self, root):
+        """Return {relative path: content} for every file under root"""
+        tree = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'r') as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def _build_shard(self, index, count, basepath="/site/"):
+        """What main.py does for --shard index/count"""
+        output = shard_dir(index, count, self.shard_root)
+        cache = BuildCache(shard_cache_path(index, count, self.shard_root))
+        pages = shard_pages(self.content_dir, output, index, count)
+        generate_pages_parallel(self.content_dir, self.template_path, output, basepath, cache, jobs=2, pages=pages)
+        cache.prune(output)
+        write_shard_manifest(output, cache, index, count, basepath)
+        cache.save()
+        return output
+
+
+class TestShardMerge(ShardTestCase):
+    def test_merged_shards_match_full_build(self):
+        full_dir = os.path.join(self.test_dir, "full")
+        merged_dir = os.path.join(self.test_dir, "docs")
+        with self.assertLogs(level="INFO"):
+            generate_pages_recursive(self.content_dir, self.template_path, full_dir, "/site/")
+            for index in range(3):
+                self._build_shard(index, 3)
+            cache = BuildCache(os.path.join(self.test_dir, "cache.json"))
+            merge_shards(3, merged_dir, cache, "/site/", self.content_dir, self.shard_root)
+
+        self.assertEqual(self._read_tree(merged_dir), self._read_tree(full_dir))
+        self.assertEqual(len(cache.pages), len(collect_pages(self.content_dir, merged_dir)))
+
+    def test_shards_dont_overlap(self):
+        with self.assertLogs(level="INFO"):
+            trees = [set(self._read_tree(self._build_shard(index, 3))) - {shard.SHARD_MANIFEST_NAME} for index in range(3)]
+        self.assertEqual(trees[0] & trees[1], set())
+        self.assertEqual(trees[1] & trees[2], set())
+        self.assertEqual(len(trees[0] | trees[1] | trees[2]), 13)
+
+    def test_rejects_missing_shard(self):
+        with self.assertLogs(level="INFO"):
+            self._build_shard(0, 2)
+        with self.assertRaises(ValueError) as context:
+            merge_shards(2, os.path.join(self.test_dir, "docs"), None, "/site/", self.content_dir, self.shard_root)
+        self.assertIn("shard 1/2", str(context.exception))
+        self.assertIn("not built by any shard", str(context.exception))
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "docs")))
+
+    def test_rejects_changed_output_and_basepath(self):
+        with self.assertLogs(level="INFO"):
+            output = self._build_shard(0, 1)
+        with open(os.path.join(output, "index.html"), "a") as f:
+            f.write("tampered")
+        with self.assertRaises(ValueError) as context:
+            merge_shards(1, os.path.join(self.test_dir, "docs"), None, "/other/", root=self.shard_root)
+        self.assertIn("index.html: missing or changed", str(context.exception))
+        self.assertIn("basepath /site/", str(context.exception))
+
+    def test_rejects_shards_built_with_another_template(self):
+        with self.assertLogs(level="INFO"):
+            self._build_shard(0, 1)
+        cache = BuildCache(os.path.join(self.test_dir, "cache.json"))
+        built_with = template_key(cache, self.template_path)
+        self._write(self.template_path, "<h1>{{ Title }}</h1>{{ Content }}")
+        cache = BuildCache(os.path.join(self.test_dir, "cache.json"))
+        with self.assertRaises(ValueError) as context:
+            merge_shards(1, os.path.join(self.test_dir, "docs"), cache, "/site/", root=self.shard_root,
+                         template_hash=template_key(cache, self.template_path))
+        self.assertIn("different template or assets than this build", str(context.exception))
+        with self.assertLogs(level="INFO"):
+            merge_shards(1, os.path.join(self.test_dir, "docs"), cache, "/site/", root=self.shard_root, template_hash=built_with)
+
+
+def claim(marker):
+    """True for the one process that creates marker first"""
+    try:
+        os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+class TestCoordinator(ShardTestCase):
+    def test_matches_sequential_output(self):
+        sequential_dir = os.path.join(self.test_dir, "sequential")
+        coordinated_dir = os.path.join(self.test_dir, "coordinated")
+        with self.assertLogs(level="INFO"):
+            generate_pages_recursive(self.content_dir, self.template_path, sequential_dir, "/site/")
+            generate_pages_coordinated(self.content_dir, self.template_path, coordinated_dir, "/site/", workers=3, batch_size=2)
+
+        self.assertEqual(self._read_tree(sequential_dir), self._read_tree(coordinated_dir))
+
+    def test_log_order_and_cache(self):
+        dest_dir = os.path.join(self.test_dir, "docs")
+        cache = BuildCache(os.path.join(self.test_dir, "cache.json"))
+        with self.assertLogs(level="INFO") as logs:
+            generate_pages_coordinated(self.content_dir, self.template_path, dest_dir, cache=cache, workers=2, batch_size=3)
+        generated = [line for line in logs.output if "Generating page" in line]
+        expected = [
+            f"INFO:root:Generating page from {from_path} to {dest_path} using {self.template_path}"
+            for from_path, dest_path in collect_pages(self.content_dir, dest_dir)
+        ]
+        self.assertEqual(generated, expected)
+        self.assertEqual(len(cache.pages), len(expected))
+
+    def test_requeues_batches_of_dead_workers(self):
+        """A worker that exits mid-build loses no pages"""
+        real_task = shard._generate_page_task
+        marker = os.path.join(self.test_dir, "crashed")
+
+        def crash_once(task):
+            if task[0].endswith("page5.md") and not os.path.exists(marker):
+                open(marker, "w").close()
+                os._exit(1)
+            return real_task(task)
+
+        sequential_dir = os.path.join(self.test_dir, "sequential")
+        dest_dir = os.path.join(self.test_dir, "docs")
+        with mock.patch.object(shard, "_generate_page_task", crash_once), self.assertLogs(level="INFO") as logs:
+            generate_pages_recursive(self.content_dir, self.template_path, sequential_dir)
+            generate_pages_coordinated(self.content_dir, self.template_path, dest_dir, workers=2, batch_size=2)
+        self.assertTrue(any("requeueing 2 page(s)" in line for line in logs.output))
+        self.assertEqual(self._read_tree(dest_dir), self._read_tree(sequential_dir))
+
+    def test_worker_dead_before_connecting(self):
+        real_init = shard._init_worker
+        marker = os.path.join(self.test_dir, "crashed")
+
+        def crash_once(*initargs):
+            if claim(marker):
+                os._exit(1)
+            real_init(*initargs)
+
+        dest_dir = os.path.join(self.test_dir, "docs")
+        with mock.patch.object(shard, "_init_worker", crash_once), self.assertLogs(level="INFO") as logs:
+            generate_pages_coordinated(self.content_dir, self.template_path, dest_dir, workers=2, batch_size=2)
+        self.assertTrue(any("exited before connecting" in line for line in logs.output))
+        self.assertEqual(len(self._read_tree(dest_dir)), 13)
+
+    def test_worker_dead_while_idle(self):
+        """Sending to a worker that is already gone requeues the batch"""
+        real_worker = shard.run_worker
+        marker = os.path.join(self.test_dir, "crashed")
+
+        def exit_once(address, authkey, initargs):
+            if not claim(marker):
+                return real_worker(address, authkey, initargs)
+            with shard.Client(address, "AF_UNIX", authkey=authkey) as connection:
+                connection.send(os.getpid())
+            os._exit(1)
+
+        dest_dir = os.path.join(self.test_dir, "docs")
+        with mock.patch.object(shard, "run_worker", exit_once), self.assertLogs(level="INFO") as logs:
+            generate_pages_coordinated(self.content_dir, self.template_path, dest_dir, workers=2, batch_size=2)
+        self.assertTrue(any("requeueing" in line for line in logs.output))
+        self.assertEqual(len(self._read_tree(dest_dir)), 13)
+
+    def test_all_workers_dead(self):
+        def crash(task):
+            os._exit(1)
+
+        with mock.patch.object(shard, "_generate_page_task", crash), self.assertLogs(level="INFO"):
+            with self.assertRaises(RuntimeError) as context:
+                generate_pages_coordinated(self.content_dir, self.template_path, os.path.join(self.test_dir, "docs"), workers=2)
+        self.assertIn("every page worker exited", str(context.exception))
+
+    def test_failure_names_source_path(self):
+        self._write(os.path.join(self.content_dir, "broken.md"), "no title here")
+        with self.assertLogs(level="INFO"):
+            with self.assertRaises(RuntimeError) as context:
+                generate_pages_coordinated(self.content_dir, self.template_path, os.path.join(self.test_dir, "docs"), workers=2)
+        self.assertIn("broken.md", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import os
+import shutil
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import generate_page
+from generate_page import generate_page as build_one_page, generate_pages_parallel
+from shared_cache import DirectoryCache, HttpCache, open_shared_cache, page_key, set_shared_cache
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # The GET/PUT protocol of an HTTP build cache, kept in a dict.
+    def do_GET(self):
+        data = self.server.blobs.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self):
+        self.server.blobs[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.blobs = {}
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/cache"
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestKeys(unittest.TestCase):
+    def test_page_key_covers_every_input(self):
+        key = page_key("source", "template", "/")
+        self.assertEqual(key, page_key("source", "template", "/"))
+        self.assertNotEqual(key, page_key("other", "template", "/"))
+        self.assertNotEqual(key, page_key("source", "other", "/"))
+        self.assertNotEqual(key, page_key("source", "template", "/site/"))
+        with mock.patch("shared_cache.RENDERER_VERSION", 2):
+            self.assertNotEqual(key, page_key("source", "template", "/"))
+
+    def test_open_shared_cache(self):
+        self.assertIsInstance(open_shared_cache("/mnt/cache"), DirectoryCache)
+        self.assertIsInstance(open_shared_cache("http://cache:8080/site"), HttpCache)
+
+
+class TestBackends(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = "test_shared_cache_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _round_trip(self, cache):
+        self.assertIsNone(cache.get("ab" * 32))
+        cache.put("ab" * 32, b"<p>hello</p>")
+        self.assertEqual(cache.get("ab" * 32), b"<p>hello</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_directory(self):
+        self._round_trip(DirectoryCache(self.test_dir))
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, "ab", "ab" * 32)))
+
+    def test_directory_concurrent_writers(self):
+        """Builds writing the same key never let a reader see half a blob."""
+        cache = DirectoryCache(self.test_dir)
+        blob = b"<p>page</p>" * 100_000
+        start = threading.Barrier(8)
+        seen = []
+
+        def writer():
+            start.wait()
+            for _ in range(5):
+                cache.put("ef" * 32, blob)
+
+        def reader():
+            start.wait()
+            for _ in range(50):
+                seen.append(cache.get("ef" * 32))
+
+        threads = [threading.Thread(target=writer) for _ in range(4)] + [threading.Thread(target=reader) for _ in range(4)]
+        with self.assertNoLogs(level="WARNING"):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertTrue(all(data is None or data == blob for data in seen))
+        self.assertEqual(cache.get("ef" * 32), blob)
+        self.assertEqual(os.listdir(os.path.join(self.test_dir, "ef")), ["ef" * 32])
+
+    def test_http(self):
+        with StandInServer() as server:
+            self._round_trip(HttpCache(server.url + "/"))
+            self.assertIn("/cache/" + "ab" * 32, server.server.blobs)
+
+    def test_unreachable_server_is_a_miss(self):
+        with StandInServer() as server:
+            url = server.url
+        cache = HttpCache(url, timeout=1)
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(cache.get("cd" * 32))
+            cache.put("cd" * 32, b"data")
+        self.assertEqual(cache.misses, 1)
+
+
+class TestSharedPages(unittest.TestCase):
+    def setUp(self):
+        """Create a content tree and a template before each test"""
+        self.test_dir = "test_shared_pages_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nA [link](/about).")
+        self._write(os.path.join(self.content_dir, "blog", "post.md"), "# Post\n\n- one\n- two")
+        self._write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        """Clean up after each test"""
+        set_shared_cache(None)
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def test_second_machine_fetches_instead_of_rendering(self):
+        with StandInServer() as server:
+            first = os.path.join(self.test_dir, "first", "index.html")
+            second = os.path.join(self.test_dir, "second", "index.html")
+            set_shared_cache(HttpCache(server.url))
+            with self.assertLogs(level="INFO"):
+                build_one_page(os.path.join(self.content_dir, "index.md"), self.template_path, first, "/site/")
+            self.assertEqual(len(server.server.blobs), 1)
+
+            cache = HttpCache(server.url)
+            set_shared_cache(cache)
+            with mock.patch.object(generate_page, "render_page") as render_page, self.assertLogs(level="INFO"):
+                build_one_page(os.path.join(self.content_dir, "index.md"), self.template_path, second, "/site/")
+            render_page.assert_not_called()
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(self._read(second), self._read(first))
+
+    def test_other_basepath_renders_again(self):
+        cache = DirectoryCache(os.path.join(self.test_dir, "shared"))
+        set_shared_cache(cache)
+        with self.assertLogs(level="INFO"):
+            build_one_page(os.path.join(self.content_dir, "index.md"), self.template_path, os.path.join(self.test_dir, "a.html"))
+            build_one_page(os.path.join(self.content_dir, "index.md"), self.template_path, os.path.join(self.test_dir, "b.html"), "/site/")
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        self.assertIn('href="/site/about"', self._read(os.path.join(self.test_dir, "b.html")))
+
+    def test_parallel_workers_share_the_cache(self):
+        shared_dir = os.path.join(self.test_dir, "shared")
+        set_shared_cache(DirectoryCache(shared_dir))
+        with self.assertLogs(level="INFO"):
+            generate_pages_parallel(self.content_dir, self.template_path, os.path.join(self.test_dir, "first"), jobs=2)
+        blobs = sum(len(files) for _, _, files in os.walk(shared_dir))
+        self.assertEqual(blobs, 2)
+
+        cache = DirectoryCache(shared_dir)
+        set_shared_cache(cache)
+        with self.assertLogs(level="INFO"):
+            build_one_page(os.path.join(self.content_dir, "blog", "post.md"), self.template_path, os.path.join(self.test_dir, "post.html"))
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import os
+import shutil
+from build_cache import BuildCache
+from static_to_public import sync_static
+
+
+class TestSyncStatic(unittest.TestCase):
+
+    def setUp(self):
+        """Create a static tree and an output dir before each test"""
+        self.test_dir = "test_static_sync_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.static_path = os.path.join(self.test_dir, "static")
+        self.public_path = os.path.join(self.test_dir, "public")
+        self.cache = BuildCache(os.path.join(self.test_dir, "cache.json"))
+
+        self._write(os.path.join(self.static_path, "index.css"), "body {}")
+        self._write(os.path.join(self.static_path, "images", "a.png"), "png bytes")
+
+    def tearDown(self):
+        """Clean up the test directories after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _sync(self, **kwargs):
+        """Run sync_static quietly and return its stats"""
+        with self.assertLogs(level="INFO"):
+            return sync_static(self.static_path, self.public_path, self.cache, **kwargs)
+
+    def _touch(self, path, seconds=1):
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10**9))
+
+    def test_first_sync_copies_everything(self):
+        stats = self._sync()
+        self.assertEqual(stats.copied_files, 2)
+        self.assertEqual(stats.copied_bytes, len("body {}") + len("png bytes"))
+        self.assertEqual(stats.skipped_files, 0)
+        with open(os.path.join(self.public_path, "images", "a.png"), 'r') as f:
+            self.assertEqual(f.read(), "png bytes")
+
+    def test_second_sync_skips_everything(self):
+        self._sync()
+        stats = self._sync()
+        self.assertEqual(stats.copied_files, 0)
+        self.assertEqual(stats.skipped_files, 2)
+        self.assertEqual(stats.skipped_bytes, len("body {}") + len("png bytes"))
+
+    def test_preserves_mtime(self):
+        source = os.path.join(self.static_path, "index.css")
+        self._touch(source, -3600)
+        self._sync()
+        dest = os.path.join(self.public_path, "index.css")
+        self.assertEqual(os.stat(dest).st_mtime_ns, os.stat(source).st_mtime_ns)
+
+    def test_changed_file_is_copied(self):
+        self._sync()
+        self._write(os.path.join(self.static_path, "index.css"), "body { color: red; }")
+        stats = self._sync()
+        self.assertEqual(stats.copied_files, 1)
+        self.assertEqual(stats.copied_bytes, len("body { color: red; }"))
+        with open(os.path.join(self.public_path, "index.css"), 'r') as f:
+            self.assertEqual(f.read(), "body { color: red; }")
+
+    def test_touched_file_is_copied_without_checksum(self):
+        self._sync()
+        self._touch(os.path.join(self.static_path, "index.css"))
+        self.assertEqual(self._sync().copied_files, 1)
+
+    def test_touched_file_is_not_copied_with_checksum(self):
+        self._sync()
+        source = os.path.join(self.static_path, "index.css")
+        self._touch(source)
+        self.assertEqual(self._sync(checksum=True).copied_files, 0)
+        dest = os.path.join(self.public_path, "index.css")
+        self.assertEqual(os.stat(dest).st_mtime_ns, os.stat(source).st_mtime_ns)
+
+    def test_same_size_edit_is_caught_by_checksum(self):
+        self._sync()
+        source = os.path.join(self.static_path, "index.css")
+        st = os.stat(source)
+        self._write(source, "body []")
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertEqual(self._sync().copied_files, 0)
+        self.assertEqual(self._sync(checksum=True).copied_files, 1)
+
+    def test_orphans_are_deleted_and_pages_kept(self):
+        self._sync()
+        page = os.path.join(self.public_path, "index.html")
+        self._write(page, "<h1>Home</h1>")
+        os.remove(os.path.join(self.static_path, "images", "a.png"))
+        stats = self._sync()
+        self.assertEqual(stats.deleted_files, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public_path, "images")))
+        self.assertTrue(os.path.exists(page))
+        self.assertTrue(os.path.exists(os.path.join(self.public_path, "index.css")))
+
+    def test_without_cache_nothing_is_deleted(self):
+        self._write(os.path.join(self.public_path, "old.txt"), "old")
+        with self.assertLogs(level="INFO"):
+            stats = sync_static(self.static_path, self.public_path)
+        self.assertEqual(stats.copied_files, 2)
+        self.assertTrue(os.path.exists(os.path.join(self.public_path, "old.txt")))
+
+    def test_force_copies_everything(self):
+        self._sync()
+        self.assertEqual(self._sync(force=True).copied_files, 2)
+
+    def test_hardlink_mode(self):
+        self._sync(mode="hardlink")
+        source = os.path.join(self.static_path, "images", "a.png")
+        dest = os.path.join(self.public_path, "images", "a.png")
+        self.assertEqual(os.stat(dest).st_ino, os.stat(source).st_ino)
+        self.assertEqual(self._sync(mode="hardlink").copied_files, 0)
+
+    def test_many_files_on_a_thread_pool(self):
+        for i in range(50):
+            self._write(os.path.join(self.static_path, "many", f"{i:02}.txt"), str(i))
+        with self.assertLogs(level="INFO") as logs:
+            stats = sync_static(self.static_path, self.public_path, self.cache, jobs=8)
+        self.assertEqual(stats.copied_files, 52)
+        copied = [line for line in logs.output if "many" in line and "Copied file" in line]
+        self.assertEqual(copied, sorted(copied))
+        for i in range(50):
+            with open(os.path.join(self.public_path, "many", f"{i:02}.txt"), 'r') as f:
+                self.assertEqual(f.read(), str(i))
+
+    def test_missing_static_path_raises(self):
+        shutil.rmtree(self.static_path)
+        with self.assertRaises(FileNotFoundError):
+            sync_static(self.static_path, self.public_path, self.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
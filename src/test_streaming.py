@@ -0,0 +1,108 @@
+import io
+import os
+import shutil
+import unittest
+
+import generate_page
+from block_markdown import iter_markdown_blocks, markdown_to_blocks
+from template import Template
+
+
+DOCUMENT = """# Big Page
+
+Intro paragraph with a [link](/docs) and ![img](/images/a.png).
+
+## Section
+
+- one
+- two
+
+
+1. first
+2. second
+
+>quoted
+>text
+
+```
+code here
+```
+
+Final paragraph.
+"""
+
+
+class TestIterMarkdownBlocks(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        blocks = list(iter_markdown_blocks(io.StringIO(DOCUMENT)))
+        self.assertEqual(blocks, markdown_to_blocks(DOCUMENT))
+
+    def test_is_lazy(self):
+        blocks = iter_markdown_blocks(io.StringIO("first\n\nsecond\n\nthird"))
+        self.assertEqual(next(blocks), "first")
+
+
+class TestRenderAroundContent(unittest.TestCase):
+    def test_halves(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main><footer>{{ Title }}</footer>")
+        head, tail = template.render_around_content("T")
+        self.assertEqual(head, "<title>T</title><main>")
+        self.assertEqual(tail, "</main><footer>T</footer>")
+
+    def test_requires_single_content_slot(self):
+        template = Template("{{ Content }}{{ Content }}")
+        self.assertFalse(template.can_stream())
+        with self.assertRaises(ValueError):
+            template.render_around_content("T")
+
+
+class TestStreamingGeneration(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = "test_streaming_temp"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.source_path = os.path.join(self.test_dir, "big.md")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        with open(self.source_path, 'w') as f:
+            f.write(DOCUMENT)
+        with open(self.template_path, 'w') as f:
+            f.write('<title>{{ Title }}</title><link href="/index.css"><article>{{ Content }}</article>')
+        self.threshold = generate_page.STREAMING_THRESHOLD
+
+    def tearDown(self):
+        generate_page.STREAMING_THRESHOLD = self.threshold
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _generate(self, dest_name, threshold):
+        generate_page.STREAMING_THRESHOLD = threshold
+        dest_path = os.path.join(self.test_dir, dest_name)
+        with self.assertLogs(level="INFO"):
+            generate_page.generate_page(self.source_path, self.template_path, dest_path, "/site/")
+        with open(dest_path, 'r') as f:
+            return f.read()
+
+    def test_streamed_output_matches_in_memory_output(self):
+        in_memory = self._generate("in_memory.html", 1 << 30)
+        streamed = self._generate("streamed.html", 0)
+        self.assertEqual(streamed, in_memory)
+        self.assertIn('<a href="/site/docs">link</a>', streamed)
+
+    def test_read_source_streams_large_files(self):
+        generate_page.STREAMING_THRESHOLD = 0
+        content, source_hash = generate_page.read_source(self.source_path, with_hash=True)
+        self.assertIsNone(content)
+        self.assertEqual(len(source_hash), 64)
+
+    def test_missing_title_raises_before_writing(self):
+        with open(self.source_path, 'w') as f:
+            f.write("no title\n\njust text")
+        generate_page.STREAMING_THRESHOLD = 0
+        dest_path = os.path.join(self.test_dir, "out.html")
+        with self.assertLogs(level="INFO"):
+            with self.assertRaises(ValueError):
+                generate_page.generate_page(self.source_path, self.template_path, dest_path)
+        self.assertFalse(os.path.exists(dest_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import os
+import shutil
+
+from generate_page import render_page
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_splits_into_segments_and_slots(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(template.segments, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.render("Hi", "<p>text</p>"),
+            "<title>Hi</title><body><p>text</p></body>",
+        )
+
+    def test_repeated_slots(self):
+        template = Template("{{ Title }}|{{ Title }}|{{ Content }}")
+        self.assertEqual(template.render("T", "C"), "T|T|C")
+
+    def test_no_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render("T", "C"), "<p>static</p>")
+
+    def test_basepath_resolved_in_static_parts(self):
+        template = Template('<link href="/index.css" /><img src="/logo.png" />{{ Content }}', "/site/")
+        self.assertEqual(
+            template.segments[0],
+            '<link href="/site/index.css" /><img src="/site/logo.png" />',
+        )
+
+    def test_basepath_not_applied_to_slot_values(self):
+        template = Template("{{ Content }}", "/site/")
+        self.assertEqual(template.render("T", 'src="/x'), 'src="/x')
+
+
+class TestRenderPage(unittest.TestCase):
+    def test_content_links_and_images_get_basepath(self):
+        template = Template("{{ Content }}", "/site/")
+        html = render_page("# T\n\n[home](/) ![pic](/images/a.png) [ext](https://x.dev)", template)
+        self.assertIn('<a href="/site/">home</a>', html)
+        self.assertIn('<img src="/site/images/a.png" alt="pic"></img>', html)
+        self.assertIn('<a href="https://x.dev">ext</a>', html)
+
+    def test_code_text_is_not_rewritten(self):
+        template = Template("{{ Content }}", "/site/")
+        html = render_page('# T\n\n```\n<a href="/home">\n```', template)
+        self.assertIn('<a href="/home">', html)
+        self.assertNotIn("/site/home", html)
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = "test_template_temp"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        with open(self.template_path, 'w') as f:
+            f.write("<h1>{{ Title }}</h1>")
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_compiled_once(self):
+        first = load_template(self.template_path, "/")
+        self.assertIs(load_template(self.template_path, "/"), first)
+        self.assertIsNot(load_template(self.template_path, "/site/"), first)
+
+    def test_recompiled_after_edit(self):
+        load_template(self.template_path)
+        with open(self.template_path, 'w') as f:
+            f.write("<h2>{{ Title }} edited</h2>")
+        self.assertEqual(load_template(self.template_path).render("T", ""), "<h2>T edited</h2>")
+
+
+if __name__ == "__main__":
+    unittest.main()
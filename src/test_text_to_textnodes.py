@@ -0,0 +1,130 @@
+import random
+import unittest
+
+from inline_markdown import (
+    extract_markdown_images,
+    extract_markdown_links,
+    extract_markdown_links_and_images,
+    text_to_textnodes,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+)
+from textnode import TextNode, TextType
+
+
+def chained_text_to_textnodes(text):
+    """The original five-pass implementation, kept as the reference."""
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def outcome(func, text):
+    """Either ("ok", nodes) or ("error", message) so failures can be compared too."""
+    try:
+        return ("ok", func(text))
+    except ValueError as e:
+        return ("error", str(e))
+
+
+class TestTextToTextNodes(unittest.TestCase):
+    def test_all_types(self):
+        text = (
+            "This is **text** with an _italic_ word and a `code block` and an "
+            "![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        )
+        self.assertListEqual(
+            [
+                TextNode("This is ", TextType.TEXT),
+                TextNode("text", TextType.BOLD),
+                TextNode(" with an ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+                TextNode(" word and a ", TextType.TEXT),
+                TextNode("code block", TextType.CODE),
+                TextNode(" and an ", TextType.TEXT),
+                TextNode("obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"),
+                TextNode(" and a ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "https://boot.dev"),
+            ],
+            text_to_textnodes(text),
+        )
+
+    def test_empty(self):
+        self.assertListEqual([], text_to_textnodes(""))
+
+    def test_lower_priority_delimiters_inside_bold_are_literal(self):
+        self.assertListEqual(
+            [TextNode("a_b`c", TextType.BOLD)],
+            text_to_textnodes("**a_b`c**"),
+        )
+
+    def test_unclosed_delimiter_raises(self):
+        for text in ["**bold", "_italic", "`code", "a _b **c** d_ e", "`a_b`"]:
+            with self.assertRaises(ValueError, msg=text):
+                text_to_textnodes(text)
+
+
+class TestTextToTextNodesParity(unittest.TestCase):
+    CASES = [
+        "plain text",
+        "**bold** and _italic_ and `code`",
+        "***triple*** stars",
+        "****",
+        "**a** **b**",
+        "_a_ `b` **c**",
+        "[link](/a) [other](/b) trailing",
+        "![img](/a.png)[link](/b)",
+        "!![img](/a.png)",
+        "![bad[nested](x)",
+        "[x![a](b)](c)",
+        "[a](b![c](d))",
+        "**x!**[a](b)",
+        "[a](http://x_y_z.com)",
+        "[a](http://x_y.com)",
+        "`**`",
+        "**`**`",
+        "_**_",
+        "a_b_c_d_e",
+        "[](empty) ![](empty)",
+        "text [unclosed](link",
+        "text ]( odd [ brackets )",
+    ]
+
+    def test_hand_written_cases(self):
+        for text in self.CASES:
+            self.assertEqual(outcome(chained_text_to_textnodes, text), outcome(text_to_textnodes, text), msg=text)
+
+    def test_fuzz(self):
+        rng = random.Random(1234)
+        pieces = [
+            "a", "b", " ", "word ", "*", "**", "_", "`", "!", "[", "]", "(", ")",
+            "[t](u)", "![alt](src)", "[x](y_z)", "**b**", "_i_", "`c`",
+        ]
+        for _ in range(5000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(outcome(chained_text_to_textnodes, text), outcome(text_to_textnodes, text), msg=text)
+
+
+class TestCombinedExtraction(unittest.TestCase):
+    def test_matches_separate_extractors(self):
+        """One scan finds the same images and links as the two patterns"""
+        rng = random.Random(99)
+        pieces = ["a ", "!", "[", "]", "(", ")", "[t](u)", "![alt](src)", "x"]
+        texts = TestTextToTextNodesParity.CASES + [
+            "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12))) for _ in range(2000)
+        ]
+        for text in texts:
+            self.assertEqual(
+                extract_markdown_links_and_images(text),
+                (extract_markdown_images(text), extract_markdown_links(text)),
+                msg=text,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
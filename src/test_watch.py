@@ -0,0 +1,174 @@
+import unittest
+import os
+import shutil
+import sys
+import time
+from build_cache import BuildCache
+from generate_page import generate_pages_recursive
+from images import ImageSet
+from static_to_public import static_to_public
+from watch import DependencyGraph, InotifyWatcher, PollingWatcher, rebuild_changed
+
+
+class TestWatchBase(unittest.TestCase):
+
+    def setUp(self):
+        """Build a small site once before each test"""
+        self.test_dir = "test_watch_temp"
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.dest_dir = os.path.join(self.test_dir, "docs")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\nWelcome.")
+        self._write(os.path.join(self.content_dir, "blog", "post.md"), "# Post\n\nA post.")
+        self._write(os.path.join(self.static_dir, "index.css"), "body {}")
+        self._write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+
+        self.cache = BuildCache(os.path.join(self.test_dir, "cache.json"))
+        with self.assertLogs(level="INFO"):
+            static_to_public(self.static_dir, self.dest_dir, self.cache)
+            generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, "/", self.cache)
+        self.graph = DependencyGraph(self.content_dir, self.static_dir, self.template_path, self.dest_dir)
+
+    def tearDown(self):
+        """Clean up the test site after each test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content):
+        """Helper method to create a file with content"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def _rebuild(self, paths):
+        """Run rebuild_changed and return the log lines"""
+        with self.assertLogs(level="INFO") as logs:
+            rebuild_changed(paths, self.graph, "/", self.cache)
+        return "\n".join(logs.output)
+
+
+class TestRebuildChanged(TestWatchBase):
+
+    def test_markdown_edit_rebuilds_one_page(self):
+        path = os.path.join(self.content_dir, "blog", "post.md")
+        self._write(path, "# Post\n\nEdited.")
+        output = self._rebuild({path})
+        self.assertEqual(output.count("Generating page"), 1)
+        self.assertIn("Edited.", self._read(os.path.join(self.dest_dir, "blog", "post.html")))
+
+    def test_new_markdown_file(self):
+        path = os.path.join(self.content_dir, "new.md")
+        self._write(path, "# New\n\nFresh.")
+        self._rebuild({path})
+        self.assertIn("Fresh.", self._read(os.path.join(self.dest_dir, "new.html")))
+
+    def test_deleted_markdown_file(self):
+        path = os.path.join(self.content_dir, "blog", "post.md")
+        os.remove(path)
+        self._rebuild({path})
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "blog", "post.html")))
+        self.assertNotIn(os.path.join(self.dest_dir, "blog", "post.html"), self.cache.pages)
+
+    def test_deleted_content_directory(self):
+        path = os.path.join(self.content_dir, "blog")
+        shutil.rmtree(path)
+        self._rebuild({path})
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest_dir, "index.html")))
+
+    def test_static_edit_copies_one_file(self):
+        path = os.path.join(self.static_dir, "index.css")
+        self._write(path, "body { color: red; }")
+        output = self._rebuild({path})
+        self.assertEqual(output.count("Copied file"), 1)
+        self.assertNotIn("Generating page", output)
+        self.assertEqual(self._read(os.path.join(self.dest_dir, "index.css")), "body { color: red; }")
+
+    def test_template_edit_rebuilds_all_pages(self):
+        self._write(self.template_path, "<h1>{{ Title }}</h1>{{ Content }}")
+        output = self._rebuild({self.template_path})
+        self.assertEqual(output.count("Generating page"), 2)
+        self.assertIn("<h1>Home</h1>", self._read(os.path.join(self.dest_dir, "index.html")))
+
+    def test_template_edit_keeps_image_attributes(self):
+        images = ImageSet({"/images/tom.png": {"width": 928, "height": 468, "srcset": []}})
+        self._write(os.path.join(self.content_dir, "index.md"), "# Home\n\n![Tom](/images/tom.png)")
+        self._write(self.template_path, "<h1>{{ Title }}</h1>{{ Content }}")
+        with self.assertLogs(level="INFO"):
+            rebuild_changed({self.template_path}, self.graph, "/", self.cache, images)
+        self.assertIn('width="928" height="468"', self._read(os.path.join(self.dest_dir, "index.html")))
+
+    def test_unrelated_paths_are_ignored(self):
+        rebuilt = rebuild_changed({os.path.join(self.test_dir, "notes.txt")}, self.graph, "/", self.cache)
+        self.assertEqual(rebuilt, 0)
+        self.assertFalse(os.path.exists(self.cache.manifest_path))
+
+
+class TestWatchers(TestWatchBase):
+
+    def _assert_sees_edit(self, watcher):
+        try:
+            path = os.path.join(self.content_dir, "blog", "post.md")
+            time.sleep(0.01)
+            self._write(path, "# Post\n\nEdited and longer.")
+            changed = watcher.wait(timeout=2)
+            self.assertIn(os.path.abspath(path), {os.path.abspath(p) for p in changed})
+
+            self._write(self.template_path, "<b>{{ Title }}</b>{{ Content }}")
+            changed = watcher.wait(timeout=2)
+            self.assertIn(os.path.abspath(self.template_path), {os.path.abspath(p) for p in changed})
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        watcher = PollingWatcher([self.content_dir, self.static_dir], [self.template_path], interval=0.01)
+        self._assert_sees_edit(watcher)
+
+    def test_polling_watcher_times_out(self):
+        watcher = PollingWatcher([self.content_dir], interval=0.01)
+        self.assertEqual(watcher.wait(timeout=0.05), set())
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_watcher(self):
+        watcher = InotifyWatcher([self.content_dir, self.static_dir], [self.template_path])
+        self._assert_sees_edit(watcher)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_watcher_ignores_neighbours_of_watched_files(self):
+        # The template's directory also holds the build cache; saving it
+        # must not wake the watcher, or watch mode rebuilds forever.
+        watcher = InotifyWatcher([self.content_dir], [self.template_path])
+        try:
+            self.cache.save()
+            self._write(os.path.join(self.test_dir, "notes.txt"), "unrelated")
+            self.assertEqual(watcher.wait(timeout=0.2), set())
+
+            self._write(self.template_path, "<b>{{ Title }}</b>{{ Content }}")
+            changed = watcher.wait(timeout=2)
+            self.assertEqual({os.path.abspath(p) for p in changed}, {os.path.abspath(self.template_path)})
+        finally:
+            watcher.close()
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_watcher_sees_files_in_new_directory(self):
+        watcher = InotifyWatcher([self.content_dir])
+        try:
+            path = os.path.join(self.content_dir, "new", "page.md")
+            self._write(path, "# New\n\nPage.")
+            changed = watcher.wait(timeout=2)
+            self.assertIn(path, changed)
+        finally:
+            watcher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,280 @@
+import os
+import sys
+import time
+import select
+import struct
+import logging
+import ctypes
+import ctypes.util
+
+from generate_page import generate_page, generate_pages_recursive, page_dest_path
+from static_to_public import copy_static_file
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+# How long to keep collecting events after the first one, so an editor's
+# write + rename + chmod turns into a single rebuild.
+SETTLE_SECONDS = 0.02
+
+
+class DependencyGraph:
+    def __init__(self, content_dir, static_dir, template_path, dest_dir):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        self._content_abs = os.path.abspath(content_dir)
+        self._static_abs = os.path.abspath(static_dir)
+        self._template_abs = os.path.abspath(template_path)
+
+    def classify(self, path):
+        path = os.path.abspath(path)
+        if path == self._template_abs:
+            return "template"
+        if path.startswith(self._content_abs + os.sep):
+            return "content"
+        if path.startswith(self._static_abs + os.sep):
+            return "static"
+        return None
+
+    def page_source(self, path):
+        return os.path.join(self.content_dir, os.path.relpath(os.path.abspath(path), self._content_abs))
+
+    def static_source(self, path):
+        return os.path.join(self.static_dir, os.path.relpath(os.path.abspath(path), self._static_abs))
+
+    def page_output(self, source_path):
+        return page_dest_path(source_path, self.content_dir, self.dest_dir)
+
+    def page_output_dir(self, source_dir):
+        return os.path.join(self.dest_dir, os.path.relpath(source_dir, self.content_dir))
+
+    def static_output(self, source_path):
+        return os.path.join(self.dest_dir, os.path.relpath(source_path, self.static_dir))
+
+
+def rebuild_changed(paths, graph, basepath="/", cache=None, images=None):
+    # Rebuild only what the changed paths feed into: one page per markdown
+    # file, one copy per static file, every page for the template. images is
+    # the set the initial build made; its variants aren't remade here.
+    started = time.perf_counter()
+    rebuilt = 0
+    kinds = {}
+    for path in paths:
+        kind = graph.classify(path)
+        if kind is not None:
+            kinds.setdefault(kind, set()).add(path)
+
+    if "template" in kinds:
+        if cache is not None:
+            cache.forget_hash(graph.template_path)
+        generate_pages_recursive(graph.content_dir, graph.template_path, graph.dest_dir, basepath, cache, images=images)
+        rebuilt += 1
+    else:
+        for path in sorted(kinds.get("content", ())):
+            source = graph.page_source(path)
+            if os.path.isfile(source):
+                if source.endswith(".md"):
+                    generate_page(source, graph.template_path, graph.page_output(source), basepath, cache, images=images)
+                    rebuilt += 1
+            elif os.path.isdir(source):
+                generate_pages_recursive(source, graph.template_path, graph.page_output_dir(source), basepath, cache, images=images)
+                rebuilt += 1
+            else:
+                rebuilt += _remove_outputs(source, graph.page_output(source), graph, cache)
+
+    for path in sorted(kinds.get("static", ())):
+        source = graph.static_source(path)
+        if os.path.isfile(source):
+            copy_static_file(source, graph.static_output(source), cache)
+            rebuilt += 1
+        elif os.path.isdir(source):
+            for dirpath, _, filenames in os.walk(source):
+                for filename in filenames:
+                    file_path = os.path.join(dirpath, filename)
+                    copy_static_file(file_path, graph.static_output(file_path), cache)
+                    rebuilt += 1
+        else:
+            rebuilt += _remove_outputs(source, graph.static_output(source), graph, cache)
+
+    if rebuilt and cache is not None:
+        cache.save()
+    if rebuilt:
+        logging.info(f"Rebuilt {rebuilt} output(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return rebuilt
+
+
+def _remove_outputs(source, dest_path, graph, cache):
+    if cache is not None:
+        outputs = cache.outputs_for_source(source)
+        for output in outputs:
+            cache.remove_output(output, graph.dest_dir)
+        return len(outputs)
+    if os.path.isfile(dest_path):
+        os.remove(dest_path)
+        logging.info(f"Pruned stale output: {dest_path}")
+        return 1
+    return 0
+
+
+class PollingWatcher:
+    def __init__(self, trees, files=(), interval=0.1):
+        self.trees = trees
+        self.files = files
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        paths = list(self.files)
+        for root in self.trees:
+            for dirpath, _, filenames in os.walk(root):
+                paths.extend(os.path.join(dirpath, filename) for filename in filenames)
+        snapshot = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll(self):
+        snapshot = self._scan()
+        changed = {path for path, stamp in snapshot.items() if self._snapshot.get(path) != stamp}
+        changed.update(path for path in self._snapshot if path not in snapshot)
+        self._snapshot = snapshot
+        return changed
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.poll()
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    # Directories under `trees` are watched recursively; single `files` are
+    # watched through their parent directory so editors that save by
+    # renaming a temp file over the original are still seen; events for
+    # anything else in those directories are dropped.
+    def __init__(self, trees, files=()):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs = {}
+        self._recursive = set()
+        self._files = {os.path.abspath(path) for path in files}
+        try:
+            for root in trees:
+                self._watch_tree(root)
+            for path in files:
+                self._watch_dir(os.path.dirname(path) or ".")
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _watch_dir(self, dirpath):
+        wd = self._add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch {dirpath}: {os.strerror(err)}")
+        self._dirs[wd] = dirpath
+        return wd
+
+    def _watch_tree(self, root):
+        added = []
+        for dirpath, _, filenames in os.walk(root):
+            self._recursive.add(self._watch_dir(dirpath))
+            added.extend(os.path.join(dirpath, filename) for filename in filenames)
+        return added
+
+    def _read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += EVENT_HEADER.size + length
+                directory = self._dirs.get(wd)
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    self._recursive.discard(wd)
+                    continue
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if wd not in self._recursive and os.path.abspath(path) not in self._files:
+                    continue
+                changed.add(path)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and wd in self._recursive:
+                    # Files may already exist in a new directory before it is watched.
+                    changed.update(self._watch_tree(path))
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if not readable:
+                return set()
+            changed = self._read_events()
+            while select.select([self.fd], [], [], SETTLE_SECONDS)[0]:
+                changed.update(self._read_events())
+            # A wake-up made only of dropped events isn't a change.
+            if changed:
+                return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(trees, files=(), polling=False):
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(trees, files)
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(trees, files)
+
+
+def watch(content_dir, static_dir, template_path, dest_dir, basepath="/", cache=None, polling=False, images=None):
+    graph = DependencyGraph(content_dir, static_dir, template_path, dest_dir)
+    watcher = make_watcher([content_dir, static_dir], [template_path], polling)
+    logging.info(f"Watching {content_dir}, {static_dir} and {template_path} for changes ({type(watcher).__name__})")
+    try:
+        while True:
+            changed = watcher.wait()
+            try:
+                rebuild_changed(changed, graph, basepath, cache, images)
+            except Exception as e:
+                # Keep watching: the next save usually fixes it.
+                logging.error(f"Rebuild failed: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()